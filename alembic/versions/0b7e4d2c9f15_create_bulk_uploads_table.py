@@ -0,0 +1,38 @@
+"""create bulk uploads table
+
+Revision ID: 0b7e4d2c9f15
+Revises: f3b8a1c6d402
+Create Date: 2026-10-17 19:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7e4d2c9f15'
+down_revision: Union[str, None] = 'f3b8a1c6d402'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'bulk_uploads',
+        sa.Column('batch_id', sa.String(100), nullable=False),
+        sa.Column('brain_id', sa.String(100), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('succeeded', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('batch_id'),
+    )
+    op.create_index('ix_bulk_uploads_started_at', 'bulk_uploads', ['started_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bulk_uploads_started_at', table_name='bulk_uploads')
+    op.drop_table('bulk_uploads')
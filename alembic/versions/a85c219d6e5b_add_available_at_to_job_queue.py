@@ -0,0 +1,29 @@
+"""add available_at to job queue
+
+Revision ID: a85c219d6e5b
+Revises: f74b108c5d4a
+Create Date: 2026-10-17 13:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a85c219d6e5b'
+down_revision: Union[str, None] = 'f74b108c5d4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'job_queue',
+        sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('job_queue', 'available_at')
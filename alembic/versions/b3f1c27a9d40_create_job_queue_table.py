@@ -0,0 +1,53 @@
+"""create job queue table
+
+Revision ID: b3f1c27a9d40
+Revises: fcca895c318d
+Create Date: 2026-10-17 09:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f1c27a9d40'
+down_revision: Union[str, None] = 'fcca895c318d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job_queue',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('scheduled_job_id', sa.String(36), nullable=False),
+        sa.Column('job_type', sa.String(50), nullable=False),
+        sa.Column('tenant_id', sa.String(36), nullable=False),
+        sa.Column('brain_id', sa.String(100), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='queued'),
+        sa.Column('worker_id', sa.String(100), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('enqueued_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_job_queue_tenant_id', 'job_queue', ['tenant_id'])
+    op.create_index('ix_job_queue_status_enqueued_at', 'job_queue', ['status', 'enqueued_at'])
+    op.create_index(
+        'uq_job_queue_queued_scheduled_job',
+        'job_queue',
+        ['scheduled_job_id'],
+        unique=True,
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_job_queue_queued_scheduled_job', table_name='job_queue')
+    op.drop_index('ix_job_queue_status_enqueued_at', table_name='job_queue')
+    op.drop_index('ix_job_queue_tenant_id', table_name='job_queue')
+    op.drop_table('job_queue')
@@ -0,0 +1,29 @@
+"""add priority to job queue
+
+Revision ID: b96d32ae7f6c
+Revises: a85c219d6e5b
+Create Date: 2026-10-17 14:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b96d32ae7f6c'
+down_revision: Union[str, None] = 'a85c219d6e5b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'job_queue',
+        sa.Column('priority', sa.SmallInteger(), server_default='0', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('job_queue', 'priority')
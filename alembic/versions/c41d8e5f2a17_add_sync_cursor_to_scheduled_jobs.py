@@ -0,0 +1,26 @@
+"""add sync cursor to scheduled jobs
+
+Revision ID: c41d8e5f2a17
+Revises: b3f1c27a9d40
+Create Date: 2026-10-17 10:02:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d8e5f2a17'
+down_revision: Union[str, None] = 'b3f1c27a9d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scheduled_jobs', sa.Column('sync_cursor', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('scheduled_jobs', 'sync_cursor')
@@ -0,0 +1,37 @@
+"""create brain uploaded documents table
+
+Revision ID: d18f54cb9e8f
+Revises: b96d32ae7f6c
+Create Date: 2026-10-17 16:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd18f54cb9e8f'
+down_revision: Union[str, None] = 'b96d32ae7f6c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'brain_uploaded_documents',
+        sa.Column('brain_id', sa.String(100), nullable=False),
+        sa.Column('document_type', sa.String(50), nullable=False),
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('file_id', sa.String(100), nullable=False),
+        sa.Column('filename', sa.String(255), nullable=True),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('brain_id', 'document_type', 'content_hash'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('brain_uploaded_documents')
@@ -0,0 +1,34 @@
+"""add statement sync watermark
+
+Revision ID: d52e9f6a3b28
+Revises: c41d8e5f2a17
+Create Date: 2026-10-17 11:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd52e9f6a3b28'
+down_revision: Union[str, None] = 'c41d8e5f2a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scheduled_jobs', sa.Column('sync_cursor_id', sa.Integer(), nullable=True))
+    # Backs the delta query: WHERE tenant_id = ? AND (updated_at, id) > (?, ?) ORDER BY updated_at, id
+    op.create_index(
+        'ix_statements_tenant_id_updated_at',
+        'statements',
+        ['tenant_id', 'updated_at', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_statements_tenant_id_updated_at', table_name='statements')
+    op.drop_column('scheduled_jobs', 'sync_cursor_id')
@@ -0,0 +1,35 @@
+"""create brain record hashes table
+
+Revision ID: e63fa07b4c39
+Revises: d52e9f6a3b28
+Create Date: 2026-10-17 12:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e63fa07b4c39'
+down_revision: Union[str, None] = 'd52e9f6a3b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'brain_record_hashes',
+        sa.Column('tenant_id', sa.String(36), nullable=False),
+        sa.Column('brain_id', sa.String(100), nullable=False),
+        sa.Column('record_type', sa.String(50), nullable=False),
+        sa.Column('record_key', sa.String(100), nullable=False),
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('tenant_id', 'brain_id', 'record_type', 'record_key'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('brain_record_hashes')
@@ -0,0 +1,50 @@
+"""add unique active scheduled job index
+
+Revision ID: f3b8a1c6d402
+Revises: d18f54cb9e8f
+Create Date: 2026-10-17 19:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8a1c6d402'
+down_revision: Union[str, None] = 'd18f54cb9e8f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the oldest of any active duplicates created by workers booting together
+    op.execute(
+        """
+        UPDATE scheduled_jobs
+        SET is_active = false
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, tenant_id, job_type
+                    ORDER BY created_at, id
+                ) AS position
+                FROM scheduled_jobs
+                WHERE is_active
+            ) ranked
+            WHERE position > 1
+        )
+        """
+    )
+    op.create_index(
+        'uq_scheduled_jobs_active_user_tenant_type',
+        'scheduled_jobs',
+        ['user_id', 'tenant_id', 'job_type'],
+        unique=True,
+        postgresql_where=sa.text('is_active'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_scheduled_jobs_active_user_tenant_type', table_name='scheduled_jobs')
@@ -0,0 +1,51 @@
+"""create job runs table
+
+Revision ID: f74b108c5d4a
+Revises: e63fa07b4c39
+Create Date: 2026-10-17 13:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f74b108c5d4a'
+down_revision: Union[str, None] = 'e63fa07b4c39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job_runs',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('scheduled_job_id', sa.String(36), nullable=True),
+        sa.Column('job_type', sa.String(50), nullable=False),
+        sa.Column('tenant_id', sa.String(36), nullable=False),
+        sa.Column('brain_id', sa.String(100), nullable=False),
+        sa.Column('status', sa.String(20), server_default='running', nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('records_sent', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('batches_sent', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('bytes_posted', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('timed_out', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_job_runs_tenant_job_type_started_at',
+        'job_runs',
+        ['tenant_id', 'job_type', 'started_at'],
+    )
+    op.create_index('ix_job_runs_started_at', 'job_runs', ['started_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_runs_started_at', table_name='job_runs')
+    op.drop_index('ix_job_runs_tenant_job_type_started_at', table_name='job_runs')
+    op.drop_table('job_runs')
@@ -8,6 +8,8 @@ from fastapi import FastAPI
 from pydantic_settings import BaseSettings
 from starlette.middleware.sessions import SessionMiddleware
 
+from app.utils import json_codec
+
 # Try to load .env from current directory, if not found, try parent directory
 env_path = Path('.env')
 if not env_path.exists():
@@ -78,6 +80,69 @@ class Settings(BaseSettings):
     schedule_day: str
     schedule_month: str
     schedule_day_of_week: str
+    # Spread tenant jobs across the schedule window instead of firing them together.
+    # A window of 0 uses the whole interval between two scheduled runs.
+    schedule_spread_enabled: bool = True
+    schedule_spread_seconds: int = 0
+    schedule_jitter_seconds: int = 0
+
+    # Xero API rate limits, applied per tenant
+    xero_calls_per_minute: int = 60
+    xero_max_concurrent_calls: int = 5
+    xero_rate_limit_max_wait_seconds: int = 300
+    xero_request_max_wait_seconds: int = 5  # Request handlers answer 429 rather than wait longer
+    xero_rate_limit_retries: int = 3
+
+    # Brain HTTP client settings
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry_seconds: float = 30.0
+    http2_enabled: bool = False  # Requires the h2 package
+    http_retries: int = 3
+    http_backoff_base_seconds: float = 0.5
+    http_backoff_max_seconds: float = 10.0
+    http_breaker_failure_threshold: int = 5
+    http_breaker_reset_seconds: float = 30.0
+    http_compression: str = "none"  # none, gzip or zstd (requires zstandard); only if the brain accepts it
+    http_compression_min_bytes: int = 65536
+    http_compression_level: int = 6
+    http_compression_retry_seconds: int = 3600  # How long a host that rejected a compressed body gets uncompressed ones
+
+    # Brain response cache, a TTL of 0 disables caching for that endpoint
+    brain_cache_max_entries: int = 1000
+    brain_cache_stats_ttl_seconds: int = 60
+    brain_cache_transactions_ttl_seconds: int = 30
+    brain_cache_files_ttl_seconds: int = 30
+    brain_cache_brains_ttl_seconds: int = 300
+
+    # Brain file upload settings
+    upload_chunk_bytes: int = 1048576  # Uploads are streamed to storage in chunks of this size
+    upload_concurrency: int = 8  # Files of a bulk upload in flight at once
+    upload_bulk_max_files: int = 500
+
+    # JSON encoding for API responses and brain requests: auto, orjson or stdlib
+    json_codec: str = "auto"
+
+    # Invoice sync settings
+    invoice_page_size: int = 100
+    invoice_fetch_concurrency: int = 4
+    invoice_page_retries: int = 3
+
+    # Statement sync settings
+    statement_chunk_size: int = 500
+    statement_sync_overlap_seconds: int = 300  # Re-read window behind the high-water mark, longer than any write transaction
+
+    # Job executor settings
+    job_max_workers: int = 4
+    job_invoice_concurrency: int = 2
+    job_statement_concurrency: int = 4
+    job_queue_poll_seconds: float = 5.0
+    job_stale_after_seconds: int = 900
+    job_priority_aging_seconds: int = 300  # Waiting this long raises a run by one priority level
+
+    # Startup warm-up settings
+    startup_skip_recent_seconds: int = 3600  # Skip the boot run if the last successful run is newer
+    startup_ramp_seconds: int = 600  # Spread the remaining boot runs over this window
 
     @property
     def brain_headers(self) -> Dict[str, str]:
@@ -99,8 +164,10 @@ class Settings(BaseSettings):
 class AppConfig:
     def __init__(self):
         self.settings = Settings()
+        json_codec.configure(self.settings.json_codec)
         self.app = FastAPI(
             title="Xero FastAPI Integration",
+            default_response_class=json_codec.FastJSONResponse,
             version="1.0.0",
             docs_url="/api/v1/docs",  # Swagger UI path
             openapi_url="/api/v1/openapi.json",  # OpenAPI schema path
@@ -12,6 +12,7 @@ from xero_python.api_client.oauth2 import OAuth2Token
 from app.config import settings
 from app.core.deps import get_current_user, get_db
 from app.models.database.schema_models import User
+from app.services.xero.rate_limiter import xero_rate_limiter
 from app.services.xero.token_manager import token_manager
 
 logger = logging.getLogger(__name__)
@@ -44,6 +45,9 @@ api_client = ApiClient(
     pool_threads=1,
 )
 
+# Every Xero call made through the shared client counts against its tenant's rate limit
+xero_rate_limiter.install(api_client, max_retries=settings.xero_rate_limit_retries)
+
 
 def create_token_dict(token):
     """Create a complete token dictionary including scope."""
@@ -7,6 +7,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.config import app
 from app.error_handlers import tenant_error_handler
 from app.logging_settings import default_settings
+from app.routes import metrics, scheduled_jobs
 from app.routes.brain import me, files, transactions
 from app.routes.user_account import login, user
 from app.routes.xero import (
@@ -17,10 +18,17 @@ from app.routes.xero import (
     tenants,
     organisations
 )
-from app.scheduled_tasks.job_manager import start_jobs_on_startup, scheduler
+from app.scheduled_tasks.job_manager import (
+    shutdown_job_workers,
+    start_job_workers,
+    start_jobs_on_startup,
+)
 from app.tests import test_db_connection
+from app.utils.http_client import close_http_client, open_http_client
+from app.utils.response_cache import cache_invalidation_bus
 from app.core.auth_middleware import AuthMiddleware
 from app.core.deps import get_db
+from app.database import engine
 
 logging.config.dictConfig(default_settings)
 
@@ -38,10 +46,15 @@ async def lifespan(app: FastAPI):
     """Lifespan context manager for FastAPI application"""
     # Startup
     db = next(get_db())
+    await open_http_client()
+    cache_invalidation_bus.start(engine)
+    start_job_workers()
     start_jobs_on_startup(db)
     yield
     # Shutdown
-    scheduler.shutdown()
+    shutdown_job_workers()
+    cache_invalidation_bus.stop(timeout=5)
+    await close_http_client()
 
 app.router.lifespan_context = lifespan
 # Add authentication middleware
@@ -60,6 +73,8 @@ app.include_router(
     bank_transactions.router, prefix="/api/v1", tags=["Xero Bank Transactions"]
 )
 app.include_router(organisations.router, prefix="/api/v1", tags=["Xero Organisations"])
+app.include_router(scheduled_jobs.router, prefix="/api/v1", tags=["Scheduled Jobs"])
+app.include_router(metrics.router, prefix="/api/v1", tags=["Metrics"])
 # Add brain routers with their own prefixes
 app.include_router(me.router, prefix="/api/v1", tags=["Brain Details"])
 app.include_router(files.router, prefix="/api/v1", tags=["Brain File Operations"])
@@ -0,0 +1,35 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, SmallInteger, String, Text, text
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class JobQueueEntry(Base):
+    """Durable queue of job runs shared by every worker process"""
+
+    __tablename__ = "job_queue"
+    __table_args__ = (
+        # At most one waiting run per scheduled job, so repeated enqueues coalesce
+        Index(
+            "uq_job_queue_queued_scheduled_job",
+            "scheduled_job_id",
+            unique=True,
+            postgresql_where=text("status = 'queued'"),
+        ),
+        Index("ix_job_queue_status_enqueued_at", "status", "enqueued_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    scheduled_job_id = Column(String(36), nullable=False)
+    job_type = Column(String(50), nullable=False)  # 'invoice' or 'statement'
+    tenant_id = Column(String(36), nullable=False, index=True)
+    brain_id = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False, server_default="queued")  # queued, running, done
+    priority = Column(SmallInteger, nullable=False, server_default="0")  # Higher runs first, see job_queue.PRIORITY_*
+    worker_id = Column(String(100), nullable=True)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    error = Column(Text, nullable=True)
+    enqueued_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Not claimed before this time
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
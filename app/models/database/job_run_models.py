@@ -0,0 +1,29 @@
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Float, Index, Integer, String, Text
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class JobRun(Base):
+    """History of scheduled job runs with per-run metrics"""
+
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        Index("ix_job_runs_tenant_job_type_started_at", "tenant_id", "job_type", "started_at"),
+        Index("ix_job_runs_started_at", "started_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    scheduled_job_id = Column(String(36), nullable=True)
+    job_type = Column(String(50), nullable=False)  # 'invoice' or 'statement'
+    tenant_id = Column(String(36), nullable=False)
+    brain_id = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False, server_default="running")  # running, success, failed, timeout
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    records_sent = Column(Integer, nullable=False, server_default="0")
+    batches_sent = Column(Integer, nullable=False, server_default="0")
+    bytes_posted = Column(BigInteger, nullable=False, server_default="0")
+    timed_out = Column(Boolean, nullable=False, server_default="false")
+    error = Column(Text, nullable=True)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, String
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class BrainRecordHash(Base):
+    """Content hash of each record last acknowledged by the brain, per tenant"""
+
+    __tablename__ = "brain_record_hashes"
+
+    tenant_id = Column(String(36), primary_key=True)
+    brain_id = Column(String(100), primary_key=True)
+    record_type = Column(String(50), primary_key=True)  # 'invoice' or 'statement'
+    record_key = Column(String(100), primary_key=True)  # InvoiceID or statement id
+    content_hash = Column(String(64), nullable=False)  # SHA-256 hex digest
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
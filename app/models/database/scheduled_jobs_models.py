@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, String
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, text
 from sqlalchemy.sql import func
 
 from app.database import Base
@@ -8,6 +8,18 @@ class ScheduledJob(Base):
     """Model to track active scheduled jobs per user/tenant"""
 
     __tablename__ = "scheduled_jobs"
+    __table_args__ = (
+        # At most one active job per user, tenant and type, so workers booting
+        # together cannot each create one
+        Index(
+            "uq_scheduled_jobs_active_user_tenant_type",
+            "user_id",
+            "tenant_id",
+            "job_type",
+            unique=True,
+            postgresql_where=text("is_active"),
+        ),
+    )
 
     id = Column(String(36), primary_key=True)
     user_id = Column(String(36), nullable=False)
@@ -15,5 +27,7 @@ class ScheduledJob(Base):
     brain_id = Column(String(100), nullable=False)  # Increased length to accommodate brain_ prefix
     job_type = Column(String(50), nullable=False)  # 'invoice' or 'statement'
     is_active = Column(Boolean, default=True)
+    sync_cursor = Column(DateTime(timezone=True), nullable=True)  # High-water mark of the last successful push
+    sync_cursor_id = Column(Integer, nullable=True)  # Tie-breaker for rows sharing the sync_cursor timestamp
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
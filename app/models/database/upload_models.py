@@ -0,0 +1,34 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class BrainUploadedDocument(Base):
+    """Content hash of each document uploaded to a brain, per document type, with the file ID it was given"""
+
+    __tablename__ = "brain_uploaded_documents"
+
+    brain_id = Column(String(100), primary_key=True)
+    # The same file uploaded as another type is processed differently by the brain
+    document_type = Column(String(50), primary_key=True)
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 hex digest of the file
+    file_id = Column(String(100), nullable=False)
+    filename = Column(String(255), nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class BulkUpload(Base):
+    """Progress of a bulk upload, so any worker can report it"""
+
+    __tablename__ = "bulk_uploads"
+
+    batch_id = Column(String(100), primary_key=True)
+    brain_id = Column(String(100), nullable=False)
+    total = Column(Integer, nullable=False)
+    succeeded = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,16 +1,34 @@
+import asyncio
+import hashlib
 import logging
-import os
 import json
-from fastapi import APIRouter, Form, HTTPException, Query, UploadFile
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Form, HTTPException, Query, UploadFile
+from sqlalchemy.orm import Session
+
 from app.config import settings
+from app.core.deps import get_db
 from app.models.brain.brain_model import TextProcessRequest
+from app.utils.database.upload_utils import (
+    finish_bulk_upload,
+    get_bulk_upload_progress,
+    get_uploaded_file_id,
+    record_bulk_upload_result,
+    save_uploaded_document,
+    start_bulk_upload,
+)
 from app.utils.http_client import get_json, post_json, make_api_request, HttpClientError, http_exception_handler
+from app.utils.response_cache import brain_tag, cached_pass_through, invalidate_brain
 
 # Get the logger configured in main.py
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/brain/files")
 
+DOCUMENT_TYPES = ["invoice", "statement", "bill"]
+
 @router.get("/", description="List all documents in a brain")
 async def list_files(
     brain_id: str = Query(..., description="Brain ID to filter files"),
@@ -33,8 +51,134 @@ async def list_files(
         "filterBy": filter_by,
     }
     
-    data = await get_json(url, params=params, log_message="list files")
-    return data
+    # Returned as the brain sent it, without parsing
+    return await cached_pass_through(
+        "files",
+        url,
+        ttl=settings.brain_cache_files_ttl_seconds,
+        params=params,
+        tags=[brain_tag(brain_id)],
+        log_message="list files",
+    )
+
+
+def _upload_stream(file: UploadFile, chunk_size: int):
+    """Body factory for make_api_request: reads the upload from the start in chunks"""
+
+    async def chunks():
+        await file.seek(0)
+        while chunk := await file.read(chunk_size):
+            yield chunk
+
+    return chunks
+
+
+def _hash_upload(file: UploadFile, chunk_size: int) -> Tuple[int, str]:
+    """Size and SHA-256 hex digest of the spooled upload, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    file.file.seek(0)
+    while chunk := file.file.read(chunk_size):
+        digest.update(chunk)
+        size += len(chunk)
+    file.file.seek(0)
+    return size, digest.hexdigest()
+
+
+def _file_id_from(process_data: Any) -> Optional[str]:
+    """The brain's ID for the processed file, if the response includes one"""
+    for data in (process_data, (process_data or {}).get("data") if isinstance(process_data, dict) else None):
+        if isinstance(data, dict):
+            for key in ("fileId", "id", "_id"):
+                if data.get(key):
+                    return str(data[key])
+    return None
+
+
+async def _upload_document(
+    db: Session, file: UploadFile, brain_id: str, document_type: str, force: bool = False
+) -> Dict[str, Any]:
+    """
+    Run the three upload steps for one file and return the processing result.
+
+    Steps:
+    1. Fetch a signed URL.
+    2. Stream the file to the signed URL.
+    3. Notify the server that the upload is complete.
+
+    The file is streamed from the upload Starlette has already spooled, in
+    chunks of upload_chunk_bytes, so it is never held in memory in full.
+
+    Content already uploaded to the brain as the same document type (same
+    SHA-256) is not sent or processed again, and no signed URL is requested
+    for it; the file ID of the earlier upload is returned instead. Pass
+    force=True to upload it anyway, e.g. after it was deleted.
+    """
+    size, content_hash = await asyncio.to_thread(_hash_upload, file, settings.upload_chunk_bytes)
+    existing_file_id = None if force else get_uploaded_file_id(db, brain_id, document_type, content_hash)
+    if existing_file_id:
+        logger.info(
+            f"Skipping upload of {file.filename}, brain {brain_id} already has it as "
+            f"{document_type} file {existing_file_id}"
+        )
+        return {"file_id": existing_file_id, "duplicate": True, "details": None}
+
+    # Step 1: Fetch a signed URL
+    url = f"{settings.brain_base_url}/v1/file/url"
+    # Every upload needs its own upload ID, so this request is never shared
+    signed_url_data = await get_json(
+        url, params={"fileName": file.filename}, log_message="fetch signed URL", coalesce=False
+    )
+    signed_url = signed_url_data["url"]
+    upload_id = signed_url_data["uploadId"]
+
+    # Step 2: Stream the file to the signed URL
+    try:
+        _, status_code = await make_api_request(
+            "put",
+            signed_url,
+            content=_upload_stream(file, settings.upload_chunk_bytes),
+            headers={
+                "Content-Type": "application/octet-stream",
+                # Signed storage URLs do not accept chunked transfer encoding
+                "Content-Length": str(size),
+            },
+            use_brain_headers=False,  # Don't use brain headers for S3 upload
+            log_message="upload file to storage",
+            parse_json=False  # Don't try to parse the response as JSON
+        )
+    except Exception as e:
+        logger.error(f"Error uploading file to storage: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error uploading file to storage: {str(e)}")
+
+    logger.info(f"File upload of {size} bytes successful with status code: {status_code}")
+
+    # Step 3: Notify the server about the completed upload
+    payload = {
+        "uploadId": upload_id,
+        "brainId": brain_id,
+        "documentType": document_type,
+    }
+
+    process_data = await post_json(
+        f"{settings.brain_base_url}/v1/file/process",
+        json=payload,
+        log_message="complete file processing",
+        timeout=120  # Longer timeout for processing
+    )
+    invalidate_brain(brain_id)
+
+    file_id = _file_id_from(process_data)
+    if file_id:
+        try:
+            save_uploaded_document(db, brain_id, content_hash, file_id, file.filename, document_type, size)
+        except Exception as e:
+            # The upload itself succeeded, only deduplication of later uploads is lost
+            logger.error(f"Error recording upload of {file.filename}: {str(e)}")
+            db.rollback()
+    else:
+        logger.warning(f"No file ID in the processing response for {file.filename}, it will not be deduplicated")
+    return {"file_id": file_id, "duplicate": False, "details": process_data}
 
 
 @router.post("/upload", description="Upload a document")
@@ -42,71 +186,21 @@ async def upload_file(
     file: UploadFile,
     brain_id: str = Form(...),  # Brain ID to associate the file with
     document_type: str = Form(...),  # Document type (e.g., "invoice" or "statement")
+    force: bool = Form(False),  # Upload even if the brain already has this content
+    db: Session = Depends(get_db),
 ):
     """
     Upload a file to the Dexterous API.
-
-    Steps:
-    1. Fetch a signed URL.
-    2. Upload the file to the signed URL.
-    3. Notify the server that the upload is complete.
     """
-    temp_file_path = None
     try:
         # Validate document type
-        if document_type not in ["invoice", "statement", "bill"]:
+        if document_type not in DOCUMENT_TYPES:
             raise ValueError("document_type should be either 'invoice' or 'statement' or 'bill'")
-            
-        # Save the uploaded file locally
-        temp_file_path = f"./{file.filename}"
-        with open(temp_file_path, "wb") as temp_file:
-            temp_file.write(await file.read())
-
-        # Step 1: Fetch a signed URL
-        url = f"{settings.brain_base_url}/v1/file/url?fileName={file.filename}"
-        signed_url_data = await get_json(url, log_message="fetch signed URL")
-        signed_url = signed_url_data["url"]
-        upload_id = signed_url_data["uploadId"]
-
-        # Step 2: Upload the file to the signed URL
-        # Read file content
-        with open(temp_file_path, "rb") as file_content:
-            file_bytes = file_content.read()
-        
-        # Use our utility function for the upload
-        try:
-            response = await make_api_request(
-                "put",
-                signed_url,
-                content=file_bytes,
-                headers={"Content-Type": "application/octet-stream"},
-                use_brain_headers=False,  # Don't use brain headers for S3 upload
-                log_message="upload file to storage",
-                parse_json=False  # Don't try to parse the response as JSON
-            )
-            status_code = response[1] if isinstance(response, tuple) else 200
-            logger.info(f"File upload successful with status code: {status_code}")
-        except Exception as e:
-            logger.error(f"Error uploading file to storage: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error uploading file to storage: {str(e)}")
-        
-        logger.info(f"File upload successful with status code: {status_code}")
 
-        # Step 3: Notify the server about the completed upload
-        payload = {
-            "uploadId": upload_id,
-            "brainId": brain_id,
-            "documentType": document_type,
-        }
-
-        process_data = await post_json(
-            f"{settings.brain_base_url}/v1/file/process",
-            json=payload,
-            log_message="complete file processing",
-            timeout=120  # Longer timeout for processing
-        )
-
-        return {"message": "File uploaded successfully", "details": process_data}
+        result = await _upload_document(db, file, brain_id, document_type, force)
+        if result["duplicate"]:
+            return {"message": "File already uploaded", "file_id": result["file_id"], "duplicate": True}
+        return {"message": "File uploaded successfully", "details": result["details"]}
 
     except ValueError as e:
         logger.error(f"Validation error: {str(e)}")
@@ -117,21 +211,122 @@ async def upload_file(
     except Exception as e:
         logger.error(f"Error during file upload: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error during file upload: {str(e)}")
-    finally:
-        # Clean up the temporary file regardless of success or failure
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
-            logger.debug(f"Temporary file {temp_file_path} removed")
+
+
+@router.post("/upload/bulk", description="Upload many documents at once")
+async def upload_files_bulk(
+    files: List[UploadFile],
+    brain_id: str = Form(...),  # Brain ID to associate the files with
+    document_type: Optional[str] = Form(None),  # Document type shared by every file
+    document_types: Optional[List[str]] = Form(None),  # Or one document type per file, in order
+    batch_id: Optional[str] = Form(None),  # Optional ID to poll progress with
+    force: bool = Form(False),  # Upload even if the brain already has this content
+    db: Session = Depends(get_db),
+):
+    """
+    Upload many files to the Dexterous API in one request.
+
+    Each file goes through the same steps as /upload. Up to
+    upload_concurrency files are in flight at once, so signed URL fetches,
+    transfers and processing calls of different files overlap. A file that
+    fails does not stop the others; the response lists the result of every
+    file in the order they were sent. Files the brain already has as the
+    same document type are reported as duplicates with their existing file ID.
+
+    Pass a batch_id to follow progress from another request with
+    GET /brain/files/upload/bulk/{batch_id}, which any worker can answer as
+    progress is kept in the database.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files to upload")
+    if len(files) > settings.upload_bulk_max_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.upload_bulk_max_files} files can be uploaded at once",
+        )
+    if document_types:
+        if len(document_types) != len(files):
+            raise HTTPException(status_code=400, detail="document_types must have one entry per file")
+    elif document_type:
+        document_types = [document_type] * len(files)
+    else:
+        raise HTTPException(status_code=400, detail="document_type or document_types is required")
+    invalid = sorted(set(document_types) - set(DOCUMENT_TYPES))
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid document types {invalid}, use 'invoice', 'statement' or 'bill'",
+        )
+
+    if batch_id is not None and not 0 < len(batch_id) <= 100:
+        raise HTTPException(status_code=400, detail="batch_id must be 1 to 100 characters")
+    batch_id = batch_id or str(uuid.uuid4())
+    start_bulk_upload(db, batch_id, brain_id, len(files))
+    semaphore = asyncio.Semaphore(settings.upload_concurrency)
+
+    async def upload_one(index: int, file: UploadFile, file_document_type: str) -> Dict[str, Any]:
+        result = {"index": index, "filename": file.filename, "document_type": file_document_type}
+        async with semaphore:
+            try:
+                upload = await _upload_document(db, file, brain_id, file_document_type, force)
+                result.update(
+                    status="duplicate" if upload["duplicate"] else "uploaded",
+                    file_id=upload["file_id"],
+                    details=upload["details"],
+                )
+            except HTTPException as e:
+                result.update(status="failed", status_code=e.status_code, error=e.detail)
+            except HttpClientError as e:
+                result.update(status="failed", status_code=e.status_code, error=e.detail)
+            except Exception as e:
+                logger.error(f"Error uploading {file.filename}: {str(e)}", exc_info=True)
+                result.update(status="failed", status_code=500, error=str(e))
+        try:
+            counts = record_bulk_upload_result(db, batch_id, result["status"] != "failed")
+            logger.info(
+                f"Bulk upload {batch_id}: {counts['completed']}/{counts['total']} files done, "
+                f"{file.filename} {result['status']}"
+            )
+        except Exception as e:
+            # Only progress reporting is affected, the upload result stands
+            logger.error(f"Error recording bulk upload progress of {file.filename}: {str(e)}")
+            db.rollback()
+        return result
+
+    results = await asyncio.gather(
+        *(upload_one(index, file, file_type) for index, (file, file_type) in enumerate(zip(files, document_types)))
+    )
+    finish_bulk_upload(db, batch_id)
+    return {**get_bulk_upload_progress(db, batch_id), "results": results}
+
+
+@router.get("/upload/bulk/{batch_id}", description="Get the progress of a bulk upload")
+async def get_bulk_upload(batch_id: str, db: Session = Depends(get_db)):
+    progress = get_bulk_upload_progress(db, batch_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Bulk upload not found")
+    return progress
 
 
 @router.get("/{file_id}", description="Get details of a specific document")
-async def get_file(file_id: str):
+async def get_file(
+    file_id: str,
+    brain_id: Optional[str] = Query(None, description="Brain the file belongs to"),
+):
     """
     Fetch details of a specific file by its file_id.
+
+    Only cached when the brain_id is given, as writes to a brain drop its
+    cached reads by brain; without one the brain's response is streamed.
     """
     url = f"{settings.brain_base_url}/v1/file/{file_id}"
-    data = await get_json(url, log_message=f"fetch file {file_id}")
-    return data
+    return await cached_pass_through(
+        "file",
+        url,
+        ttl=settings.brain_cache_files_ttl_seconds if brain_id else 0,
+        tags=[brain_tag(brain_id)] if brain_id else (),
+        log_message=f"fetch file {file_id}",
+    )
 
 
 @router.post("/text/process", description="Process text content from various document types")
@@ -192,6 +387,7 @@ async def process_text(request: TextProcessRequest):
             json=payload,
             log_message="process text content",
         )
+        invalidate_brain(request.brain_id)
         
         logger.info("Successfully processed text content")
         return data
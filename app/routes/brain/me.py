@@ -6,6 +6,7 @@ from fastapi.responses import JSONResponse
 from app.config import settings
 from app.models.brain.brain_model import BrainCreateRequest
 from app.utils.http_client import get_json, post_json, HttpClientError, http_exception_handler
+from app.utils.response_cache import cached_get_json, invalidate_tag
 
 # Get the logger configured in main.py
 logger = logging.getLogger(__name__)
@@ -18,7 +19,14 @@ async def get_brains(start: int = 0, limit: int = 20, sort: str = "desc"):
     params = {"start": start, "limit": limit, "sort": sort}
 
     try:
-        data = await get_json(url, params=params, log_message="fetch brains")
+        data = await cached_get_json(
+            "brains",
+            url,
+            ttl=settings.brain_cache_brains_ttl_seconds,
+            params=params,
+            tags=["brains"],
+            log_message="fetch brains",
+        )
         return JSONResponse(content=data, status_code=status.HTTP_200_OK)
     except HttpClientError as e:
         http_exception_handler(e)
@@ -45,6 +53,7 @@ async def create_brain(brain: BrainCreateRequest):
             json=brain.model_dump(), 
             log_message="create brain"
         )
+        invalidate_tag("brains")
         return JSONResponse(content=data, status_code=status.HTTP_201_CREATED)
     except HttpClientError as e:
         http_exception_handler(e)
\ No newline at end of file
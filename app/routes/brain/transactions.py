@@ -12,6 +12,7 @@ from app.models.brain.brain_model import ReconciliationVerification
 from app.models.database.reconciliation_models import DraftReconciliationEntry
 from app.utils.xero.tenant_utils import get_active_tenant_id, get_tenant_metadata
 from app.utils.http_client import get_json, post_json, http_exception_handler, HttpClientError
+from app.utils.response_cache import brain_tag, cached_get_json, cached_pass_through, invalidate_brain
 
 # Get the logger configured in main.py
 logger = logging.getLogger(__name__)
@@ -28,7 +29,13 @@ async def get_brain_stats(
     url = f"{settings.brain_base_url}/v1/brain/stats/{brain_id}"
     
     try:
-        data = await get_json(url, log_message="fetch brain statistics")
+        data = await cached_get_json(
+            "stats",
+            url,
+            ttl=settings.brain_cache_stats_ttl_seconds,
+            tags=[brain_tag(brain_id)],
+            log_message="fetch brain statistics",
+        )
         return data
     except HttpClientError as e:
         http_exception_handler(e)
@@ -56,8 +63,15 @@ async def get_invoice_transactions(
         params["query"] = query
     
     try:
-        data = await get_json(url, params=params, log_message="fetch invoice transactions")
-        return data
+        # Returned as the brain sent it, without parsing
+        return await cached_pass_through(
+            "invoice_transactions",
+            url,
+            ttl=settings.brain_cache_transactions_ttl_seconds,
+            params=params,
+            tags=[brain_tag(brain_id)],
+            log_message="fetch invoice transactions",
+        )
     except HttpClientError as e:
         http_exception_handler(e)
 
@@ -81,8 +95,15 @@ async def get_statement_transactions(
     }
     
     try:
-        data = await get_json(url, params=params, log_message="fetch statement transactions")
-        return data
+        # Returned as the brain sent it, without parsing
+        return await cached_pass_through(
+            "statement_transactions",
+            url,
+            ttl=settings.brain_cache_transactions_ttl_seconds,
+            params=params,
+            tags=[brain_tag(brain_id)],
+            log_message="fetch statement transactions",
+        )
     except HttpClientError as e:
         http_exception_handler(e)
 
@@ -237,10 +258,12 @@ async def get_reconciliation(
     logger.debug(f"Request parameters: {params}")
 
     try:
+        # The response is modified below, so it must not be shared with other requests
         response_data = await get_json(
             url, 
             params=params, 
             log_message="fetch reconciliation data",
+            coalesce=False,
         )
         logger.info(f"Successfully retrieved reconciliation items from Brain API")
 
@@ -280,9 +303,14 @@ async def get_reconciliation(
 
 
 @router.post("/verify", description="Verify reconciliation")
-async def verify_reconciliation(mapping: List[ReconciliationVerification]):
+async def verify_reconciliation(
+    mapping: List[ReconciliationVerification],
+    brain_id: str = Query(..., description="Brain the transactions belong to"),
+):
     """
     Verify one or more reconciled transactions.
+
+    Cached reads for the brain are dropped afterwards.
     """
     url = f"{settings.brain_base_url}/v1/transaction/verify"
     payload = {"mapping": [m.model_dump() for m in mapping]}
@@ -293,6 +321,7 @@ async def verify_reconciliation(mapping: List[ReconciliationVerification]):
             json=payload, 
             log_message="verify reconciliation"
         )
+        invalidate_brain(brain_id)
         return data
     except HttpClientError as e:
         http_exception_handler(e)
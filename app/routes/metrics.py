@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_user, get_db
+from app.models.database.schema_models import User
+from app.services.xero.rate_limiter import xero_rate_limiter
+from app.utils.http_client import get_http_client_metrics
+from app.utils.response_cache import brain_cache
+from app.utils.xero.tenant_utils import get_user_tenant_ids
+
+router = APIRouter(prefix="/metrics", dependencies=[Depends(get_current_user)])
+
+
+@router.get("/http-client")
+async def http_client_metrics():
+    """Brain HTTP client request counters and circuit breaker state per host"""
+    return get_http_client_metrics()
+
+
+@router.get("/xero-rate-limit")
+async def xero_rate_limit_metrics(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Xero rate limiter counters and the state of the current user's tenants"""
+    tenant_ids = await get_user_tenant_ids(db, str(current_user.id))
+    return xero_rate_limiter.stats(tenant_ids=tenant_ids)
+
+
+@router.get("/brain-cache")
+async def brain_cache_metrics():
+    """Brain response cache size, hit ratio and invalidations"""
+    return brain_cache.stats()
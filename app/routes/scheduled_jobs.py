@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_db
-from app.scheduled_tasks.job_manager import stop_job
+from app.core.deps import get_current_user, get_db
+from app.models.database.schema_models import User
+from app.scheduled_tasks.job_manager import resync_job, stop_job
+from app.utils.database.job_run_utils import get_job_run_duration_stats, get_recent_job_runs
+from app.utils.xero.tenant_utils import get_user_tenant_ids
 
 router = APIRouter(prefix="/scheduled")
 
@@ -10,7 +15,47 @@ router = APIRouter(prefix="/scheduled")
 @router.post("/stop-processing/{job_id}")
 async def stop_processing(
     job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Stop one of the current user's scheduled processing jobs"""
+    return await stop_job(db, job_id, user_id=str(current_user.id))
+
+
+@router.post("/resync/{job_id}")
+async def resync_processing(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Discard the sync cursor of one of the current user's jobs and queue a full resync"""
+    return await resync_job(db, job_id, user_id=str(current_user.id))
+
+
+@router.get("/runs")
+async def list_job_runs(
+    tenant_id: Optional[str] = None,
+    job_type: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """List the most recent runs of the current user's tenants with their duration and metrics"""
+    tenant_ids = await get_user_tenant_ids(db, str(current_user.id))
+    return {"runs": get_recent_job_runs(db, tenant_id, job_type, limit, tenant_ids=tenant_ids)}
+
+
+@router.get("/runs/stats")
+async def job_run_stats(
+    since_hours: int = Query(24, ge=1, le=24 * 90),
+    tenant_id: Optional[str] = None,
+    job_type: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Stop a scheduled processing job"""
-    return await stop_job(db, job_id)
+    """p50/p95 run duration per tenant and job type for the current user's tenants, slowest first"""
+    tenant_ids = await get_user_tenant_ids(db, str(current_user.id))
+    return {
+        "since_hours": since_hours,
+        "stats": get_job_run_duration_stats(db, since_hours, tenant_id, job_type, tenant_ids=tenant_ids),
+    }
@@ -1,13 +1,14 @@
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from xero_python.accounting import AccountingApi
 from xero_python.api_client import serialize
 
 from app.core.deps import get_db
 from app.core.oauth import api_client, require_valid_token
+from app.services.xero.rate_limiter import call_xero
+from app.utils.json_codec import FastJSONResponse
 from app.utils.xero.tenant_utils import get_active_tenant_id
 
 router = APIRouter(prefix="/xero/bank-transactions")
@@ -16,7 +17,7 @@ logger = logging.getLogger(__name__)
 
 @router.get(
     "/",
-    response_class=JSONResponse,
+    response_class=FastJSONResponse,
     description="Returns a list of bank transactions for the current tenant",
 )
 async def get_bank_transactions(
@@ -46,11 +47,11 @@ async def get_bank_transactions(
 
         # Get bank transactions from Xero
         accounting_api = AccountingApi(api_client)
-        bank_transactions = accounting_api.get_bank_transactions(xero_tenant_id)
+        bank_transactions = await call_xero(accounting_api.get_bank_transactions, xero_tenant_id)
 
         # Serialize and return the JSON response
         serialized_transactions = serialize(bank_transactions)
-        return JSONResponse(
+        return FastJSONResponse(
             content=serialized_transactions,
             status_code=status.HTTP_200_OK,
         )
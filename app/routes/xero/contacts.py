@@ -1,13 +1,15 @@
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException, Path, Request, status
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 from xero_python.accounting import AccountingApi
 from xero_python.api_client import serialize
 
 from app.core.deps import get_db
 from app.core.oauth import api_client, require_valid_token
+from app.services.xero.rate_limiter import call_xero
+from app.utils.json_codec import FastJSONResponse
 from app.utils.xero.tenant_utils import get_active_tenant_id
 
 router = APIRouter(prefix="/xero/contacts")
@@ -16,7 +18,7 @@ logger = logging.getLogger(__name__)
 
 @router.get(
     "/",
-    response_class=JSONResponse,
+    response_class=FastJSONResponse,
     description="Returns a list of contacts for the current tenant",
 )
 async def get_contacts(
@@ -46,10 +48,10 @@ async def get_contacts(
 
         # Get contacts from Xero
         accounting_api = AccountingApi(api_client)
-        contacts = accounting_api.get_contacts(xero_tenant_id)
+        contacts = await call_xero(accounting_api.get_contacts, xero_tenant_id)
         serialized_contacts = serialize(contacts)
 
-        return JSONResponse(
+        return FastJSONResponse(
             content=serialized_contacts,
             status_code=status.HTTP_200_OK,
         )
@@ -74,7 +76,7 @@ async def get_contact_by_id(
     contact_id: str = Path(..., description="The ID of the contact"),
     db: Session = Depends(get_db),
     token: dict = Depends(require_valid_token),
-) -> JSONResponse:
+) -> FastJSONResponse:
     """
     Get a specific contact by ID for the current active tenant.
     Requires an active tenant to be selected.
@@ -97,10 +99,10 @@ async def get_contact_by_id(
 
         # Get contact from Xero
         accounting_api = AccountingApi(api_client)
-        contact = accounting_api.get_contact(xero_tenant_id, contact_id)
+        contact = await call_xero(accounting_api.get_contact, xero_tenant_id, contact_id)
         serialized_contact = serialize(contact)
 
-        return JSONResponse(
+        return FastJSONResponse(
             content=serialized_contact,
             status_code=status.HTTP_200_OK,
         )
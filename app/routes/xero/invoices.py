@@ -12,7 +12,6 @@ from fastapi import (
     UploadFile,
     status,
 )
-from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from xero_python.accounting import AccountingApi, CurrencyCode
@@ -24,6 +23,8 @@ from xero_python.api_client import serialize
 from app.core.deps import get_db
 from app.core.oauth import api_client, require_valid_token
 from app.models.xero.invoice_models import InvoiceRequest
+from app.services.xero.rate_limiter import call_xero
+from app.utils.json_codec import FastJSONResponse
 from app.utils.xero.tenant_utils import get_active_tenant_id
 
 router = APIRouter(prefix="/xero/invoices")
@@ -32,7 +33,7 @@ logger = logging.getLogger(__name__)
 
 @router.get(
     "/",
-    response_class=JSONResponse,
+    response_class=FastJSONResponse,
     description="Returns a list of invoices for the current tenant.",
 )
 async def get_tenant_invoices(
@@ -62,10 +63,10 @@ async def get_tenant_invoices(
 
         # Get invoices from Xero
         accounting_api = AccountingApi(api_client)
-        invoices = accounting_api.get_invoices(xero_tenant_id)
+        invoices = await call_xero(accounting_api.get_invoices, xero_tenant_id)
         serialize_invoices = serialize(invoices)
 
-        return JSONResponse(
+        return FastJSONResponse(
             content=serialize_invoices,
             status_code=status.HTTP_200_OK,
         )
@@ -82,7 +83,7 @@ async def get_tenant_invoices(
 
 @router.get(
     "/{invoice_id}",
-    response_class=JSONResponse,
+    response_class=FastJSONResponse,
     description="Returns an invoice by ID for the current tenant",
 )
 async def get_invoice_by_id(
@@ -113,10 +114,10 @@ async def get_invoice_by_id(
 
         # Get invoice from Xero
         accounting_api = AccountingApi(api_client)
-        invoice = accounting_api.get_invoice(xero_tenant_id, invoice_id)
+        invoice = await call_xero(accounting_api.get_invoice, xero_tenant_id, invoice_id)
         serialized_invoice = serialize(invoice)
 
-        return JSONResponse(
+        return FastJSONResponse(
             content=serialized_invoice,
             status_code=status.HTTP_200_OK,
         )
@@ -138,7 +139,7 @@ async def create_invoice(
     db: Session = Depends(get_db),
     token: dict = Depends(require_valid_token),
     description="Creates a new invoice for the current tenant.",
-) -> JSONResponse:
+) -> FastJSONResponse:
     try:
         # Check if user is authenticated
         if not request.state.user:
@@ -192,11 +193,11 @@ async def create_invoice(
         )
         request_body = {"Invoices": xero_invoices}
 
-        created_invoices = accounting_api.create_invoices(
-            xero_tenant_id, invoices=request_body
+        created_invoices = await call_xero(
+            accounting_api.create_invoices, xero_tenant_id, invoices=request_body
         )
         logger.info(f"Successfully created {len(created_invoices.invoices)} invoices")
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=status.HTTP_201_CREATED,
             content={
                 "status": "success",
@@ -231,7 +232,7 @@ async def create_invoice_attachment(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     token: dict = Depends(require_valid_token),
-) -> JSONResponse:
+) -> FastJSONResponse:
     try:
         logger.info(f"Starting attachment upload process for invoice ID: {invoice_id}")
 
@@ -282,7 +283,8 @@ async def create_invoice_attachment(
                 f"Sending attachment to Xero API - Filename: {filename}, MIME type: {file.content_type}"
             )
 
-            attachment = accounting_api.create_invoice_attachment_by_file_name(
+            attachment = await call_xero(
+                accounting_api.create_invoice_attachment_by_file_name,
                 xero_tenant_id=xero_tenant_id,
                 invoice_id=invoice_id,
                 file_name=filename,
@@ -291,7 +293,7 @@ async def create_invoice_attachment(
             )
             logger.info(f"Successfully created attachment for invoice {invoice_id}")
 
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=status.HTTP_201_CREATED,
                 content={
                     "status": "success",
@@ -299,6 +301,8 @@ async def create_invoice_attachment(
                     "data": serialize(attachment),
                 },
             )
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(
                 f"Error uploading attachment to Xero API: {str(e)}",
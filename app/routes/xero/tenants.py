@@ -2,7 +2,6 @@ import asyncio
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from xero_python.accounting import AccountingApi
 from xero_python.identity import IdentityApi
@@ -13,6 +12,9 @@ from app.models.database.scheduled_jobs_models import ScheduledJob
 from app.models.xero.tenant_models import ActiveTenantResponse
 from app.models.xero.xero_token_models import XeroToken
 from app.scheduled_tasks.job_manager import start_job_for_user, stop_job
+from app.services.xero.rate_limiter import call_xero
+from app.utils.json_codec import FastJSONResponse
+from app.utils.retry import retry_with_backoff
 from app.utils.xero.tenant_utils import (
     create_tenant_metadata,
     get_active_tenant_id,
@@ -25,18 +27,6 @@ router = APIRouter(prefix="/xero/tenants")
 logger = logging.getLogger(__name__)
 
 
-# Utility function for retry logic
-async def retry_with_backoff(func, max_retries=3, initial_delay=1):
-    for attempt in range(max_retries):
-        try:
-            return await func()
-        except Exception as e:
-            if attempt == max_retries - 1:
-                raise e
-            delay = initial_delay * (2**attempt)  # exponential backoff
-            await asyncio.sleep(delay)
-
-
 @router.get("/", description="List all available Xero tenants")
 async def list_tenants(
     request: Request,
@@ -64,12 +54,13 @@ async def list_tenants(
             accounting_api = AccountingApi(api_client)
             available_tenants = []
 
-            connections = identity_api.get_connections()
+            connections = await call_xero(identity_api.get_connections)
             user_id = str(request.state.user.id)
             for connection in connections:
                 if connection.tenant_type == "ORGANISATION":
                     try:
-                        organisations = accounting_api.get_organisations(
+                        organisations = await call_xero(
+                            accounting_api.get_organisations,
                             xero_tenant_id=connection.tenant_id
                         )
                         org = organisations.organisations[0]
@@ -108,6 +99,9 @@ async def list_tenants(
                             "is_active": tenant_metadata.is_active,
                         }
                         available_tenants.append(tenant_info)
+                    except HTTPException:
+                        # Rate limited; listing the other tenants would be too
+                        raise
                     except Exception as e:
                         logger.error(
                             f"Error processing organisation {connection.tenant_id}: {str(e)}",
@@ -116,6 +110,8 @@ async def list_tenants(
 
             return {"tenants": available_tenants}
 
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error fetching tenants: {str(e)}", exc_info=True)
             raise HTTPException(
@@ -223,7 +219,7 @@ async def activate_tenant(
             job_type='statement'
         )
 
-        return JSONResponse(
+        return FastJSONResponse(
             content={
                 "message": f"Successfully activated tenant {tenant_id}",
                 "tenant_id": tenant_id,
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLoopRunner:
+    """
+    Runs a single long-lived asyncio event loop in a background thread.
+
+    Scheduled jobs execute on worker threads but submit their coroutines to
+    this loop, so they share one loop (and anything bound to it, such as
+    pooled HTTP clients) instead of creating and tearing down a loop per run.
+    """
+
+    def __init__(self, name: str = "scheduled-jobs-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return self._loop
+
+    def is_running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self):
+        """Start the loop thread if it is not already running"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            ready = threading.Event()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._run, args=(ready,), name=self.name, daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+        logger.info(f"Started asyncio loop thread {self.name}")
+
+    def _run(self, ready: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(ready.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            try:
+                pending = asyncio.all_tasks(self._loop)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    self._loop.run_until_complete(
+                        asyncio.gather(*pending, return_exceptions=True)
+                    )
+                self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+                self._loop.run_until_complete(self._loop.shutdown_default_executor())
+            except Exception as e:
+                logger.error(f"Error shutting down asyncio loop {self.name}: {str(e)}")
+            finally:
+                self._loop.close()
+
+    def stop(self, timeout: Optional[float] = 10):
+        """Cancel outstanding coroutines and stop the loop thread"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        if loop is None or thread is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        logger.info(f"Stopped asyncio loop thread {self.name}")
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the loop and block the calling thread until it finishes.
+
+        Raises asyncio.TimeoutError if it does not finish within timeout
+        seconds, in which case the coroutine is cancelled.
+        """
+        if not self.is_running():
+            self.start()
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(coro, timeout=timeout), self._loop
+        )
+        return future.result()
+
+
+# Shared loop for scheduled jobs, started and stopped with the job workers
+job_loop = AsyncLoopRunner()
@@ -1,26 +1,113 @@
 import asyncio
 import logging
-import concurrent.futures
+from datetime import datetime, timedelta, timezone
 from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
 
 from xero_python.accounting import AccountingApi
 from xero_python.api_client import serialize
 from app.core.oauth import api_client
+from app.database import SessionLocal
+from app.scheduled_tasks.async_runner import job_loop
+from app.utils.database.job_run_utils import JobRunStats, finish_job_run, start_job_run
+from app.utils.database.record_hash_utils import (
+    clear_record_hashes,
+    filter_changed_records,
+    save_record_hashes,
+)
+from app.utils.database.sync_utils import get_sync_cursor, set_sync_cursor
 from app.utils.http_client import post_json
+from app.utils.response_cache import invalidate_brain
+from app.utils.retry import retry_with_backoff
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# How far before the latest update already read each invoice query starts
+INVOICE_KEYSET_OVERLAP = timedelta(seconds=1)
+
+
+async def fetch_invoice_page(
+    accounting_api: AccountingApi, xero_tenant_id: str, page: int, modified_since=None
+) -> Tuple[List[Dict[str, Any]], int, Optional[datetime]]:
+    """
+    Fetches one page of invoices from Xero without blocking the event loop.
+
+    Returns:
+        The serialized invoices on the page, the total page count and the
+        latest UpdatedDateUTC on the page
+    """
+    loop = asyncio.get_running_loop()
+    invoices = await loop.run_in_executor(
+        None,
+        partial(
+            accounting_api.get_invoices,
+            xero_tenant_id,
+            if_modified_since=modified_since,
+            order="UpdatedDateUTC ASC",
+            summary_only=False,
+            page=page,
+            page_size=settings.invoice_page_size,
+        ),
+    )
+
+    latest_update = None
+    for invoice in invoices.invoices or []:
+        if invoice.updated_date_utc and (
+            latest_update is None or invoice.updated_date_utc > latest_update
+        ):
+            latest_update = invoice.updated_date_utc
+    if latest_update is not None and latest_update.tzinfo is None:
+        # Comparable with the stored sync cursor
+        latest_update = latest_update.replace(tzinfo=timezone.utc)
+
+    serialized_invoices = serialize(invoices)
+    pagination = serialized_invoices.get("pagination", {})
+    page_count = pagination.get("pageCount", 1)
+    page_invoices = serialized_invoices.get("Invoices", [])
+
+    logger.info(f"Fetched {len(page_invoices)} invoices from page {page}/{page_count}")
+    return page_invoices, page_count, latest_update
+
+
 async def process_xero_invoices(
-    brain_id: str, xero_tenant_id: str
+    brain_id: str,
+    xero_tenant_id: str,
+    full_resync: bool = False,
+    stats: Optional[JobRunStats] = None,
 ):
     """
     Fetches invoices from Xero and processes them through the brain API in batches.
 
+    Invoices are read with keyset pagination: every query starts at the
+    first page of invoices modified since the latest UpdatedDateUTC already
+    read, ordered by UpdatedDateUTC. Page offsets would shift when an
+    invoice is edited during the sync and skip the invoice pushed into an
+    already read page. Once the first page of a query gives the page count,
+    up to invoice_fetch_concurrency pages of it are fetched at once and sent
+    to the brain in page order, each as its own batch, while the next query
+    downloads, so memory use does not grow with the size of the tenant.
+    An edit landing between the page requests of one query can still shift
+    rows. When the edited invoice shows up twice in the window, only the
+    window's first page is sent and the rest is read again; when it moved past the window,
+    the row shifted onto an already read page is missed until it changes
+    again or a full resync runs.
+    Only invoices modified since the tenant's last successful push are fetched,
+    unless full_resync is set or no push has succeeded yet, and invoices whose
+    content the brain has already acknowledged are not sent again.
+    The sync cursor advances after every page the brain acknowledges, so a
+    run that fails or times out part way is resumed by the next run.
+
     Args:
         brain_id: The ID of the brain to process invoices with
         xero_tenant_id: The Xero tenant ID to fetch invoices from
+        full_resync: Ignore the sync cursor and record hashes and send every invoice
+        stats: Optional run metrics to fill in
     """
+    stats = stats or JobRunStats()
+    db = SessionLocal()
+    window: List[asyncio.Task] = []
+    next_fetch = None
     try:
         # Log the start of the process
         logger.info(
@@ -32,98 +119,178 @@ async def process_xero_invoices(
         if not xero_tenant_id:
             logger.error("No organisation tenant found")
             return
-        all_invoices = []
-        page = 1
-        page_size = 100
-        more_pages = True
-        logger.info(f"Starting to fetch invoices for tenant {xero_tenant_id}")
-        while more_pages:
-            logger.info(f"Fetching page {page} of invoices")
-            invoices = accounting_api.get_invoices(
-                xero_tenant_id,
-                summary_only=False,
-                page=page,
-                page_size=page_size
+
+        cursor = None
+        if full_resync:
+            await asyncio.to_thread(clear_record_hashes, db, xero_tenant_id, brain_id, "invoice")
+        else:
+            cursor = await asyncio.to_thread(
+                get_sync_cursor, db, xero_tenant_id, brain_id, "invoice"
             )
-            serialized_invoices = serialize(invoices)
-            
-            # Get pagination info
-            pagination = serialized_invoices.get("pagination", {})
-            current_page = pagination.get("page", 1)
-            page_count = pagination.get("pageCount", 1)
-            
-            # Get invoices from current page
-            page_invoices = serialized_invoices.get("Invoices", [])
-            all_invoices.extend(page_invoices)
-            
-            logger.info(f"Fetched {len(page_invoices)} invoices from page {current_page}/{page_count}")
-            
-            # Check if we need to fetch more pages
-            if current_page >= page_count:
-                more_pages = False
-            else:
-                page += 1
-        num_invoices = len(all_invoices)
-        logger.info(f"Processing all {num_invoices} invoices")
-        if num_invoices > 0:
-            # Create payload for the Xero processing endpoint
-            payload = {
-                "data": all_invoices,
-                "brainId": brain_id,
-                "documentType": "invoice"
-            }
-            
-            # Send the request to the Xero processing endpoint
-            result = await post_json(
-                f"{settings.brain_base_url}/v1/file/xero/process",
-                json=payload,
-                log_message="process xero invoices",
+        # Each query starts a little before the latest update already read, so
+        # invoices sharing that timestamp are not lost at a page boundary; the
+        # ones already sent are skipped by their record hashes
+        modified_since = cursor - INVOICE_KEYSET_OVERLAP if cursor else None
+        if modified_since:
+            logger.info(f"Fetching invoices modified since {modified_since}")
+        else:
+            logger.info("No sync cursor, fetching all invoices")
+
+        num_invoices = 0
+        num_batches = 0
+        # Pages of one query are downloaded together, within Xero's per-tenant
+        # limit on concurrent calls
+        window_size = max(1, min(settings.invoice_fetch_concurrency, settings.xero_max_concurrent_calls))
+
+        def fetch_page(since, page_number: int) -> asyncio.Task:
+            # A failed page is retried on its own without restarting the sync
+            return asyncio.create_task(
+                retry_with_backoff(
+                    partial(fetch_invoice_page, accounting_api, xero_tenant_id, page_number, since),
+                    max_retries=settings.invoice_page_retries,
+                )
+            )
+
+        async def send_page(page_invoices: List[Dict[str, Any]], page_latest: Optional[datetime]):
+            nonlocal cursor, num_invoices, num_batches
+            # Hashing a page and looking up the known hashes would block the
+            # loop that every other job's requests run on
+            changed_invoices, changed_hashes = await asyncio.to_thread(
+                filter_changed_records,
+                db,
+                xero_tenant_id,
+                brain_id,
+                "invoice",
+                [(invoice.get("InvoiceID"), invoice) for invoice in page_invoices],
             )
-            
-            logger.info(f"Successfully processed {num_invoices} invoices")
-            return result
+            if changed_invoices:
+                payload = {
+                    "data": changed_invoices,
+                    "brainId": brain_id,
+                    "documentType": "invoice"
+                }
+                await post_json(
+                    f"{settings.brain_base_url}/v1/file/xero/process",
+                    json=payload,
+                    log_message=f"process xero invoices batch {num_batches + 1}",
+                    on_request_sent=stats.add_bytes,
+                )
+                await asyncio.to_thread(
+                    save_record_hashes, db, xero_tenant_id, brain_id, "invoice", changed_hashes
+                )
+                invalidate_brain(brain_id)
+                num_invoices += len(changed_invoices)
+                num_batches += 1
+                stats.add_batch(len(changed_invoices))
+
+            # Every invoice up to this page's latest update has now been
+            # acknowledged by the brain
+            if page_latest and (cursor is None or page_latest > cursor):
+                cursor = page_latest
+                await asyncio.to_thread(
+                    set_sync_cursor, db, xero_tenant_id, brain_id, "invoice", cursor
+                )
+
+        def next_query(since, first_page: int, pages_read: int, latest: Optional[datetime]):
+            """Query after pages_read pages of the current one, starting at page 1 when possible"""
+            next_since = latest - INVOICE_KEYSET_OVERLAP if latest else None
+            if next_since and (since is None or next_since > since):
+                return next_since, 1
+            # The pages read share one timestamp, step past them by offset
+            return since, first_page + pages_read
+
+        logger.info(f"Starting to fetch invoices for tenant {xero_tenant_id}")
+        first_page = 1
+        next_fetch = fetch_page(modified_since, first_page)
+        while next_fetch is not None:
+            head, next_fetch = next_fetch, None
+            _, page_count, _ = await head
+            # The first page tells how many pages the query has; the rest of the
+            # window is requested together, within Xero's concurrent call limit
+            # that the rate limiter enforces per tenant
+            window = [head] + [
+                fetch_page(modified_since, number)
+                for number in range(first_page + 1, min(first_page + window_size, page_count + 1))
+            ]
+            pages = []
+            for task in window:
+                pages.append(await task)
+                if len(pages[-1][0]) < settings.invoice_page_size:
+                    # A short page is the end of the listing
+                    break
+            for task in window:
+                task.cancel()
+            window = []
+
+            seen_ids = set()
+            for index, (page_invoices, _, _) in enumerate(pages):
+                page_ids = {invoice.get("InvoiceID") for invoice in page_invoices}
+                if page_ids & seen_ids:
+                    # An invoice edited between two page requests moved to the
+                    # end and shifted the rows after it by a slot. Only the first
+                    # page, read in one request, is sent; the next query re-reads
+                    # the rest
+                    logger.warning(
+                        f"Invoices shifted between pages {first_page} and {first_page + index} "
+                        f"for tenant {xero_tenant_id}, querying again after page {first_page}"
+                    )
+                    pages = pages[:1]
+                    break
+                seen_ids |= page_ids
+
+            read_latest = max((latest for _, _, latest in pages if latest), default=None)
+            if len(pages[-1][0]) >= settings.invoice_page_size:
+                # The next query only depends on the pages read, so fetch it
+                # while they are sent
+                modified_since, first_page = next_query(
+                    modified_since, first_page, len(pages), read_latest
+                )
+                next_fetch = fetch_page(modified_since, first_page)
+            for page_invoices, _, page_latest in pages:
+                await send_page(page_invoices, page_latest)
+
+        if num_invoices == 0:
+            logger.info(f"No new or changed invoices to process for brain {brain_id}")
         else:
-            logger.info(f"No invoices to process for brain {brain_id}")
-            return None
+            logger.info(f"Successfully processed {num_invoices} invoices in {num_batches} batches")
+        return {"invoices": num_invoices, "batches": num_batches}
 
     except Exception as e:
         logger.error(f"Error processing Xero invoices: {str(e)}", exc_info=True)
+        stats.error = str(e)
         return None
+    finally:
+        for task in window + ([next_fetch] if next_fetch is not None else []):
+            task.cancel()
+        db.close()
 
 
-def process_xero_invoices_wrapper(brain_id: str, tenant_id: str):
+def process_xero_invoices_wrapper(
+    brain_id: str,
+    tenant_id: str,
+    full_resync: bool = False,
+    scheduled_job_id: Optional[str] = None,
+):
     """
-    Wrapper function to properly handle async execution in background threads.
+    Runs invoice processing from a background thread on the shared job loop.
+
+    Each run is recorded in the job_runs table with its duration and metrics.
     """
-    loop = None
+    stats = JobRunStats()
+    run_db = SessionLocal()
+    run_id = start_job_run(run_db, "invoice", tenant_id, brain_id, scheduled_job_id)
     try:
-        # Create new event loop for this thread
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        try:
-            # Create partial function with args
-            coro = partial(process_xero_invoices, brain_id, tenant_id)
-
-            # Run with timeout to prevent hanging
-            future = asyncio.wait_for(coro(), timeout=300)  # 5 minute timeout
-            result = loop.run_until_complete(future)
-            return result
-        finally:
-            # Make sure we clean up properly
-            loop.run_until_complete(loop.shutdown_asyncgens())
-            loop.close()
-
+        # Run with timeout to prevent hanging
+        return job_loop.run(
+            process_xero_invoices(brain_id, tenant_id, full_resync, stats),
+            timeout=300,  # 5 minute timeout
+        )
     except asyncio.TimeoutError:
         logger.error(f"Invoice processing timed out for brain_id: {brain_id}")
+        stats.timed_out = True
     except Exception as e:
         logger.error(f"Error processing invoices: {str(e)}", exc_info=True)
+        stats.error = str(e)
     finally:
-        # Ensure the loop is properly cleaned up
-        if loop and not loop.is_closed():
-            try:
-                if loop.is_running():
-                    loop.stop()
-                loop.close()
-            except Exception as e:
-                logger.error(f"Error closing event loop: {str(e)}")
+        finish_job_run(run_db, run_id, stats)
+        run_db.close()
@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueuedJob:
+    """A unit of work waiting for a free executor slot"""
+
+    job_type: str
+    concurrency_key: str
+    func: Callable[..., Any]
+    args: Tuple[Any, ...]
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class JobExecutor:
+    """
+    Bounded worker pool for scheduled jobs.
+
+    Jobs are picked in FIFO order, skipping any job whose concurrency key
+    (normally the tenant id) is already running or whose job type has hit
+    its configured limit, so one tenant never runs two syncs at once.
+    """
+
+    def __init__(self, max_workers: int, type_limits: Optional[Dict[str, int]] = None):
+        self.max_workers = max(1, max_workers)
+        self.type_limits = type_limits or {}
+        self._pending: Deque[QueuedJob] = deque()
+        self._running_keys = set()
+        self._running_types = Counter()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._shutdown = False
+
+    def start(self):
+        """Start the worker threads"""
+        with self._condition:
+            if self._threads:
+                return
+            self._shutdown = False
+            for index in range(self.max_workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    name=f"job-executor-{index}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+        logger.info(
+            f"Job executor started with {self.max_workers} workers, type limits: {self.type_limits}"
+        )
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> List[QueuedJob]:
+        """
+        Stop accepting work and let the workers exit once idle.
+
+        Returns the jobs that were queued but never started, so the caller
+        can hand them back to wherever they came from.
+        """
+        with self._condition:
+            self._shutdown = True
+            dropped = list(self._pending)
+            self._pending.clear()
+            self._condition.notify_all()
+            threads = list(self._threads)
+            self._threads = []
+        if dropped:
+            logger.warning(f"Job executor shut down with {len(dropped)} queued jobs dropped")
+        if wait:
+            for thread in threads:
+                thread.join(timeout)
+        return dropped
+
+    def submit(self, job_type: str, concurrency_key: str, func: Callable[..., Any], *args):
+        """Queue a job for execution"""
+        job = QueuedJob(job_type, concurrency_key, func, args)
+        with self._condition:
+            if self._shutdown:
+                logger.warning(
+                    f"Job executor is shut down, ignoring {job_type} job for {concurrency_key}"
+                )
+                return
+            self._pending.append(job)
+            depth = len(self._pending)
+            self._condition.notify()
+        logger.info(f"Queued {job_type} job for {concurrency_key} (queue depth: {depth})")
+
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+        with self._condition:
+            return len(self._pending)
+
+    def running_count(self) -> int:
+        """Number of jobs currently executing"""
+        with self._condition:
+            return sum(self._running_types.values())
+
+    def idle_slots(self) -> int:
+        """Number of workers that are neither busy nor spoken for by queued jobs"""
+        with self._condition:
+            return self.max_workers - sum(self._running_types.values()) - len(self._pending)
+
+    def types_with_capacity(self) -> List[str]:
+        """Job types that can accept another job without exceeding their limit"""
+        with self._condition:
+            pending_types = Counter(job.job_type for job in self._pending)
+            return [
+                job_type
+                for job_type, limit in self.type_limits.items()
+                if not limit or self._running_types[job_type] + pending_types[job_type] < limit
+            ]
+
+    def _type_has_capacity(self, job_type: str) -> bool:
+        limit = self.type_limits.get(job_type)
+        return not limit or self._running_types[job_type] < limit
+
+    def _take_next(self) -> Optional[QueuedJob]:
+        """Pop the oldest runnable job; caller must hold the condition lock"""
+        for job in self._pending:
+            if job.concurrency_key in self._running_keys:
+                continue
+            if not self._type_has_capacity(job.job_type):
+                continue
+            self._pending.remove(job)
+            self._running_keys.add(job.concurrency_key)
+            self._running_types[job.job_type] += 1
+            return job
+        return None
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                job = None
+                while not self._shutdown:
+                    job = self._take_next()
+                    if job:
+                        break
+                    self._condition.wait()
+                if job is None:
+                    return
+                depth = len(self._pending)
+
+            waited = time.monotonic() - job.enqueued_at
+            logger.info(
+                f"Starting {job.job_type} job for {job.concurrency_key} after waiting "
+                f"{waited:.1f}s (queue depth: {depth})"
+            )
+            started = time.monotonic()
+            try:
+                job.func(*job.args)
+            except Exception as e:
+                logger.error(f"Error executing {job.job_type} job for {job.concurrency_key}: {str(e)}", exc_info=True)
+            finally:
+                with self._condition:
+                    self._running_keys.discard(job.concurrency_key)
+                    self._running_types[job.job_type] -= 1
+                    # A finished job may unblock queued work for the same tenant or type
+                    self._condition.notify_all()
+                logger.info(
+                    f"Finished {job.job_type} job for {job.concurrency_key} in "
+                    f"{time.monotonic() - started:.1f}s"
+                )
@@ -1,29 +1,52 @@
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Optional
 from uuid import uuid4
-import asyncio
-from queue import Queue
-import threading
-import time
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.jobstores.base import JobLookupError
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.config import settings
+from app.database import SessionLocal, engine
+from app.models.database.job_queue_models import JobQueueEntry
 from app.models.database.scheduled_jobs_models import ScheduledJob
 from app.models.database.tenant_models import TenantMetadata
 from app.models.database.schema_models import User
+from app.scheduled_tasks.async_runner import job_loop
 from app.scheduled_tasks.invoice_processor import process_xero_invoices_wrapper
+from app.scheduled_tasks.job_executor import JobExecutor
+from app.scheduled_tasks.job_queue import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    JobQueueConsumer,
+    enqueue_job,
+    finish_job,
+    release_jobs,
+    requeue_stale_jobs,
+)
+from app.scheduled_tasks.leader_election import LeaderElector
 from app.scheduled_tasks.statement_processor import process_bank_statements_wrapper
+from app.scheduled_tasks.triggers import (
+    StaggeredCronTrigger,
+    schedule_interval_seconds,
+    slot_offset_seconds,
+)
+from app.utils.database.job_run_utils import get_last_successful_runs
+from app.utils.database.record_hash_utils import clear_record_hashes
+from app.utils.http_client import close_http_client, open_http_client
 from app.utils.xero.tenant_utils import get_tenant_metadata
 
 logger = logging.getLogger(__name__)
 
-# Initialize the scheduler
+# Initialize the scheduler. Every worker process starts it paused so jobs can
+# be added and removed from any worker, and only the elected leader fires them.
 jobstores = {
     'default': SQLAlchemyJobStore(url=settings.database_url)
 }
@@ -31,57 +54,181 @@ scheduler = BackgroundScheduler(
     jobstores=jobstores,
     job_defaults={
         'coalesce': True,  # Combine multiple missed runs into a single run
-        'max_instances': 1  # Prevent concurrent execution of the same job
+        'max_instances': 1,  # Prevent concurrent execution of the same job
+        'misfire_grace_time': 60  # Still fire runs that were due during a leader handover
     }
 )
-scheduler.start()
-
-# Create a job queue for sequential processing
-job_queue = Queue()
-job_queue_running = False
-job_queue_lock = threading.Lock()
-job_parameters = {}
-
-def process_job_queue():
-    """Process jobs in the queue sequentially"""
-    global job_queue_running
-    
-    with job_queue_lock:
-        if job_queue_running:
-            return
-        job_queue_running = True
-    
+scheduler.start(paused=True)
+
+# Session-level advisory lock held by the scheduler leader
+SCHEDULER_LEADER_LOCK_KEY = 734_201_001
+
+# Bounded worker pool shared by every scheduled job in this process
+job_executor = JobExecutor(
+    max_workers=settings.job_max_workers,
+    type_limits={
+        "invoice": settings.job_invoice_concurrency,
+        "statement": settings.job_statement_concurrency,
+    },
+)
+
+
+def run_queue_entry(entry: dict):
+    """Run a job claimed from the durable queue and record its completion"""
+    db = SessionLocal()
+    error = None
     try:
-        while not job_queue.empty():
-            job_func, args = job_queue.get()
-            try:
-                job_func(*args)
-            except Exception as e:
-                logger.error(f"Error executing job from queue: {str(e)}", exc_info=True)
-            finally:
-                job_queue.task_done()
-                # Small delay between jobs to ensure clean event loop cleanup
-                time.sleep(0.5)
+        if entry["job_type"] == "invoice":
+            process_xero_invoices_wrapper(
+                entry["brain_id"], entry["tenant_id"], scheduled_job_id=entry["scheduled_job_id"]
+            )
+        else:  # statement
+            process_bank_statements_wrapper(
+                entry["brain_id"], entry["tenant_id"], db, scheduled_job_id=entry["scheduled_job_id"]
+            )
+    except Exception as e:
+        error = str(e)
+        logger.error(f"Error running queue entry {entry['id']}: {error}", exc_info=True)
     finally:
-        with job_queue_lock:
-            job_queue_running = False
-
-def queue_job(func, *args):
-    """Add a job to the queue and start processing if not already running"""
-    job_queue.put((func, args))
-    
-    # Start processing the queue in a separate thread if not already running
-    with job_queue_lock:
-        if not job_queue_running:
-            threading.Thread(target=process_job_queue, daemon=True).start()
+        try:
+            finish_job(db, entry["id"], error)
+        except Exception as e:
+            logger.error(f"Error finishing queue entry {entry['id']}: {str(e)}", exc_info=True)
+        db.close()
+        job_queue_consumer.notify()
+
+
+job_queue_consumer = JobQueueConsumer(
+    job_executor,
+    run_queue_entry,
+    poll_seconds=settings.job_queue_poll_seconds,
+    aging_seconds=settings.job_priority_aging_seconds,
+)
+
+
+def _resume_scheduler():
+    scheduler.resume()
+    logger.info("Scheduler resumed on this worker")
+
+
+def _pause_scheduler():
+    scheduler.pause()
+    logger.info("Scheduler paused on this worker")
+
+
+def _leader_tick():
+    """Periodic leader housekeeping"""
+    # Pick up jobs that other workers added to the shared job store
+    scheduler.wakeup()
+    db = SessionLocal()
+    try:
+        requeue_stale_jobs(db, settings.job_stale_after_seconds)
+    finally:
+        db.close()
+
+
+leader_elector = LeaderElector(
+    engine,
+    SCHEDULER_LEADER_LOCK_KEY,
+    on_elected=_resume_scheduler,
+    on_demoted=_pause_scheduler,
+    on_tick=_leader_tick,
+)
+
+
+def start_job_workers():
+    """Start the job event loop, the executor, the queue consumer and scheduler leader election"""
+    job_loop.start()
+    job_loop.run(open_http_client(), timeout=10)
+    job_executor.start()
+    job_queue_consumer.start()
+    leader_elector.start()
+
+
+def shutdown_job_workers():
+    """Stop background job processing for this worker"""
+    leader_elector.stop()
+    job_queue_consumer.stop(timeout=10)
+    scheduler.shutdown()
+    dropped = job_executor.shutdown(wait=False)
+    # Runs claimed from the queue but not started would stay 'running' and
+    # block their tenant until they go stale
+    entry_ids = [job.args[0]["id"] for job in dropped if job.func is run_queue_entry]
+    if entry_ids:
+        db = SessionLocal()
+        try:
+            release_jobs(db, entry_ids)
+        except Exception as e:
+            logger.error(f"Error releasing claimed job runs: {str(e)}", exc_info=True)
+        finally:
+            db.close()
+    try:
+        job_loop.run(close_http_client(), timeout=10)
+    except Exception as e:
+        logger.error(f"Error closing job loop HTTP client: {str(e)}")
+    job_loop.stop()
+
+
+def queue_job(
+    db: Session,
+    job: ScheduledJob,
+    delay_seconds: float = 0,
+    priority: int = PRIORITY_BACKGROUND,
+):
+    """Add a run of a scheduled job to the durable queue shared by all workers"""
+    enqueue_job(db, job, delay_seconds, priority)
+    job_queue_consumer.notify()
+
 
 def execute_queued_job(job_id):
-    """Execute a job from the stored parameters"""
-    if job_id in job_parameters:
-        func, args = job_parameters[job_id]
-        queue_job(func, *args)
-    else:
-        logger.error(f"Job parameters not found for job_id: {job_id}")
+    """Queue a run of a scheduled job; called by the scheduler on the leader"""
+    db = SessionLocal()
+    try:
+        job = (
+            db.query(ScheduledJob)
+            .filter(ScheduledJob.id == job_id, ScheduledJob.is_active == True)
+            .first()
+        )
+        if not job:
+            logger.error(f"Active scheduled job not found for job_id: {job_id}")
+            return
+        queue_job(db, job)
+    except Exception as e:
+        logger.error(f"Error queueing scheduled job {job_id}: {str(e)}", exc_info=True)
+    finally:
+        db.close()
+
+def build_job_trigger(tenant_id: str, job_type: str) -> CronTrigger:
+    """
+    Build the cron trigger for a tenant's job.
+
+    Each tenant and job type gets a fixed slot in the schedule window derived
+    from a hash of its ids, so runs are spread out rather than all firing at
+    the top of the schedule, and stay in the same slot across restarts.
+    """
+    cron_fields = dict(
+        hour=settings.schedule_hour,
+        minute=settings.schedule_minute,
+        second=settings.schedule_second,
+        day=settings.schedule_day,
+        month=settings.schedule_month,
+        day_of_week=settings.schedule_day_of_week,
+        jitter=settings.schedule_jitter_seconds or None,
+    )
+    if not settings.schedule_spread_enabled:
+        return CronTrigger(**cron_fields)
+
+    # Measured without jitter, so every worker derives the same slot for a job
+    interval = schedule_interval_seconds(CronTrigger(**dict(cron_fields, jitter=None)))
+    window = settings.schedule_spread_seconds or interval
+    # Never push a run past the next scheduled one
+    if interval:
+        window = min(window, interval)
+    # Leave room for the jitter so it cannot push a run into the next slot cycle
+    window = max(window - (settings.schedule_jitter_seconds or 0), 0)
+    offset = slot_offset_seconds(f"{tenant_id}:{job_type}", window)
+    return StaggeredCronTrigger(offset_seconds=offset, **cron_fields)
+
 
 def get_schedule_description(
     hour: str, minute: str, second: str, day: str, month: str, day_of_week: str
@@ -156,18 +303,29 @@ async def start_job_for_user(
             job_type=job_type,
         )
         db.add(db_job)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another request created the active job first
+            db.rollback()
+            existing_job = (
+                db.query(ScheduledJob)
+                .filter(
+                    ScheduledJob.user_id == user_id,
+                    ScheduledJob.tenant_id == tenant_id,
+                    ScheduledJob.job_type == job_type,
+                    ScheduledJob.is_active == True,
+                )
+                .first()
+            )
+            return {
+                "status": "success",
+                "message": f"{job_type.capitalize()} processing is already scheduled",
+                "job_id": existing_job.id if existing_job else None,
+            }
 
         logger.info(f"Created new {job_type} job {job_id} for user {user_id}")
 
-        # Schedule the job
-        if job_type == "invoice":
-            func = process_xero_invoices_wrapper
-            args = [user.brain_id, tenant_id]
-        else:  # statement
-            func = process_bank_statements_wrapper
-            args = [user.brain_id, tenant_id, db]
-
         # Get schedule description
         schedule_description = get_schedule_description(
             settings.schedule_hour,
@@ -178,18 +336,10 @@ async def start_job_for_user(
             settings.schedule_day_of_week,
         )
 
-        job_parameters[job_id] = (func, args)
         scheduler.add_job(
             func=execute_queued_job,
             args=[job_id],
-            trigger=CronTrigger(
-                hour=settings.schedule_hour,
-                minute=settings.schedule_minute,
-                second=settings.schedule_second,
-                day=settings.schedule_day,
-                month=settings.schedule_month,
-                day_of_week=settings.schedule_day_of_week,
-            ),
+            trigger=build_job_trigger(tenant_id, job_type),
             id=job_id,
             name=f"{job_type.capitalize()} Processing for User {user_id}",
             replace_existing=True,
@@ -199,8 +349,8 @@ async def start_job_for_user(
             f"Scheduled {job_type} job {job_id} to run {schedule_description}"
         )
 
-        # Run immediately in a non-blocking way by adding to the queue
-        queue_job(func, *args)
+        # Run immediately in a non-blocking way by adding to the queue, ahead of cron runs
+        queue_job(db, db_job, priority=PRIORITY_INTERACTIVE)
         logger.info(f"Initial run of {job_type} job {job_id} queued for processing")
 
         next_run = scheduler.get_job(job_id).next_run_time
@@ -224,16 +374,24 @@ async def start_job_for_user(
 async def stop_job(
     db: Session,
     job_id: str,
+    user_id: Optional[str] = None,
 ) -> dict:
-    """Stop a scheduled job"""
+    """Stop a scheduled job, only if it belongs to user_id when one is given"""
     try:
         # Get job from database
-        job = db.query(ScheduledJob).filter(ScheduledJob.id == job_id).first()
+        query = db.query(ScheduledJob).filter(ScheduledJob.id == job_id)
+        if user_id is not None:
+            query = query.filter(ScheduledJob.user_id == user_id)
+        job = query.first()
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
 
-        # Mark as inactive
+        # Mark as inactive and drop any run that has not started yet
         job.is_active = False
+        db.query(JobQueueEntry).filter(
+            JobQueueEntry.scheduled_job_id == job_id,
+            JobQueueEntry.status == "queued",
+        ).delete()
         db.commit()
 
         # Remove from scheduler if it exists
@@ -254,89 +412,158 @@ async def stop_job(
         raise HTTPException(status_code=500, detail=f"Failed to stop job: {str(e)}")
 
 
+async def resync_job(
+    db: Session,
+    job_id: str,
+    user_id: Optional[str] = None,
+) -> dict:
+    """
+    Clear a job's sync cursor and record hashes and queue a full resync run,
+    only if the job belongs to user_id when one is given
+    """
+    try:
+        query = db.query(ScheduledJob).filter(ScheduledJob.id == job_id, ScheduledJob.is_active == True)
+        if user_id is not None:
+            query = query.filter(ScheduledJob.user_id == user_id)
+        job = query.first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Active job not found")
+
+        job.sync_cursor = None
+        job.sync_cursor_id = None
+        db.commit()
+        clear_record_hashes(db, job.tenant_id, job.brain_id, job.job_type)
+
+        queue_job(db, job, priority=PRIORITY_INTERACTIVE)
+        logger.info(f"Full resync of {job.job_type} job {job_id} queued for processing")
+
+        return {
+            "message": f"{job.job_type.capitalize()} full resync queued successfully",
+            "job_id": job_id,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queueing resync: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to queue resync: {str(e)}")
+
+
 def start_jobs_on_startup(db: Session):
-    """Start all active jobs when application starts"""
+    """
+    Start all active jobs when application starts.
+
+    Users, tenants, jobs and run history are loaded in a handful of bulk
+    queries. Jobs that completed a successful run recently skip the boot run
+    and wait for their next scheduled slot; the rest are spread over the
+    startup ramp window so a deploy does not sync every tenant at once.
+    """
     try:
         tenant_metadata_records = db.query(TenantMetadata).all()
         logger.info(f"Found {len(tenant_metadata_records)} tenant metadata records to check for required jobs")
+
+        user_ids = {tenant.user_id for tenant in tenant_metadata_records}
+        users = (
+            {user.id: user for user in db.query(User).filter(User.id.in_(user_ids)).all()}
+            if user_ids
+            else {}
+        )
+        active_jobs = (
+            db.query(ScheduledJob).filter(ScheduledJob.is_active == True).all()
+        )
+        existing_jobs = {
+            (job.user_id, job.tenant_id, job.job_type) for job in active_jobs
+        }
+
         job_types = ["invoice", "statement"]
-        jobs_created = 0
+        new_jobs = []
         for tenant in tenant_metadata_records:
-            user = db.query(User).filter(User.id == tenant.user_id).first()
+            user = users.get(tenant.user_id)
             if not user or not user.brain_id:
                 logger.warning(f"Skipping tenant {tenant.tenant_id} - user {tenant.user_id} not found or has no brain_id")
                 continue
+            user_id = str(tenant.user_id)
             for job_type in job_types:
-                user_id = str(tenant.user_id)
-                existing_job = (
-                    db.query(ScheduledJob)
-                    .filter(
-                        ScheduledJob.user_id == user_id,
-                        ScheduledJob.tenant_id == tenant.tenant_id,
-                        ScheduledJob.job_type == job_type,
-                        ScheduledJob.is_active == True,
-                    )
-                    .first()
+                if (user_id, tenant.tenant_id, job_type) in existing_jobs:
+                    continue
+                new_jobs.append(
+                    {
+                        "id": str(uuid4()),
+                        "user_id": user_id,
+                        "tenant_id": tenant.tenant_id,
+                        "brain_id": user.brain_id,
+                        "job_type": job_type,
+                        "is_active": True,
+                    }
+                )
+                existing_jobs.add((user_id, tenant.tenant_id, job_type))
+
+        if new_jobs:
+            # Every worker runs this on boot; the partial unique index on active
+            # jobs lets only one of them create each job, and the others pick
+            # up the winner's row when the active jobs are read again below
+            created = db.execute(
+                insert(ScheduledJob)
+                .values(new_jobs)
+                .on_conflict_do_nothing(
+                    index_elements=["user_id", "tenant_id", "job_type"],
+                    index_where=text("is_active"),
                 )
-                if existing_job:
-                    logger.debug(f"Job {existing_job.id} already exists for user {tenant.user_id}, tenant {tenant.tenant_id}, type {job_type}")
-                else:
-                    # Create new job record
-                    job_id = str(uuid4())
-                    db_job = ScheduledJob(
-                        id=job_id,
-                        user_id=user_id,
-                        tenant_id=tenant.tenant_id,
-                        brain_id=user.brain_id,
-                        job_type=job_type,
-                        is_active=True
-                    )
-                    db.add(db_job)
-                    jobs_created += 1
-                    logger.info(f"Created and scheduled new {job_type} job {job_id} for user {tenant.user_id}, tenant {tenant.tenant_id}")
-        
-        if jobs_created > 0:
+                .returning(ScheduledJob.id, ScheduledJob.job_type, ScheduledJob.user_id, ScheduledJob.tenant_id)
+            ).all()
             db.commit()
-            logger.info(f"Created {jobs_created} new jobs for users with active tenants")
+            for job_id, job_type, user_id, tenant_id in created:
+                logger.info(f"Created and scheduled new {job_type} job {job_id} for user {user_id}, tenant {tenant_id}")
+            logger.info(f"Created {len(created)} new jobs for users with active tenants")
+            active_jobs = (
+                db.query(ScheduledJob).filter(ScheduledJob.is_active == True).all()
+            )
 
-        active_jobs = (
-            db.query(ScheduledJob).filter(ScheduledJob.is_active == True).all()
-        )
         logger.info(f"Found {len(active_jobs)} active jobs to restore on startup")
 
+        last_successful_runs = get_last_successful_runs(db)
+        now = datetime.now(timezone.utc)
+        skipped = 0
+        queued = 0
         for job in active_jobs:
-            if job.job_type == "invoice":
-                func = process_xero_invoices_wrapper
-                args = [job.brain_id, job.tenant_id]
-            else:  # statement
-                func = process_bank_statements_wrapper
-                args = [job.brain_id, job.tenant_id, db]
-
-            job_parameters[job.id] = (func, args)
             scheduler.add_job(
                 func=execute_queued_job,
                 args=[job.id],
-                trigger=CronTrigger(
-                    hour=settings.schedule_hour,
-                    minute=settings.schedule_minute,
-                    second=settings.schedule_second,
-                    day=settings.schedule_day,
-                    month=settings.schedule_month,
-                    day_of_week=settings.schedule_day_of_week,
-                ),
+                trigger=build_job_trigger(job.tenant_id, job.job_type),
                 id=job.id,
                 name=f"{job.job_type.capitalize()} Processing for User {job.user_id}",
                 replace_existing=True,
             )
+            next_run = scheduler.get_job(job.id).next_run_time
 
-            queue_job(func, *args)
-            logger.info(f"Initial run of {job.job_type} job {job.id} queued for processing")
+            last_success = last_successful_runs.get((job.tenant_id, job.job_type))
+            if (
+                last_success is not None
+                and (now - last_success).total_seconds() < settings.startup_skip_recent_seconds
+            ):
+                skipped += 1
+                logger.info(
+                    f"Restored {job.job_type} job {job.id} for user {job.user_id}; last successful run "
+                    f"at {last_success} is recent, skipping boot run. Next run scheduled for {next_run}"
+                )
+                continue
 
-            next_run = scheduler.get_job(job.id).next_run_time
+            # Every worker runs this on boot and computes the same delay for a job;
+            # the queue coalesces the duplicate runs
+            delay = slot_offset_seconds(
+                f"{job.tenant_id}:{job.job_type}", settings.startup_ramp_seconds
+            )
+            queue_job(db, job, delay_seconds=delay)
+            queued += 1
             logger.info(
-                f"Restored {job.job_type} job {job.id} for user {job.user_id}. "
-                f"Next run scheduled for {next_run}"
+                f"Restored {job.job_type} job {job.id} for user {job.user_id}. Boot run queued "
+                f"in {delay}s, next run scheduled for {next_run}"
             )
 
+        logger.info(
+            f"Startup queued {queued} catch-up runs over {settings.startup_ramp_seconds}s "
+            f"and skipped {skipped} recently synced jobs"
+        )
+
     except Exception as e:
         logger.error(f"Error starting jobs on startup: {str(e)}", exc_info=True)
@@ -0,0 +1,311 @@
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.database.job_queue_models import JobQueueEntry
+from app.models.database.scheduled_jobs_models import ScheduledJob
+from app.scheduled_tasks.job_executor import JobExecutor
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process in job_queue.worker_id
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Transaction-level advisory lock that serialises claims, so two workers
+# cannot both see a tenant as idle and start it at the same time
+CLAIM_LOCK_KEY = 734_201_002
+
+# Priority lanes. User-triggered runs (tenant activation, manual resync) go
+# ahead of cron and startup runs.
+PRIORITY_BACKGROUND = 0
+PRIORITY_INTERACTIVE = 1
+
+
+def enqueue_job(
+    db: Session,
+    job: ScheduledJob,
+    delay_seconds: float = 0,
+    priority: int = PRIORITY_BACKGROUND,
+) -> bool:
+    """
+    Add a run of a scheduled job to the durable queue.
+
+    The run is not claimed until delay_seconds have passed. Returns False
+    when a run of the same job is already waiting, in which case the new
+    request is coalesced into it and raises its priority if needed.
+    """
+    statement = (
+        insert(JobQueueEntry)
+        .values(
+            scheduled_job_id=job.id,
+            job_type=job.job_type,
+            tenant_id=job.tenant_id,
+            brain_id=job.brain_id,
+            available_at=func.now() + timedelta(seconds=max(delay_seconds, 0)),
+            priority=priority,
+        )
+        .on_conflict_do_nothing(
+            index_elements=["scheduled_job_id"],
+            index_where=text("status = 'queued'"),
+        )
+        .returning(JobQueueEntry.id)
+    )
+    inserted = db.execute(statement).scalar()
+    if inserted is None:
+        # The waiting run takes on the more urgent of the two requests, so an
+        # immediate or interactive request is not held back by the run it
+        # coalesces into
+        db.execute(
+            text(
+                """
+                UPDATE job_queue
+                SET available_at = CASE WHEN :immediate THEN LEAST(available_at, now()) ELSE available_at END,
+                    priority = GREATEST(priority, :priority)
+                WHERE scheduled_job_id = :scheduled_job_id
+                  AND status = 'queued'
+                """
+            ),
+            {
+                "scheduled_job_id": job.id,
+                "immediate": delay_seconds <= 0,
+                "priority": priority,
+            },
+        )
+    db.commit()
+    if inserted is None:
+        logger.info(f"{job.job_type.capitalize()} job {job.id} already queued, skipping duplicate run")
+        return False
+    if delay_seconds > 0:
+        logger.info(
+            f"Queued {job.job_type} job {job.id} as queue entry {inserted} with priority {priority}, "
+            f"available in {delay_seconds:.0f}s"
+        )
+    else:
+        logger.info(f"Queued {job.job_type} job {job.id} as queue entry {inserted} with priority {priority}")
+    return True
+
+
+def claim_next_job(
+    db: Session, job_types: List[str], aging_seconds: float = 300
+) -> Optional[dict]:
+    """
+    Claim the most urgent available queued run of one of the given job types.
+
+    Higher priority runs are claimed first. A run's effective priority grows
+    by one level for every aging_seconds it has waited, so background runs
+    cannot be starved by a steady stream of interactive ones. Runs for
+    tenants that already have a job running anywhere are skipped.
+    Returns the claimed row as a dict, or None when nothing is runnable.
+    """
+    if not job_types:
+        return None
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CLAIM_LOCK_KEY})
+    row = db.execute(
+        text(
+            """
+            UPDATE job_queue
+            SET status = 'running',
+                worker_id = :worker_id,
+                started_at = now(),
+                attempts = attempts + 1
+            WHERE id = (
+                SELECT q.id
+                FROM job_queue q
+                WHERE q.status = 'queued'
+                  AND q.available_at <= now()
+                  AND q.job_type = ANY(:job_types)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM job_queue r
+                      WHERE r.tenant_id = q.tenant_id AND r.status = 'running'
+                  )
+                ORDER BY q.priority
+                         + EXTRACT(EPOCH FROM now() - q.enqueued_at) / :aging_seconds DESC,
+                         q.enqueued_at
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, scheduled_job_id, job_type, tenant_id, brain_id, attempts, priority
+            """
+        ),
+        {
+            "worker_id": WORKER_ID,
+            "job_types": list(job_types),
+            "aging_seconds": max(aging_seconds, 1),
+        },
+    ).first()
+    db.commit()
+    return dict(row._mapping) if row else None
+
+
+def finish_job(db: Session, entry_id: int, error: Optional[str] = None):
+    """Mark a claimed run as finished"""
+    db.execute(
+        text(
+            """
+            UPDATE job_queue
+            SET status = 'done', finished_at = now(), error = :error
+            WHERE id = :id
+            """
+        ),
+        {"id": entry_id, "error": error},
+    )
+    db.commit()
+
+
+def _return_runs_to_queue(db: Session, condition: str, params: dict) -> Tuple[int, int]:
+    """
+    Put running runs matching condition back in the queue.
+
+    A run whose job already has another run waiting cannot be requeued, as
+    only one run per job may wait; it is closed as abandoned instead so it
+    stops blocking its tenant. Returns (requeued, abandoned).
+    """
+    waiting = """
+        EXISTS (
+            SELECT 1 FROM job_queue w
+            WHERE w.scheduled_job_id = job_queue.scheduled_job_id
+              AND w.status = 'queued'
+        )
+    """
+    abandoned = db.execute(
+        text(
+            f"""
+            UPDATE job_queue
+            SET status = 'done', finished_at = now(), error = 'abandoned'
+            WHERE status = 'running' AND ({condition}) AND {waiting}
+            """
+        ),
+        params,
+    ).rowcount
+    requeued = db.execute(
+        text(
+            f"""
+            UPDATE job_queue
+            SET status = 'queued', worker_id = NULL, started_at = NULL
+            WHERE status = 'running' AND ({condition}) AND NOT {waiting}
+            """
+        ),
+        params,
+    ).rowcount
+    db.commit()
+    return requeued, abandoned
+
+
+def requeue_stale_jobs(db: Session, stale_after_seconds: int) -> int:
+    """
+    Return runs to the queue whose worker stopped reporting back.
+
+    A run is considered abandoned when it has been running for longer than
+    stale_after_seconds, e.g. because its worker process was restarted.
+    """
+    requeued, abandoned = _return_runs_to_queue(
+        db,
+        "started_at < now() - make_interval(secs => :stale_after)",
+        {"stale_after": stale_after_seconds},
+    )
+    if requeued or abandoned:
+        logger.warning(
+            f"Requeued {requeued} stale job runs, closed {abandoned} already queued again as abandoned"
+        )
+    return requeued + abandoned
+
+
+def release_jobs(db: Session, entry_ids: List[int]) -> int:
+    """
+    Return runs this worker claimed but never started, e.g. on shutdown.
+
+    The claim does not count as an attempt.
+    """
+    if not entry_ids:
+        return 0
+    db.execute(
+        text(
+            """
+            UPDATE job_queue SET attempts = GREATEST(attempts - 1, 0)
+            WHERE id = ANY(:ids) AND status = 'running' AND worker_id = :worker_id
+            """
+        ),
+        {"ids": list(entry_ids), "worker_id": WORKER_ID},
+    )
+    requeued, abandoned = _return_runs_to_queue(
+        db, "id = ANY(:ids) AND worker_id = :worker_id", {"ids": list(entry_ids), "worker_id": WORKER_ID}
+    )
+    logger.info(f"Released {requeued} claimed job runs back to the queue, {abandoned} already queued again")
+    return requeued + abandoned
+
+
+class JobQueueConsumer:
+    """
+    Moves runs from the durable queue into the local executor.
+
+    Runs are only claimed while the executor has idle workers, so work that
+    this process cannot start yet stays available to the other workers.
+    """
+
+    def __init__(
+        self,
+        executor: JobExecutor,
+        run_entry: Callable[[dict], None],
+        poll_seconds: float,
+        aging_seconds: float = 300,
+    ):
+        self.executor = executor
+        self.run_entry = run_entry
+        self.poll_seconds = poll_seconds
+        self.aging_seconds = aging_seconds
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="job-queue-consumer", daemon=True)
+        self._thread.start()
+        logger.info(f"Job queue consumer started as worker {WORKER_ID}")
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stopped.set()
+        self._wakeup.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            # Let an in-progress claim finish so its runs reach the executor
+            thread.join(timeout)
+
+    def notify(self):
+        """Wake the consumer, e.g. after enqueueing or finishing a run"""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self._claim_available()
+            except Exception as e:
+                logger.error(f"Error claiming jobs from queue: {str(e)}", exc_info=True)
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+
+    def _claim_available(self):
+        db = SessionLocal()
+        try:
+            while self.executor.idle_slots() > 0:
+                job_types = self.executor.types_with_capacity()
+                entry = claim_next_job(db, job_types, self.aging_seconds)
+                if not entry:
+                    return
+                logger.info(
+                    f"Claimed {entry['job_type']} queue entry {entry['id']} for tenant {entry['tenant_id']} "
+                    f"(priority {entry['priority']})"
+                )
+                self.executor.submit(entry["job_type"], entry["tenant_id"], self.run_entry, entry)
+        finally:
+            db.close()
@@ -0,0 +1,102 @@
+import logging
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElector:
+    """
+    Elects a single scheduler leader across worker processes.
+
+    Every worker competes for a Postgres session-level advisory lock held on
+    a dedicated connection. The holder is the leader until its connection
+    drops, at which point the lock is released and another worker takes over
+    on its next attempt.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        lock_key: int,
+        on_elected: Callable[[], None],
+        on_demoted: Callable[[], None],
+        on_tick: Optional[Callable[[], None]] = None,
+        interval_seconds: float = 10.0,
+    ):
+        self.engine = engine
+        self.lock_key = lock_key
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.on_tick = on_tick
+        self.interval_seconds = interval_seconds
+        self.is_leader = False
+        self._connection: Optional[Connection] = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="scheduler-leader-election", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread = None
+        self._release()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self.is_leader:
+                    # Fails if the connection holding the lock has gone away
+                    self._connection.execute(text("SELECT 1"))
+                else:
+                    self._try_acquire()
+            except Exception as e:
+                logger.error(f"Scheduler leader election error: {str(e)}")
+                self._release()
+
+            if self.is_leader and self.on_tick:
+                try:
+                    self.on_tick()
+                except Exception as e:
+                    logger.error(f"Error in scheduler leader tick: {str(e)}", exc_info=True)
+
+            self._stopped.wait(self.interval_seconds)
+
+    def _try_acquire(self):
+        if self._connection is None:
+            self._connection = self.engine.connect()
+        acquired = self._connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+        ).scalar()
+        # Keep the connection out of a transaction so the lock outlives this statement
+        self._connection.commit()
+        if acquired:
+            self.is_leader = True
+            logger.info("This worker is now the scheduler leader")
+            self.on_elected()
+
+    def _release(self):
+        was_leader = self.is_leader
+        self.is_leader = False
+        if self._connection is not None:
+            try:
+                # Closing the connection releases the session-level advisory lock
+                self._connection.invalidate()
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+        if was_leader:
+            logger.warning("This worker is no longer the scheduler leader")
+            try:
+                self.on_demoted()
+            except Exception as e:
+                logger.error(f"Error handling loss of scheduler leadership: {str(e)}", exc_info=True)
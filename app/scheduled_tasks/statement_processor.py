@@ -1,17 +1,53 @@
 import asyncio
 import logging
-from functools import partial
-from typing import Any, Dict, List
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from sqlalchemy import text
+from sqlalchemy import Row, text
 from sqlalchemy.orm import Session, sessionmaker
 
+from app.scheduled_tasks.async_runner import job_loop
+from app.utils.database.job_run_utils import JobRunStats, finish_job_run, start_job_run
+from app.utils.database.record_hash_utils import filter_changed_records, save_record_hashes
+from app.utils.database.sync_utils import get_sync_position, set_sync_cursor
 from app.utils.http_client import post_json
+from app.utils.response_cache import invalidate_brain
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
 
+STATEMENTS_QUERY = text(
+    """
+    SELECT 
+        client_name,
+        account_name,
+        transaction_date,
+        payee,
+        particulars,
+        received,
+        file_name
+    FROM statements
+    WHERE tenant_id = :tenant_id
+    """
+)
+
+
+def _statement_to_dict(row) -> Dict[str, Any]:
+    """Converts a statements row into the payload format expected by the brain"""
+    return {
+        "client_name": row.client_name,
+        "account_name": row.account_name,
+        "transaction_date": row.transaction_date.isoformat()
+        if row.transaction_date
+        else None,
+        "payee": row.payee,
+        "particulars": row.particulars,
+        "received": float(row.received) if row.received else 0.0,
+        "file_name": row.file_name,
+    }
+
+
 async def fetch_statements(db: Session, tenant_id: str) -> List[Dict[Any, Any]]:
     """
     Fetches statements from the 'statements' table in the database.
@@ -22,40 +58,11 @@ async def fetch_statements(db: Session, tenant_id: str) -> List[Dict[Any, Any]]:
     try:
         logger.info(f"Attempting to fetch statements for tenant: {tenant_id}")
 
-        # SQL query to fetch required columns
-        query = text(
-            """
-            SELECT 
-                client_name,
-                account_name,
-                transaction_date,
-                payee,
-                particulars,
-                received,
-                file_name
-            FROM statements
-            WHERE tenant_id = :tenant_id
-            """
-        )
-
         # Execute query with tenant_id parameter
-        result = db.execute(query, {"tenant_id": tenant_id})
+        result = db.execute(STATEMENTS_QUERY, {"tenant_id": tenant_id})
 
         # Convert to list of dictionaries
-        statements = []
-        for row in result:
-            statement = {
-                "client_name": row.client_name,
-                "account_name": row.account_name,
-                "transaction_date": row.transaction_date.isoformat()
-                if row.transaction_date
-                else None,
-                "payee": row.payee,
-                "particulars": row.particulars,
-                "received": float(row.received) if row.received else 0.0,
-                "file_name": row.file_name,
-            }
-            statements.append(statement)
+        statements = [_statement_to_dict(row) for row in result]
 
         logger.info(
             f"Successfully fetched {len(statements)} statements for tenant: {tenant_id}"
@@ -70,97 +77,227 @@ async def fetch_statements(db: Session, tenant_id: str) -> List[Dict[Any, Any]]:
         raise
 
 
-async def process_bank_statements(brain_id: str, tenant_id: str, db: Session):
+DELTA_STATEMENTS_QUERY = text(
+    """
+    SELECT 
+        id,
+        updated_at,
+        client_name,
+        account_name,
+        transaction_date,
+        payee,
+        particulars,
+        received,
+        file_name
+    FROM statements
+    WHERE tenant_id = :tenant_id
+      AND (
+          CAST(:since AS timestamptz) IS NULL
+          OR (updated_at, id) > (CAST(:since AS timestamptz), :since_id)
+      )
+    ORDER BY updated_at, id
+    """
+)
+
+
+def stream_statements(
+    db: Session,
+    tenant_id: str,
+    chunk_size: int,
+    since: Optional[datetime] = None,
+    since_id: Optional[int] = None,
+) -> Iterator[List[Row]]:
+    """
+    Streams statement rows for a tenant in fixed-size chunks.
+
+    Rows are read through a server-side cursor, so only one chunk is held
+    in memory at a time. When a (since, since_id) high-water mark is given,
+    only rows inserted or updated after it are returned, ordered by
+    (updated_at, id).
+    Args:
+        db: Database session
+        tenant_id: ID of the tenant to fetch statements for
+        chunk_size: Number of rows per chunk
+        since: updated_at of the last row already pushed
+        since_id: id of the last row already pushed
+    """
+    logger.info(
+        f"Streaming statements for tenant: {tenant_id} in chunks of {chunk_size}"
+        + (f", updated after {since} ({since_id})" if since else "")
+    )
+    result = db.execute(
+        DELTA_STATEMENTS_QUERY,
+        {"tenant_id": tenant_id, "since": since, "since_id": since_id or 0},
+        execution_options={"yield_per": chunk_size},
+    )
+    try:
+        for rows in result.partitions():
+            yield rows
+    finally:
+        result.close()
+
+
+def _position(updated_at: datetime, row_id: Optional[int]) -> Tuple[datetime, int]:
+    """(updated_at, id) in a form comparable with the stored high-water mark"""
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return updated_at, row_id or 0
+
+
+def _changed_statements(
+    db: Session, tenant_id: str, brain_id: str, rows: List[Row]
+) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """Serializes a chunk of rows and drops those the brain already has unchanged"""
+    return filter_changed_records(
+        db,
+        tenant_id,
+        brain_id,
+        "statement",
+        [(row.id, _statement_to_dict(row)) for row in rows],
+    )
+
+
+async def process_bank_statements(
+    brain_id: str, tenant_id: str, db: Session, stats: Optional[JobRunStats] = None
+):
     """
     Fetches statements from database and processes them through the brain API.
+
+    Only statements inserted or updated since the last successful push, and
+    whose content the brain has not already acknowledged, are sent. They are
+    read in chunks and each chunk is sent to the brain as soon as it has
+    been read; the high-water mark advances after every chunk the brain
+    acknowledges, but never back into the overlap window re-read behind it.
+    Run metrics are added to stats when given.
     """
+    stats = stats or JobRunStats()
+    # The streaming read keeps a transaction open on db, so progress is
+    # committed through a separate session
+    sync_db = Session(bind=db.get_bind())
+    chunks = None
     try:
         logger.info(f"Starting statement processing for brain_id: {brain_id}, tenant_id: {tenant_id}")
 
-        # Fetch statements from database
-        statements = await fetch_statements(db, tenant_id)
+        since, since_id = await asyncio.to_thread(
+            get_sync_position, sync_db, tenant_id, brain_id, "statement"
+        )
+        high_water = _position(since, since_id) if since is not None else None
+        if since is not None and settings.statement_sync_overlap_seconds > 0:
+            # updated_at is the start time of the writing transaction, so a row
+            # committed after the last run can carry an older timestamp than
+            # the high-water mark. Read back over a window to pick those up;
+            # rows already sent are dropped by their record hashes.
+            since = since - timedelta(seconds=settings.statement_sync_overlap_seconds)
+            since_id = None
+
+        num_statements = 0
+        num_batches = 0
+        # Database work runs in worker threads, as blocking the job loop would
+        # stall the brain requests of every other running job
+        chunks = stream_statements(
+            db, tenant_id, settings.statement_chunk_size, since=since, since_id=since_id
+        )
+        while True:
+            rows = await asyncio.to_thread(next, chunks, None)
+            if rows is None:
+                break
+            if not rows:
+                continue
+            statements, changed_hashes = await asyncio.to_thread(
+                _changed_statements, sync_db, tenant_id, brain_id, rows
+            )
+
+            if statements:
+                # Process the statements through the Xero processing endpoint
+                payload = {
+                    "data": statements,
+                    "brainId": brain_id,
+                    "documentType": "statement"
+                }
+
+                # Send the request to the Xero processing endpoint
+                result = await post_json(
+                    f"{settings.brain_base_url}/v1/file/xero/process",
+                    json=payload,
+                    log_message=f"process bank statements batch {num_batches + 1}",
+                    on_request_sent=stats.add_bytes,
+                )
+                await asyncio.to_thread(
+                    save_record_hashes, sync_db, tenant_id, brain_id, "statement", changed_hashes
+                )
+                invalidate_brain(brain_id)
+                num_statements += len(statements)
+                num_batches += 1
+                stats.add_batch(len(statements))
+                logger.info(f"Brain API response: {result}")
 
-        # Log the number of statements fetched
-        num_statements = len(statements)
-        logger.info(f"Fetched {num_statements} statements for tenant: {tenant_id}")
+            last_row = rows[-1]
+            position = _position(last_row.updated_at, last_row.id)
+            if high_water is not None and position <= high_water:
+                # Still inside the overlap window behind the stored mark
+                continue
+            await asyncio.to_thread(
+                set_sync_cursor,
+                sync_db,
+                tenant_id,
+                brain_id,
+                "statement",
+                last_row.updated_at,
+                last_row.id,
+            )
+            high_water = position
 
-        if not statements:
-            logger.info("No statements found to process")
+        if not num_statements:
+            logger.info("No new or updated statements to process")
             return
 
-        # Process the statements through the Xero processing endpoint
-        payload = {
-            "data": statements,
-            "brainId": brain_id,
-            "documentType": "statement"
-        }
-        
-        # Send the request to the Xero processing endpoint
-        result = await post_json(
-            f"{settings.brain_base_url}/v1/file/xero/process",
-            json=payload,
-            log_message="process bank statements",
-        )
-        
         logger.info(
-            f"Successfully processed {num_statements} statements for brain_id: {brain_id}, tenant_id: {tenant_id}"
+            f"Successfully processed {num_statements} statements in {num_batches} batches "
+            f"for brain_id: {brain_id}, tenant_id: {tenant_id}"
         )
-        logger.info(f"Brain API response: {result}")
-        return result
+        return {"statements": num_statements, "batches": num_batches}
 
     except Exception as e:
         logger.error(f"Error processing statements: {str(e)}", exc_info=True)
+        stats.error = str(e)
+    finally:
+        if chunks is not None:
+            try:
+                # Closes the server-side cursor
+                await asyncio.to_thread(chunks.close)
+            except Exception as e:
+                # Still being read by a worker thread after a timeout
+                logger.warning(f"Could not close statement cursor: {str(e)}")
+        sync_db.close()
 
 
-def process_bank_statements_wrapper(brain_id: str, tenant_id: str, db: Session):
+def process_bank_statements_wrapper(
+    brain_id: str, tenant_id: str, db: Session, scheduled_job_id: Optional[str] = None
+):
     """
-    Wrapper function to properly handle async execution in background threads.
+    Runs statement processing from a background thread on the shared job loop.
+
+    Each run is recorded in the job_runs table with its duration and metrics.
     """
-    loop = None
-    thread_db = None
+    stats = JobRunStats()
+    run_db = Session(bind=db.get_bind())
+    run_id = start_job_run(run_db, "statement", tenant_id, brain_id, scheduled_job_id)
+    # Create a new database session for this run
+    SessionLocal = sessionmaker(bind=db.bind, autocommit=False, autoflush=False)
+    thread_db = SessionLocal()
     try:
-        # Create new event loop for this thread
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        # Create a new database session for this thread
-        SessionLocal = sessionmaker(bind=db.bind, autocommit=False, autoflush=False)
-        thread_db = SessionLocal()
-
-        try:
-            # Create partial function with args
-            coro = partial(process_bank_statements, brain_id, tenant_id, thread_db)
-
-            # Run with timeout to prevent hanging
-            future = asyncio.wait_for(coro(), timeout=300)  # 5 minute timeout
-            result = loop.run_until_complete(future)
-            return result
-        finally:
-            # Close the thread-specific database session
-            if thread_db:
-                thread_db.close()
-                
-            # Make sure we clean up properly
-            loop.run_until_complete(loop.shutdown_asyncgens())
-            loop.close()
-
+        # Run with timeout to prevent hanging
+        return job_loop.run(
+            process_bank_statements(brain_id, tenant_id, thread_db, stats),
+            timeout=300,  # 5 minute timeout
+        )
     except asyncio.TimeoutError:
         logger.error(f"Statement processing timed out for brain_id: {brain_id}, tenant_id: {tenant_id}")
+        stats.timed_out = True
     except Exception as e:
         logger.error(f"Error processing statements: {str(e)}", exc_info=True)
+        stats.error = str(e)
     finally:
-        # Ensure the database session is closed
-        if thread_db:
-            try:
-                thread_db.close()
-            except Exception:
-                pass
-                
-        # Ensure the loop is properly cleaned up
-        if loop and not loop.is_closed():
-            try:
-                if loop.is_running():
-                    loop.stop()
-                loop.close()
-            except Exception as e:
-                logger.error(f"Error closing event loop: {str(e)}")
+        thread_db.close()
+        finish_job_run(run_db, run_id, stats)
+        run_db.close()
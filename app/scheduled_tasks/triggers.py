@@ -0,0 +1,64 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from apscheduler.triggers.cron import CronTrigger
+
+
+class StaggeredCronTrigger(CronTrigger):
+    """
+    Cron trigger whose fire times are shifted by a fixed offset.
+
+    Lets every tenant share one cron schedule while firing in its own slot
+    within the schedule window, instead of all jobs firing in the same second.
+    """
+
+    def __init__(self, offset_seconds: float = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.offset = timedelta(seconds=offset_seconds)
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        base_previous = previous_fire_time - self.offset if previous_fire_time else None
+        next_fire_time = super().get_next_fire_time(base_previous, now - self.offset)
+        return next_fire_time + self.offset if next_fire_time else None
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["offset_seconds"] = self.offset.total_seconds()
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        offset_seconds = state.pop("offset_seconds", 0)
+        super().__setstate__(state)
+        self.offset = timedelta(seconds=offset_seconds)
+
+    def __str__(self):
+        return f"{super().__str__()} +{int(self.offset.total_seconds())}s"
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} ({super().__str__()}, offset={int(self.offset.total_seconds())}s)>"
+
+
+def schedule_interval_seconds(trigger: CronTrigger, now: Optional[datetime] = None) -> float:
+    """
+    Seconds between the next two fire times of a cron trigger.
+
+    Pass a trigger without jitter, otherwise the result changes between calls.
+    """
+    now = now or datetime.now(trigger.timezone)
+    first = trigger.get_next_fire_time(None, now)
+    if first is None:
+        return 0
+    second = trigger.get_next_fire_time(first, first + timedelta(microseconds=1))
+    if second is None:
+        return 0
+    return (second - first).total_seconds()
+
+
+def slot_offset_seconds(key: str, window_seconds: float) -> int:
+    """Deterministic offset in [0, window_seconds) for a key, e.g. a tenant id"""
+    if window_seconds < 1:
+        return 0
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return int(digest[:12], 16) % int(window_seconds)
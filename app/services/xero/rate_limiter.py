@@ -0,0 +1,298 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class XeroRateLimitError(Exception):
+    """Raised when a Xero call cannot be made within the allowed wait"""
+
+    def __init__(self, tenant_id: str, wait_seconds: float, retry_after: Optional[float] = None):
+        self.tenant_id = tenant_id
+        self.wait_seconds = wait_seconds
+        # Seconds until the tenant is expected to have capacity again
+        self.retry_after = retry_after if retry_after is not None else wait_seconds
+        super().__init__(
+            f"Xero rate limit for tenant {tenant_id} would require waiting {wait_seconds:.0f}s"
+        )
+
+
+# Shorter wait limit for calls made from the current context, see call_xero
+_max_wait_override: ContextVar[Optional[float]] = ContextVar("xero_rate_limit_max_wait", default=None)
+
+
+@dataclass
+class _TenantLimit:
+    tokens: float
+    refilled_at: float = field(default_factory=time.monotonic)
+    in_flight: int = 0
+    blocked_until: float = 0.0
+    day_remaining: Optional[int] = None
+
+
+def _on_event_loop() -> bool:
+    """Whether the calling thread is running an asyncio event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _header(headers: Optional[Mapping[str, Any]], name: str) -> Optional[str]:
+    if not headers:
+        return None
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _int_header(headers: Optional[Mapping[str, Any]], name: str) -> Optional[int]:
+    value = _header(headers, name)
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class XeroRateLimiter:
+    """
+    Per-tenant limiter for Xero API calls.
+
+    Combines a token bucket (calls per minute) with a cap on concurrent calls
+    per tenant. Calls over the limit wait for capacity instead of failing.
+    The bucket is corrected from the X-MinLimit-Remaining header, so calls
+    made by other worker processes are accounted for, and a 429's
+    Retry-After blocks the tenant until Xero accepts calls again.
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: int = 60,
+        max_concurrent: int = 5,
+        max_wait_seconds: float = 300,
+    ):
+        self.calls_per_minute = max(1, calls_per_minute)
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_wait_seconds = max_wait_seconds
+        self._limits: Dict[str, _TenantLimit] = {}
+        self._condition = threading.Condition()
+        self.counters = {"calls": 0, "waits": 0, "throttled": 0, "rejected": 0}
+
+    @property
+    def _refill_rate(self) -> float:
+        return self.calls_per_minute / 60.0
+
+    def _get_limit(self, tenant_id: str) -> _TenantLimit:
+        limit = self._limits.get(tenant_id)
+        if limit is None:
+            limit = _TenantLimit(tokens=float(self.calls_per_minute))
+            self._limits[tenant_id] = limit
+        return limit
+
+    def _refill(self, limit: _TenantLimit, now: float):
+        elapsed = now - limit.refilled_at
+        limit.tokens = min(float(self.calls_per_minute), limit.tokens + elapsed * self._refill_rate)
+        limit.refilled_at = now
+
+    def acquire(self, tenant_id: str):
+        """
+        Block until a call for the tenant is allowed, then reserve it.
+
+        Waiting on an event loop thread would stall every request on that
+        loop, so there the call is rejected at once instead. Async code
+        should make Xero calls through asyncio.to_thread, or call_xero in
+        request handlers, which also shortens the wait.
+        """
+        started = time.monotonic()
+        waited = False
+        max_wait = 0 if _on_event_loop() else self.max_wait_seconds
+        override = _max_wait_override.get()
+        if override is not None:
+            max_wait = min(max_wait, override)
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                limit = self._get_limit(tenant_id)
+                self._refill(limit, now)
+
+                if limit.blocked_until > now:
+                    wait = limit.blocked_until - now
+                elif limit.in_flight >= self.max_concurrent:
+                    wait = None  # Until a call finishes
+                elif limit.tokens < 1:
+                    wait = (1 - limit.tokens) / self._refill_rate
+                else:
+                    limit.tokens -= 1
+                    limit.in_flight += 1
+                    self.counters["calls"] += 1
+                    break
+
+                if (wait is None and not max_wait) or now - started + (wait or 0) > max_wait:
+                    self.counters["rejected"] += 1
+                    # A concurrency slot usually frees up within a second
+                    raise XeroRateLimitError(tenant_id, now - started + (wait or 0), retry_after=wait or 1)
+                if not waited:
+                    waited = True
+                    self.counters["waits"] += 1
+                self._condition.wait(wait if wait is not None else self.max_wait_seconds)
+
+        if waited:
+            logger.info(
+                f"Xero call for tenant {tenant_id} waited {time.monotonic() - started:.1f}s for rate limit"
+            )
+
+    def release(self, tenant_id: str):
+        with self._condition:
+            limit = self._get_limit(tenant_id)
+            limit.in_flight = max(0, limit.in_flight - 1)
+            self._condition.notify_all()
+
+    @contextmanager
+    def limit(self, tenant_id: str):
+        """Reserve a call for the tenant for the duration of the block"""
+        self.acquire(tenant_id)
+        try:
+            yield
+        finally:
+            self.release(tenant_id)
+
+    def update_from_headers(
+        self, tenant_id: str, headers: Optional[Mapping[str, Any]], status: Optional[int] = None
+    ):
+        """Adapt the tenant's limit to the rate limit headers of a Xero response"""
+        minute_remaining = _int_header(headers, "X-MinLimit-Remaining")
+        day_remaining = _int_header(headers, "X-DayLimit-Remaining")
+        retry_after = _int_header(headers, "Retry-After")
+
+        with self._condition:
+            limit = self._get_limit(tenant_id)
+            self._refill(limit, time.monotonic())
+            if minute_remaining is not None:
+                limit.tokens = min(limit.tokens, float(minute_remaining))
+            if day_remaining is not None:
+                limit.day_remaining = day_remaining
+            if day_remaining == 0 and status != 429:
+                # Out of daily calls. Hold the tenant off for a minute rather
+                # than spending calls that will fail; the next call's 429 then
+                # carries the Retry-After until the daily window resets
+                limit.blocked_until = max(limit.blocked_until, time.monotonic() + 60)
+                logger.warning(f"Xero daily limit used up for tenant {tenant_id}, holding calls")
+            if status == 429:
+                self.counters["throttled"] += 1
+                # Without Retry-After, wait for one token's worth of the minute window
+                delay = retry_after if retry_after is not None else 60 / self.calls_per_minute
+                limit.blocked_until = max(limit.blocked_until, time.monotonic() + delay)
+                limit.tokens = min(limit.tokens, 0.0)
+                logger.warning(
+                    f"Xero rate limited tenant {tenant_id} "
+                    f"({_header(headers, 'X-Rate-Limit-Problem') or 'unknown'} limit), "
+                    f"retrying after {delay}s"
+                )
+            self._condition.notify_all()
+
+        if day_remaining is not None and day_remaining < 100:
+            logger.warning(f"Xero daily limit nearly used up for tenant {tenant_id}: {day_remaining} calls left")
+
+    def stats(self, tenant_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Counters and the current state of every tenant seen so far, or only of tenant_ids"""
+        if tenant_ids is not None:
+            tenant_ids = set(tenant_ids)
+        with self._condition:
+            now = time.monotonic()
+            return {
+                **self.counters,
+                "tenants": {
+                    tenant_id: {
+                        "tokens": round(limit.tokens, 2),
+                        "in_flight": limit.in_flight,
+                        "blocked_for_seconds": round(max(0.0, limit.blocked_until - now), 1),
+                        "day_remaining": limit.day_remaining,
+                    }
+                    for tenant_id, limit in self._limits.items()
+                    if tenant_ids is None or tenant_id in tenant_ids
+                },
+            }
+
+    def install(self, api_client, max_retries: int = 3):
+        """
+        Route every request made through a xero_python ApiClient via this limiter.
+
+        Requests are keyed by their xero-tenant-id header; calls without one,
+        such as the identity API's connection list, are not limited. A 429 is
+        retried after its Retry-After delay up to max_retries times.
+        """
+        rest_client = api_client.rest_client
+        send = rest_client.request
+
+        def request(method, url, *args, **kwargs):
+            headers = kwargs.get("headers")
+            if headers is None and len(args) > 1:
+                headers = args[1]
+            tenant_id = _header(headers, "xero-tenant-id")
+            if not tenant_id:
+                return send(method, url, *args, **kwargs)
+
+            attempt = 0
+            while True:
+                with self.limit(tenant_id):
+                    try:
+                        response = send(method, url, *args, **kwargs)
+                    except Exception as e:
+                        status = getattr(e, "status", None)
+                        self.update_from_headers(tenant_id, getattr(e, "headers", None), status)
+                        # Sleeping out Retry-After would block an event loop
+                        if status != 429 or attempt >= max_retries or _on_event_loop():
+                            raise
+                        attempt += 1
+                        continue
+                self.update_from_headers(tenant_id, response.getheaders(), response.status)
+                return response
+
+        rest_client.request = request
+        logger.info(
+            f"Xero rate limiter installed: {self.calls_per_minute} calls/minute, "
+            f"{self.max_concurrent} concurrent calls per tenant"
+        )
+
+
+# Create singleton instance
+xero_rate_limiter = XeroRateLimiter(
+    calls_per_minute=settings.xero_calls_per_minute,
+    max_concurrent=settings.xero_max_concurrent_calls,
+    max_wait_seconds=settings.xero_rate_limit_max_wait_seconds,
+)
+
+
+async def call_xero(func: Callable, *args, **kwargs):
+    """
+    Run a blocking Xero SDK call for a request handler in a worker thread.
+
+    The call waits at most xero_request_max_wait_seconds for rate limit
+    capacity. A tenant that is out of capacity for longer gets a 429 with
+    Retry-After instead of holding a default executor thread for minutes.
+    """
+    token = _max_wait_override.set(settings.xero_request_max_wait_seconds)
+    try:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    except XeroRateLimitError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Xero rate limit reached for this organisation, retry in {math.ceil(e.retry_after)}s",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+    finally:
+        _max_wait_override.reset(token)
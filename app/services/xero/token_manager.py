@@ -1,5 +1,6 @@
 import json
 import logging
+import threading
 import requests
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
@@ -25,6 +26,8 @@ class XeroTokenManager:
         """Initialize the token manager"""
         self._cache = {}
         self._db = None
+        # Scheduled jobs run on several executor threads and share this singleton's session
+        self._lock = threading.RLock()
 
     def _get_db(self) -> Session:
         """Get database session"""
@@ -43,89 +46,91 @@ class XeroTokenManager:
         Get the current token from cache or database.
         If user_id is None, returns the most recently updated valid token.
         """
-        try:
-            # Try cache first
-            if user_id and user_id in self._cache:
-                token_dict = self._cache[user_id]
-                if not self._is_token_expired(token_dict):
-                    logger.debug(f"Using cached token for user {user_id}")
-                    return token_dict
-
-            db = self._get_db()
-            
-            # Query for token
-            query = db.query(XeroToken)
-            if user_id:
-                query = query.filter(XeroToken.user_id == user_id)
-            token_record = query.order_by(XeroToken.expires_at.desc()).first()
-
-            if not token_record or not token_record.token_data:
-                logger.warning(f"No token found for user {user_id}")
-                return None
-
-            token_dict = json.loads(token_record.token_data)
-            
-            # Check if token is expired
-            if self._is_token_expired(token_dict):
-                # Try to refresh the token
-                new_token = self.refresh_token(token_dict)
-                if new_token:
-                    # Store the refreshed token
-                    self.store_token(new_token, str(token_record.user_id))
-                    return new_token
+        with self._lock:
+            try:
+                # Try cache first
+                if user_id and user_id in self._cache:
+                    token_dict = self._cache[user_id]
+                    if not self._is_token_expired(token_dict):
+                        logger.debug(f"Using cached token for user {user_id}")
+                        return token_dict
+
+                db = self._get_db()
+                
+                # Query for token
+                query = db.query(XeroToken)
+                if user_id:
+                    query = query.filter(XeroToken.user_id == user_id)
+                token_record = query.order_by(XeroToken.expires_at.desc()).first()
+
+                if not token_record or not token_record.token_data:
+                    logger.warning(f"No token found for user {user_id}")
+                    return None
+
+                token_dict = json.loads(token_record.token_data)
+                
+                # Check if token is expired
+                if self._is_token_expired(token_dict):
+                    # Try to refresh the token
+                    new_token = self.refresh_token(token_dict)
+                    if new_token:
+                        # Store the refreshed token
+                        self.store_token(new_token, str(token_record.user_id))
+                        return new_token
+                    return None
+
+                # Cache the valid token
+                if user_id:
+                    self._cache[user_id] = token_dict
+
+                return token_dict
+
+            except Exception as e:
+                logger.error(f"Error getting token: {str(e)}", exc_info=True)
                 return None
-
-            # Cache the valid token
-            if user_id:
-                self._cache[user_id] = token_dict
-
-            return token_dict
-
-        except Exception as e:
-            logger.error(f"Error getting token: {str(e)}", exc_info=True)
-            return None
-        finally:
-            self._close_db()
+            finally:
+                self._close_db()
 
     def store_token(self, token_data: Dict[str, Any], user_id: str) -> bool:
         """Store or update token in database and cache"""
-        try:
-            db = self._get_db()
-            
-            # Create token dictionary with expiry
-            token_dict = self._create_token_dict(token_data)
-            
-            # Calculate expires_at for database
-            expires_at = datetime.fromtimestamp(token_dict["expires_at"], tz=timezone.utc)
-            
-            # Update or create token record
-            token_record = db.query(XeroToken).filter(XeroToken.user_id == user_id).first()
-            if token_record:
-                token_record.token_data = json.dumps(token_dict)
-                token_record.expires_at = expires_at
-            else:
-                token_record = XeroToken(
-                    user_id=user_id,
-                    token_data=json.dumps(token_dict),
-                    created_at=datetime.now(timezone.utc),
-                    expires_at=expires_at
-                )
-                db.add(token_record)
-
-            db.commit()
-            
-            # Update cache
-            self._cache[user_id] = token_dict
-            
-            logger.info(f"Token stored successfully for user {user_id}")
-            return True
+        with self._lock:
+            try:
+                db = self._get_db()
+                
+                # Create token dictionary with expiry
+                token_dict = self._create_token_dict(token_data)
+                
+                # Calculate expires_at for database
+                expires_at = datetime.fromtimestamp(token_dict["expires_at"], tz=timezone.utc)
+                
+                # Update or create token record
+                token_record = db.query(XeroToken).filter(XeroToken.user_id == user_id).first()
+                if token_record:
+                    token_record.token_data = json.dumps(token_dict)
+                    token_record.expires_at = expires_at
+                else:
+                    token_record = XeroToken(
+                        user_id=user_id,
+                        token_data=json.dumps(token_dict),
+                        created_at=datetime.now(timezone.utc),
+                        expires_at=expires_at
+                    )
+                    db.add(token_record)
 
-        except Exception as e:
-            logger.error(f"Error storing token: {str(e)}", exc_info=True)
-            db.rollback()
-            return False
-        finally:
-            self._close_db()
+                db.commit()
+                
+                # Update cache
+                self._cache[user_id] = token_dict
+                
+                logger.info(f"Token stored successfully for user {user_id}")
+                return True
+
+            except Exception as e:
+                logger.error(f"Error storing token: {str(e)}", exc_info=True)
+                db.rollback()
+                return False
+            finally:
+                self._close_db()
 
     def refresh_token(self, token_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Refresh the token using the refresh token"""
@@ -159,26 +164,27 @@ class XeroTokenManager:
 
     def invalidate_token(self, user_id: str) -> bool:
         """Invalidate token for a user"""
-        try:
-            # Remove from cache
-            self._cache.pop(user_id, None)
-            
-            # Remove from database
-            db = self._get_db()
-            token_record = db.query(XeroToken).filter(XeroToken.user_id == user_id).first()
-            if token_record:
-                db.delete(token_record)
-                db.commit()
-                logger.info(f"Token invalidated for user {user_id}")
-                return True
-            
-            return False
-
-        except Exception as e:
-            logger.error(f"Error invalidating token: {str(e)}", exc_info=True)
-            return False
-        finally:
-            self._close_db()
+        with self._lock:
+            try:
+                # Remove from cache
+                self._cache.pop(user_id, None)
+                
+                # Remove from database
+                db = self._get_db()
+                token_record = db.query(XeroToken).filter(XeroToken.user_id == user_id).first()
+                if token_record:
+                    db.delete(token_record)
+                    db.commit()
+                    logger.info(f"Token invalidated for user {user_id}")
+                    return True
+                
+                return False
+
+            except Exception as e:
+                logger.error(f"Error invalidating token: {str(e)}", exc_info=True)
+                return False
+            finally:
+                self._close_db()
 
     def _create_token_dict(self, token_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a complete token dictionary including expiry time"""
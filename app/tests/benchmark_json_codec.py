@@ -0,0 +1,125 @@
+"""
+Compare JSON backends on Xero invoice payloads.
+
+Pass a file holding a real payload, e.g. the response of
+GET /api/v1/xero/invoices saved to disk, or let the script generate
+invoices shaped like Xero's:
+
+    python app/tests/benchmark_json_codec.py --file invoices.json
+    python app/tests/benchmark_json_codec.py --invoices 20000
+"""
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import json
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from app.utils import json_codec
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def make_invoices(count: int) -> dict:
+    """Build a payload shaped like serialize(accounting_api.get_invoices(...))"""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    invoices = []
+    for index in range(count):
+        issued = start + timedelta(days=random.randint(0, 365))
+        line_items = [
+            {
+                "LineItemID": str(uuid.uuid4()),
+                "Description": f"Consulting services item {line}",
+                "Quantity": Decimal(random.randint(1, 20)),
+                "UnitAmount": Decimal(f"{random.uniform(10, 500):.2f}"),
+                "TaxType": "OUTPUT",
+                "AccountCode": "200",
+                "LineAmount": Decimal(f"{random.uniform(10, 5000):.2f}"),
+            }
+            for line in range(random.randint(1, 5))
+        ]
+        invoices.append(
+            {
+                "Type": "ACCREC",
+                "InvoiceID": str(uuid.uuid4()),
+                "InvoiceNumber": f"INV-{index:06d}",
+                "Reference": f"PO-{random.randint(1000, 9999)}",
+                "Contact": {"ContactID": str(uuid.uuid4()), "Name": f"Customer {index % 500}"},
+                "Date": issued,
+                "DueDate": issued + timedelta(days=30),
+                "Status": random.choice(["AUTHORISED", "PAID", "DRAFT"]),
+                "LineAmountTypes": "Exclusive",
+                "LineItems": line_items,
+                "SubTotal": Decimal(f"{random.uniform(100, 20000):.2f}"),
+                "TotalTax": Decimal(f"{random.uniform(10, 2000):.2f}"),
+                "Total": Decimal(f"{random.uniform(110, 22000):.2f}"),
+                "CurrencyCode": "AUD",
+                "UpdatedDateUTC": issued + timedelta(hours=random.randint(1, 48)),
+            }
+        )
+    return {"Invoices": invoices, "pagination": {"page": 1, "pageCount": 1, "itemCount": count}}
+
+
+def time_call(func, payload, repeat: int) -> float:
+    """Best time of repeat calls, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(payload)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def stdlib_baseline(payload) -> bytes:
+    """What httpx and starlette do by default"""
+    return json.dumps(payload, default=str).encode("utf-8")
+
+
+def run_benchmark(payload: dict, repeat: int):
+    logger.info(f"Available backends: {', '.join(json_codec.BACKENDS)}")
+    rows = [("stdlib json (current default)", stdlib_baseline, json.loads)]
+    for name in json_codec.BACKENDS:
+        json_codec.configure(name)
+        rows.append((f"json_codec {name}", json_codec._dumps, json_codec._loads))
+
+    for name, dumps, loads in rows:
+        encoded = dumps(payload)
+        dumps_ms = time_call(dumps, payload, repeat)
+        loads_ms = time_call(loads, encoded, repeat)
+        logger.info(
+            f"{name:32} dumps {dumps_ms:8.1f} ms   loads {loads_ms:8.1f} ms   size {len(encoded):>10} bytes"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON backends on Xero invoice payloads")
+    parser.add_argument("--file", help="JSON file with a real Xero invoices payload")
+    parser.add_argument("--invoices", type=int, default=10000, help="Number of generated invoices")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement, the best is reported")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, "rb") as payload_file:
+            payload = json.load(payload_file)
+        logger.info(f"Loaded payload from {args.file}")
+    else:
+        payload = make_invoices(args.invoices)
+        logger.info(f"Generated {args.invoices} invoices")
+
+    run_benchmark(payload, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
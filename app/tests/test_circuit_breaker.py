@@ -0,0 +1,69 @@
+from app.utils.circuit_breaker import CircuitBreaker
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("brain", failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("brain", failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_opens_after_reset_timeout(clock):
+    breaker = CircuitBreaker("brain", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.advance(29)
+    assert not breaker.allow()
+
+    clock.advance(1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_half_open_success_closes(clock):
+    breaker = CircuitBreaker("brain", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.advance(30)
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.snapshot()["consecutive_failures"] == 0
+
+
+def test_half_open_failure_reopens(clock):
+    breaker = CircuitBreaker("brain", failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.advance(30)
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()["times_opened"] == 2
+
+
+def test_snapshot_reports_time_until_retry(clock):
+    breaker = CircuitBreaker("brain", failure_threshold=1, reset_timeout=30)
+    assert breaker.snapshot() == {
+        "state": "closed",
+        "consecutive_failures": 0,
+        "times_opened": 0,
+        "retry_in_seconds": 0,
+    }
+
+    breaker.record_failure()
+    clock.advance(10)
+    snapshot = breaker.snapshot()
+    assert snapshot["state"] == "open"
+    assert snapshot["retry_in_seconds"] == 20.0
@@ -0,0 +1,206 @@
+import asyncio
+import gzip
+import json
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.utils import http_client
+
+URL = "http://brain.test/v1/file/xero/process"
+PAYLOAD = {"data": [{"particulars": "x" * 100}]}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Serves make_api_request from a handler instead of the network, recording the requests"""
+    requests = []
+
+    def serve(handler):
+        def record(request):
+            requests.append(request)
+            return handler(request)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(record))
+        monkeypatch.setattr(http_client, "get_http_client", lambda: client)
+        return requests
+
+    monkeypatch.setattr(http_client, "_uncompressed_hosts", {})
+    monkeypatch.setattr(http_client, "_breakers", {})
+    monkeypatch.setattr(settings, "http_compression", "gzip")
+    monkeypatch.setattr(settings, "http_compression_min_bytes", 10)
+    monkeypatch.setattr(settings, "http_compression_retry_seconds", 600)
+    return serve
+
+
+def decoded(request):
+    body = request.content
+    if request.headers.get("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+def refuse_gzip(status_code, text):
+    def handler(request):
+        if request.headers.get("Content-Encoding"):
+            return httpx.Response(status_code, text=text)
+        return httpx.Response(200, json={"ok": True})
+
+    return handler
+
+
+def test_bodies_are_compressed_above_the_threshold(upstream, monkeypatch):
+    body, headers = asyncio.run(http_client._encode_json_body(PAYLOAD, None, "post"))
+    assert headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body)) == PAYLOAD
+
+    monkeypatch.setattr(settings, "http_compression_min_bytes", 10_000)
+    body, headers = asyncio.run(http_client._encode_json_body(PAYLOAD, None, "post"))
+    assert "Content-Encoding" not in headers
+    assert json.loads(body) == PAYLOAD
+
+
+def test_compress_argument_overrides_the_setting(upstream, monkeypatch):
+    monkeypatch.setattr(settings, "http_compression", "none")
+    _, headers = asyncio.run(http_client._encode_json_body(PAYLOAD, None, "post"))
+    assert "Content-Encoding" not in headers
+
+    _, headers = asyncio.run(http_client._encode_json_body(PAYLOAD, True, "post"))
+    assert headers["Content-Encoding"] == "gzip"
+
+
+def test_415_is_sent_again_uncompressed_until_the_retry_period_ends(upstream, clock):
+    requests = upstream(refuse_gzip(415, "Unsupported Media Type"))
+
+    assert asyncio.run(http_client.post_json(URL, PAYLOAD)) == {"ok": True}
+    assert [r.headers.get("Content-Encoding") for r in requests] == ["gzip", None]
+    assert decoded(requests[1]) == PAYLOAD
+
+    asyncio.run(http_client.post_json(URL, PAYLOAD))
+    assert requests[2].headers.get("Content-Encoding") is None
+
+    clock.advance(600)
+    asyncio.run(http_client.post_json(URL, PAYLOAD))
+    assert requests[3].headers.get("Content-Encoding") == "gzip"
+
+
+def test_400_naming_content_encoding_is_sent_again_uncompressed(upstream):
+    requests = upstream(refuse_gzip(400, "Unsupported Content-Encoding: gzip"))
+
+    assert asyncio.run(http_client.post_json(URL, PAYLOAD)) == {"ok": True}
+    assert [r.headers.get("Content-Encoding") for r in requests] == ["gzip", None]
+
+
+def test_other_400_is_not_sent_again(upstream):
+    requests = upstream(lambda request: httpx.Response(400, json={"detail": "brainId is required"}))
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(http_client.post_json(URL, PAYLOAD))
+
+    assert error.value.status_code == 400
+    assert len(requests) == 1
+    assert http_client._uncompressed_hosts == {}
+
+
+def slow_json(body):
+    async def handler(request):
+        # Long enough for the concurrent callers to find the request in flight
+        await asyncio.sleep(0.01)
+        return httpx.Response(
+            200, content=body, headers={"Content-Type": "application/json", "ETag": '"v1"', "Server": "brain"}
+        )
+
+    return handler
+
+
+def test_concurrent_pass_through_misses_share_one_request(upstream, monkeypatch):
+    from app.utils import response_cache
+
+    monkeypatch.setattr(response_cache, "brain_cache", response_cache.ResponseCache())
+    requests = upstream(slow_json(b'{"files":[1,2]}'))
+
+    async def fetch_together():
+        return await asyncio.gather(
+            *(
+                response_cache.cached_pass_through(
+                    "files", "http://brain.test/v1/files", ttl=30, params={"brainId": "b1"}
+                )
+                for _ in range(3)
+            )
+        )
+
+    responses = asyncio.run(fetch_together())
+
+    assert len(requests) == 1
+    assert {response.body for response in responses} == {b'{"files":[1,2]}'}
+    assert responses[0].headers["etag"] == '"v1"'
+    assert "server" not in responses[0].headers
+
+
+def test_pass_through_is_not_shared_with_get_json_or_other_params(upstream):
+    requests = upstream(slow_json(b'{"ok":true}'))
+
+    async def fetch_together():
+        return await asyncio.gather(
+            http_client.fetch_pass_through("http://brain.test/v1/files", params={"page": 1}),
+            http_client.fetch_pass_through("http://brain.test/v1/files", params={"page": 2}),
+            http_client.get_json("http://brain.test/v1/files", params={"page": 1}),
+        )
+
+    body, status_code, _ = asyncio.run(fetch_together())[0]
+
+    assert len(requests) == 3
+    assert (body, status_code) == (b'{"ok":true}', 200)
+
+
+def test_identical_concurrent_gets_share_one_request(upstream):
+    requests = upstream(slow_json(b'{"brains":[]}'))
+
+    async def fetch_together():
+        return await asyncio.gather(
+            *(http_client.get_json("http://brain.test/v1/brain", params={"userId": "u1"}) for _ in range(3)),
+            http_client.get_json("http://brain.test/v1/brain", params={"userId": "u2"}),
+            http_client.get_json("http://brain.test/v1/brain", params={"userId": "u1"}, coalesce=False),
+        )
+
+    results = asyncio.run(fetch_together())
+
+    assert len(requests) == 3
+    assert results == [{"brains": []}] * 5
+    # Finished requests are not reused
+    asyncio.run(fetch_together())
+    assert len(requests) == 6
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_get(upstream):
+    requests = upstream(slow_json(b'{"ok":true}'))
+
+    async def cancel_one():
+        first = asyncio.create_task(http_client.get_json("http://brain.test/v1/brain"))
+        second = asyncio.create_task(http_client.get_json("http://brain.test/v1/brain"))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(cancel_one()) == {"ok": True}
+    assert len(requests) == 1
+
+
+def test_shared_get_failure_reaches_every_waiter(upstream):
+    async def not_found(request):
+        await asyncio.sleep(0.01)
+        return httpx.Response(404, text="no such brain")
+
+    requests = upstream(not_found)
+
+    async def fetch_together():
+        return await asyncio.gather(
+            *(http_client.get_json("http://brain.test/v1/brain/b9") for _ in range(2)), return_exceptions=True
+        )
+
+    errors = asyncio.run(fetch_together())
+
+    assert len(requests) == 1
+    assert [error.status_code for error in errors] == [404, 404]
@@ -0,0 +1,132 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.config import settings
+from app.scheduled_tasks import invoice_processor
+
+START = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+
+
+class FakeXero:
+    """Invoice listing ordered by UpdatedDateUTC, paged like the Xero API"""
+
+    def __init__(self, count, same_time=False):
+        self.invoices = {
+            f"inv-{index}": START + timedelta(minutes=0 if same_time else index)
+            for index in range(count)
+        }
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.before_request = None
+
+    def edit(self, invoice_id):
+        self.invoices[invoice_id] = max(self.invoices.values()) + timedelta(minutes=1)
+
+    async def fetch_invoice_page(self, accounting_api, tenant_id, page, modified_since=None):
+        self.requests.append((modified_since, page))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0)
+            if self.before_request:
+                self.before_request(modified_since, page)
+            listing = sorted(
+                (updated, invoice_id)
+                for invoice_id, updated in self.invoices.items()
+                if modified_since is None or updated > modified_since
+            )
+            size = settings.invoice_page_size
+            rows = listing[(page - 1) * size : page * size]
+            invoices = [{"InvoiceID": invoice_id, "Updated": updated} for updated, invoice_id in rows]
+            page_count = max(1, -(-len(listing) // size))
+            return invoices, page_count, max((updated for updated, _ in rows), default=None)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def run(monkeypatch):
+    """Runs process_xero_invoices against a FakeXero, recording what reaches the brain"""
+    sent = []
+    cursors = []
+    hashes = {}
+
+    class FakeSession:
+        def close(self):
+            pass
+
+    async def post_json(url, json, **kwargs):
+        sent.append([invoice["InvoiceID"] for invoice in json["data"]])
+        return {}
+
+    monkeypatch.setattr(settings, "invoice_page_size", 2)
+    monkeypatch.setattr(settings, "invoice_fetch_concurrency", 3)
+    monkeypatch.setattr(invoice_processor, "SessionLocal", FakeSession)
+    monkeypatch.setattr(invoice_processor, "AccountingApi", lambda client: None)
+    monkeypatch.setattr(invoice_processor, "get_sync_cursor", lambda *args: None)
+    monkeypatch.setattr(
+        invoice_processor, "set_sync_cursor", lambda db, tenant, brain, kind, cursor: cursors.append(cursor)
+    )
+    def filter_changed_records(db, tenant_id, brain_id, kind, records):
+        # Stands in for the record hashes: unchanged invoices already sent are dropped
+        changed = [record for _, record in records if (record["InvoiceID"], record["Updated"]) not in hashes]
+        return changed, {(record["InvoiceID"], record["Updated"]): True for record in changed}
+
+    monkeypatch.setattr(invoice_processor, "filter_changed_records", filter_changed_records)
+    monkeypatch.setattr(
+        invoice_processor, "save_record_hashes", lambda db, tenant, brain, kind, changed: hashes.update(changed)
+    )
+    monkeypatch.setattr(invoice_processor, "invalidate_brain", lambda brain_id: None)
+    monkeypatch.setattr(invoice_processor, "post_json", post_json)
+
+    def run(xero):
+        monkeypatch.setattr(invoice_processor, "fetch_invoice_page", xero.fetch_invoice_page)
+        asyncio.run(invoice_processor.process_xero_invoices("brain-1", "tenant-a"))
+        return sent, cursors
+
+    return run
+
+
+def test_pages_of_a_query_are_fetched_together_and_sent_in_order(run):
+    xero = FakeXero(11)
+    sent, cursors = run(xero)
+
+    assert [invoice_id for batch in sent for invoice_id in batch] == [f"inv-{index}" for index in range(11)]
+    assert all(len(batch) <= 2 for batch in sent)
+    assert xero.max_in_flight > 1
+    # Every query starts again at page 1, behind the latest update read
+    assert {page for _, page in xero.requests} == {1, 2, 3}
+    assert cursors == sorted(cursors)
+    assert cursors[-1] == xero.invoices["inv-10"]
+
+
+def test_invoices_sharing_a_timestamp_are_stepped_past_by_offset(run):
+    xero = FakeXero(5, same_time=True)
+    sent, _ = run(xero)
+
+    assert {invoice_id for batch in sent for invoice_id in batch} == set(xero.invoices)
+    assert {page for _, page in xero.requests} == {1, 2, 3}
+
+
+def test_invoice_edited_between_page_requests_does_not_hide_others(run):
+    xero = FakeXero(6)
+
+    def edit_once(modified_since, page):
+        # inv-0 is edited after page 1 was read and before page 2 is, moving
+        # to the end and shifting inv-2 onto page 1
+        if page == 2 and "inv-0" not in edited:
+            edited.add("inv-0")
+            xero.edit("inv-0")
+
+    edited = set()
+    xero.before_request = edit_once
+    sent, _ = run(xero)
+
+    # Only the first page is sent, the rest is read again
+    assert sent[0] == ["inv-0", "inv-1"]
+    assert [invoice_id for batch in sent[1:] for invoice_id in batch] == [
+        "inv-2", "inv-3", "inv-4", "inv-5", "inv-0"
+    ]
@@ -0,0 +1,149 @@
+import threading
+import time
+
+import pytest
+
+from app.scheduled_tasks.job_executor import JobExecutor
+
+TIMEOUT = 5
+
+
+class Tracker:
+    """Records which jobs are running and holds each one until released"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = set()
+        self.started = []
+        self.events = {}
+
+    def job(self, name):
+        with self.lock:
+            self.running.add(name)
+            self.started.append(name)
+            event = self.events.setdefault(name, threading.Event())
+        event.wait(TIMEOUT)
+        with self.lock:
+            self.running.discard(name)
+
+    def release(self, name):
+        with self.lock:
+            self.events.setdefault(name, threading.Event()).set()
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + TIMEOUT
+        while time.monotonic() < deadline:
+            with self.lock:
+                if condition(self):
+                    return True
+            time.sleep(0.01)
+        return False
+
+
+@pytest.fixture
+def tracker():
+    return Tracker()
+
+
+@pytest.fixture
+def make_executor():
+    executors = []
+
+    def make(max_workers, type_limits=None):
+        executor = JobExecutor(max_workers, type_limits)
+        executor.start()
+        executors.append(executor)
+        return executor
+
+    yield make
+    for executor in executors:
+        executor.shutdown(wait=False)
+
+
+def test_same_tenant_never_runs_concurrently(tracker, make_executor):
+    executor = make_executor(4)
+    executor.submit("invoice", "tenant-a", tracker.job, "a-invoice")
+    executor.submit("statement", "tenant-a", tracker.job, "a-statement")
+    executor.submit("invoice", "tenant-b", tracker.job, "b-invoice")
+
+    assert tracker.wait_for(lambda t: t.running == {"a-invoice", "b-invoice"})
+    # The second job of tenant-a waits although workers are free
+    time.sleep(0.1)
+    assert "a-statement" not in tracker.started
+    assert executor.queue_depth() == 1
+
+    tracker.release("a-invoice")
+    assert tracker.wait_for(lambda t: "a-statement" in t.running)
+    tracker.release("a-statement")
+    tracker.release("b-invoice")
+    assert tracker.wait_for(lambda t: not t.running)
+
+
+def test_type_limit_caps_running_jobs_of_that_type(tracker, make_executor):
+    executor = make_executor(4, {"invoice": 1})
+    executor.submit("invoice", "tenant-a", tracker.job, "a-invoice")
+    executor.submit("invoice", "tenant-b", tracker.job, "b-invoice")
+    executor.submit("statement", "tenant-c", tracker.job, "c-statement")
+
+    assert tracker.wait_for(lambda t: t.running == {"a-invoice", "c-statement"})
+    time.sleep(0.1)
+    assert "b-invoice" not in tracker.started
+    assert executor.types_with_capacity() == []
+
+    tracker.release("a-invoice")
+    assert tracker.wait_for(lambda t: "b-invoice" in t.running)
+    tracker.release("b-invoice")
+    tracker.release("c-statement")
+    assert tracker.wait_for(lambda t: not t.running)
+    assert executor.types_with_capacity() == ["invoice"]
+
+
+def test_blocked_job_does_not_hold_up_later_jobs(tracker, make_executor):
+    executor = make_executor(2)
+    executor.submit("invoice", "tenant-a", tracker.job, "a-1")
+    assert tracker.wait_for(lambda t: "a-1" in t.running)
+    executor.submit("invoice", "tenant-a", tracker.job, "a-2")
+    executor.submit("invoice", "tenant-b", tracker.job, "b-1")
+
+    assert tracker.wait_for(lambda t: t.running == {"a-1", "b-1"})
+    for name in ("a-1", "a-2", "b-1"):
+        tracker.release(name)
+    assert tracker.wait_for(lambda t: not t.running and len(t.started) == 3)
+    assert tracker.started.index("b-1") < tracker.started.index("a-2")
+
+
+def test_failing_job_frees_its_slot(tracker, make_executor):
+    executor = make_executor(1)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    executor.submit("invoice", "tenant-a", fail)
+    executor.submit("invoice", "tenant-a", tracker.job, "a-after")
+    assert tracker.wait_for(lambda t: "a-after" in t.running)
+    tracker.release("a-after")
+    assert tracker.wait_for(lambda t: not t.running)
+    assert executor.running_count() == 0
+
+
+def test_shutdown_returns_jobs_that_never_started(tracker, make_executor):
+    executor = make_executor(1)
+    executor.submit("invoice", "tenant-a", tracker.job, "a-1")
+    assert tracker.wait_for(lambda t: "a-1" in t.running)
+    executor.submit("invoice", "tenant-b", tracker.job, "b-1")
+    executor.submit("statement", "tenant-c", tracker.job, "c-1")
+
+    dropped = executor.shutdown(wait=False)
+    tracker.release("a-1")
+
+    assert [job.args for job in dropped] == [("b-1",), ("c-1",)]
+    assert executor.queue_depth() == 0
+    # Work submitted after shutdown is ignored
+    executor.submit("invoice", "tenant-d", tracker.job, "d-1")
+    assert executor.queue_depth() == 0
+
+
+def test_idle_slots_count_queued_jobs():
+    executor = JobExecutor(3)
+    executor.submit("invoice", "tenant-a", lambda: None)
+    assert executor.idle_slots() == 2
@@ -0,0 +1,132 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.models.database.job_queue_models import JobQueueEntry
+# User, loaded by other tests, refers to these by name and every mapper is
+# configured on the first query
+from app.models.database import tenant_models  # noqa: F401
+from app.models.xero import xero_state_models  # noqa: F401
+from app.scheduled_tasks.job_queue import (
+    PRIORITY_INTERACTIVE,
+    claim_next_job,
+    enqueue_job,
+    finish_job,
+    release_jobs,
+    requeue_stale_jobs,
+)
+
+# The queue relies on Postgres locking and partial unique indexes, so these
+# tests need a scratch Postgres database, e.g.
+# TEST_DATABASE_URL=postgresql://postgres@localhost/job_queue_test
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(TEST_DATABASE_URL)
+    JobQueueEntry.__table__.drop(engine, checkfirst=True)
+    JobQueueEntry.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+    JobQueueEntry.__table__.drop(engine)
+    engine.dispose()
+
+
+def job(job_id, tenant_id="tenant-a", job_type="invoice"):
+    return SimpleNamespace(id=job_id, job_type=job_type, tenant_id=tenant_id, brain_id="brain-1")
+
+
+def entries(db):
+    return db.execute(
+        text("SELECT scheduled_job_id, status, priority, attempts, error FROM job_queue ORDER BY id")
+    ).all()
+
+
+def test_repeated_enqueues_coalesce_into_the_waiting_run(db):
+    assert enqueue_job(db, job("job-1"), delay_seconds=600) is True
+    assert enqueue_job(db, job("job-1")) is False
+
+    assert [e.scheduled_job_id for e in entries(db)] == ["job-1"]
+    # The immediate request made the delayed run available now
+    assert claim_next_job(db, ["invoice"])["scheduled_job_id"] == "job-1"
+
+    # Once the run has started, a new one can wait behind it
+    assert enqueue_job(db, job("job-1")) is True
+
+
+def test_claims_skip_busy_tenants_and_delayed_runs(db):
+    enqueue_job(db, job("job-2", tenant_id="tenant-a", job_type="statement"))
+    enqueue_job(db, job("job-1", tenant_id="tenant-a"))
+    enqueue_job(db, job("job-3", tenant_id="tenant-b"))
+    enqueue_job(db, job("job-4", tenant_id="tenant-c"), delay_seconds=600)
+
+    first = claim_next_job(db, ["invoice", "statement"])
+    assert first["scheduled_job_id"] == "job-2"
+    # tenant-a is busy and job-4 is not available yet
+    assert claim_next_job(db, ["invoice", "statement"])["scheduled_job_id"] == "job-3"
+    assert claim_next_job(db, ["invoice", "statement"]) is None
+
+    finish_job(db, first["id"])
+    assert claim_next_job(db, ["statement"]) is None
+    assert claim_next_job(db, ["invoice"])["scheduled_job_id"] == "job-1"
+
+
+def test_interactive_runs_are_claimed_first(db):
+    enqueue_job(db, job("job-1", tenant_id="tenant-a"))
+    enqueue_job(db, job("job-2", tenant_id="tenant-b"), priority=PRIORITY_INTERACTIVE)
+
+    assert claim_next_job(db, ["invoice"])["scheduled_job_id"] == "job-2"
+    assert claim_next_job(db, ["invoice"])["scheduled_job_id"] == "job-1"
+
+
+def test_waiting_background_runs_age_past_interactive_ones(db):
+    enqueue_job(db, job("job-1", tenant_id="tenant-a"))
+    enqueue_job(db, job("job-2", tenant_id="tenant-b"), priority=PRIORITY_INTERACTIVE)
+    db.execute(
+        text("UPDATE job_queue SET enqueued_at = now() - interval '20 minutes' WHERE scheduled_job_id = 'job-1'")
+    )
+    db.commit()
+
+    # Waiting 20 minutes at 5 minutes per level outranks one level of priority
+    assert claim_next_job(db, ["invoice"], aging_seconds=300)["scheduled_job_id"] == "job-1"
+
+
+def test_coalesced_interactive_request_raises_the_waiting_run(db):
+    enqueue_job(db, job("job-1"))
+    enqueue_job(db, job("job-1"), priority=PRIORITY_INTERACTIVE)
+    enqueue_job(db, job("job-1"))
+
+    assert [e.priority for e in entries(db)] == [PRIORITY_INTERACTIVE]
+
+
+def test_stale_runs_are_requeued_unless_another_run_waits(db):
+    enqueue_job(db, job("job-1", tenant_id="tenant-a"))
+    enqueue_job(db, job("job-2", tenant_id="tenant-b"))
+    claim_next_job(db, ["invoice"])
+    claim_next_job(db, ["invoice"])
+    enqueue_job(db, job("job-2", tenant_id="tenant-b"))
+    db.execute(text("UPDATE job_queue SET started_at = now() - interval '1 hour' WHERE status = 'running'"))
+    db.commit()
+
+    assert requeue_stale_jobs(db, stale_after_seconds=600) == 2
+
+    assert [(e.scheduled_job_id, e.status, e.error) for e in entries(db)] == [
+        ("job-1", "queued", None),
+        ("job-2", "done", "abandoned"),
+        ("job-2", "queued", None),
+    ]
+
+
+def test_released_claims_do_not_count_as_attempts(db):
+    enqueue_job(db, job("job-1"))
+    entry = claim_next_job(db, ["invoice"])
+
+    assert release_jobs(db, [entry["id"]]) == 1
+
+    assert [(e.status, e.attempts) for e in entries(db)] == [("queued", 0)]
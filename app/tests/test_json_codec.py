@@ -0,0 +1,78 @@
+import datetime
+import decimal
+import enum
+import uuid
+
+import pytest
+
+from app.utils import json_codec
+
+
+class Status(enum.Enum):
+    PAID = "PAID"
+
+
+@pytest.fixture(params=sorted(json_codec.BACKENDS))
+def codec(request):
+    """Run a test against every available backend, restoring the default afterwards"""
+    previous = json_codec.backend
+    json_codec.configure(request.param)
+    yield json_codec
+    json_codec.configure(previous)
+
+
+def test_round_trips_plain_json(codec):
+    payload = {"invoices": [{"id": 1, "total": 12.5, "paid": False, "note": None, "name": "Café"}]}
+    assert codec.loads(codec.dumps(payload)) == payload
+    assert codec.loads(codec.dumps(payload).decode("utf-8")) == payload
+
+
+def test_encodes_app_types(codec):
+    invoice_id = uuid.UUID("12345678-1234-5678-1234-567812345678")
+    payload = {
+        "id": invoice_id,
+        "date": datetime.date(2026, 1, 5),
+        "updated": datetime.datetime(2026, 1, 5, 9, 30, tzinfo=datetime.timezone.utc),
+        "total": decimal.Decimal("12.50"),
+        "status": Status.PAID,
+        "tags": {"xero"},
+        "raw": b"abc",
+    }
+
+    decoded = codec.loads(codec.dumps(payload))
+    assert decoded == {
+        "id": str(invoice_id),
+        "date": "2026-01-05",
+        "updated": "2026-01-05T09:30:00+00:00",
+        "total": 12.5,
+        "status": "PAID",
+        "tags": ["xero"],
+        "raw": "abc",
+    }
+
+
+def test_output_is_compact_utf8(codec):
+    assert codec.dumps({"a": [1, 2], "b": "é"}) == '{"a":[1,2],"b":"é"}'.encode("utf-8")
+
+
+def test_non_string_keys_are_allowed(codec):
+    assert codec.loads(codec.dumps({1: "one"})) == {"1": "one"}
+
+
+def test_unsupported_types_raise_type_error(codec):
+    with pytest.raises(TypeError):
+        codec.dumps({"value": object()})
+
+
+def test_invalid_json_raises_value_error(codec):
+    with pytest.raises(ValueError):
+        codec.loads(b"{not json")
+
+
+def test_unknown_backend_falls_back_to_stdlib():
+    previous = json_codec.backend
+    try:
+        assert json_codec.configure("simdjson") == "stdlib"
+        assert json_codec.backend == "stdlib"
+    finally:
+        json_codec.configure(previous)
@@ -0,0 +1,139 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.xero.rate_limiter import XeroRateLimiter, XeroRateLimitError, call_xero
+
+
+def test_calls_within_the_minute_budget_are_allowed():
+    limiter = XeroRateLimiter(calls_per_minute=2, max_concurrent=5, max_wait_seconds=0)
+    limiter.acquire("tenant-a")
+    limiter.acquire("tenant-a")
+
+    with pytest.raises(XeroRateLimitError) as error:
+        limiter.acquire("tenant-a")
+    assert error.value.tenant_id == "tenant-a"
+    assert error.value.wait_seconds > 0
+    # Each tenant has its own budget
+    limiter.acquire("tenant-b")
+    assert limiter.counters["calls"] == 3
+    assert limiter.counters["rejected"] == 1
+
+
+def test_concurrent_calls_are_capped_per_tenant():
+    limiter = XeroRateLimiter(calls_per_minute=60, max_concurrent=1, max_wait_seconds=0)
+    limiter.acquire("tenant-a")
+    with pytest.raises(XeroRateLimitError):
+        limiter.acquire("tenant-a")
+
+    limiter.release("tenant-a")
+    with limiter.limit("tenant-a"):
+        assert limiter.stats()["tenants"]["tenant-a"]["in_flight"] == 1
+    assert limiter.stats()["tenants"]["tenant-a"]["in_flight"] == 0
+
+
+def test_waits_for_a_token_when_allowed():
+    limiter = XeroRateLimiter(calls_per_minute=600, max_concurrent=5, max_wait_seconds=5)
+    for _ in range(600):
+        limiter.acquire("tenant-a")
+        limiter.release("tenant-a")
+
+    limiter.acquire("tenant-a")
+    assert limiter.counters["waits"] == 1
+
+
+def test_minute_remaining_header_lowers_the_budget():
+    limiter = XeroRateLimiter(calls_per_minute=60, max_wait_seconds=0)
+    limiter.update_from_headers("tenant-a", {"X-MinLimit-Remaining": "0", "X-DayLimit-Remaining": "4000"})
+
+    with pytest.raises(XeroRateLimitError):
+        limiter.acquire("tenant-a")
+    assert limiter.stats()["tenants"]["tenant-a"]["day_remaining"] == 4000
+
+
+def test_429_blocks_the_tenant_for_retry_after():
+    limiter = XeroRateLimiter(calls_per_minute=60, max_wait_seconds=0)
+    limiter.update_from_headers("tenant-a", {"Retry-After": "30"}, status=429)
+
+    tenant = limiter.stats()["tenants"]["tenant-a"]
+    assert 29 <= tenant["blocked_for_seconds"] <= 30
+    assert limiter.counters["throttled"] == 1
+    with pytest.raises(XeroRateLimitError):
+        limiter.acquire("tenant-a")
+
+
+def test_rejects_instead_of_waiting_on_an_event_loop():
+    limiter = XeroRateLimiter(calls_per_minute=1, max_wait_seconds=300)
+    limiter.acquire("tenant-a")
+
+    async def call():
+        limiter.acquire("tenant-a")
+
+    with pytest.raises(XeroRateLimitError):
+        asyncio.run(asyncio.wait_for(call(), timeout=5))
+
+
+def test_request_handlers_get_429_instead_of_a_long_wait():
+    limiter = XeroRateLimiter(calls_per_minute=1, max_wait_seconds=300)
+    limiter.acquire("tenant-a")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(asyncio.wait_for(call_xero(limiter.acquire, "tenant-a"), timeout=30))
+    assert error.value.status_code == 429
+    assert 55 <= int(error.value.headers["Retry-After"]) <= 60
+
+
+def test_used_up_daily_limit_holds_the_tenant():
+    limiter = XeroRateLimiter(calls_per_minute=60, max_wait_seconds=0)
+    limiter.update_from_headers("tenant-a", {"X-MinLimit-Remaining": "50", "X-DayLimit-Remaining": "0"})
+
+    assert limiter.stats()["tenants"]["tenant-a"]["blocked_for_seconds"] > 55
+    with pytest.raises(XeroRateLimitError):
+        limiter.acquire("tenant-a")
+
+
+def test_stats_can_be_limited_to_tenants():
+    limiter = XeroRateLimiter()
+    limiter.acquire("tenant-a")
+    limiter.acquire("tenant-b")
+
+    assert set(limiter.stats()["tenants"]) == {"tenant-a", "tenant-b"}
+    assert set(limiter.stats(tenant_ids=["tenant-b", "tenant-c"])["tenants"]) == {"tenant-b"}
+
+
+class FakeResponse:
+    status = 200
+
+    def getheaders(self):
+        return {"X-MinLimit-Remaining": "50"}
+
+
+class FakeApiError(Exception):
+    def __init__(self, status, headers):
+        self.status = status
+        self.headers = headers
+
+
+def test_install_retries_429_and_skips_calls_without_tenant():
+    limiter = XeroRateLimiter(calls_per_minute=6000, max_wait_seconds=5)
+    calls = []
+
+    def request(method, url, query_params=None, headers=None, **kwargs):
+        calls.append(headers)
+        if headers and len(calls) == 1:
+            raise FakeApiError(429, {"Retry-After": "0"})
+        return FakeResponse()
+
+    api_client = SimpleNamespace(rest_client=SimpleNamespace(request=request))
+    limiter.install(api_client)
+
+    response = api_client.rest_client.request("GET", "/Invoices", headers={"xero-tenant-id": "tenant-a"})
+    assert isinstance(response, FakeResponse)
+    assert len(calls) == 2
+    assert limiter.counters["throttled"] == 1
+    assert limiter.stats()["tenants"]["tenant-a"]["tokens"] <= 50
+
+    api_client.rest_client.request("GET", "/connections", headers={})
+    assert set(limiter.stats()["tenants"]) == {"tenant-a"}
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models.database.record_hash_models import BrainRecordHash
+# User, loaded by other tests, refers to these by name and every mapper is
+# configured on the first query
+from app.models.database import tenant_models  # noqa: F401
+from app.models.xero import xero_state_models  # noqa: F401
+from app.utils.database.record_hash_utils import filter_changed_records, hash_record
+
+
+@pytest.fixture
+def db():
+    # The lookup is plain SQL, so an in-memory database stands in for Postgres
+    engine = create_engine("sqlite://")
+    BrainRecordHash.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def acknowledge(db, record_key, record, tenant_id="tenant-a", brain_id="brain-1"):
+    db.add(
+        BrainRecordHash(
+            tenant_id=tenant_id,
+            brain_id=brain_id,
+            record_type="invoice",
+            record_key=record_key,
+            content_hash=hash_record(record),
+        )
+    )
+    db.commit()
+
+
+def test_hash_does_not_depend_on_key_order():
+    assert hash_record({"a": 1, "b": [1, 2]}) == hash_record({"b": [1, 2], "a": 1})
+    assert hash_record({"a": 1}) != hash_record({"a": 2})
+
+
+def test_only_new_and_changed_records_are_kept(db):
+    acknowledge(db, "inv-1", {"Total": 10})
+    acknowledge(db, "inv-2", {"Total": 20})
+
+    records = [("inv-1", {"Total": 10}), ("inv-2", {"Total": 25}), ("inv-3", {"Total": 30})]
+    changed, hashes = filter_changed_records(db, "tenant-a", "brain-1", "invoice", records)
+
+    assert changed == [{"Total": 25}, {"Total": 30}]
+    assert hashes == {"inv-2": hash_record({"Total": 25}), "inv-3": hash_record({"Total": 30})}
+
+
+def test_hashes_of_other_brains_and_types_are_ignored(db):
+    acknowledge(db, "inv-1", {"Total": 10}, brain_id="brain-2")
+    acknowledge(db, "inv-2", {"Total": 20}, tenant_id="tenant-b")
+
+    records = [("inv-1", {"Total": 10}), ("inv-2", {"Total": 20})]
+    changed, _ = filter_changed_records(db, "tenant-a", "brain-1", "invoice", records)
+    assert len(changed) == 2
+
+    changed, _ = filter_changed_records(db, "tenant-a", "brain-2", "statement", records[:1])
+    assert len(changed) == 1
+
+
+def test_integer_keys_match_the_stored_text_keys(db):
+    acknowledge(db, "42", {"payee": "Acme"})
+
+    changed, hashes = filter_changed_records(db, "tenant-a", "brain-1", "invoice", [(42, {"payee": "Acme"})])
+
+    assert (changed, hashes) == ([], {})
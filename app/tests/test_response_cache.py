@@ -0,0 +1,107 @@
+import asyncio
+
+from app.utils.response_cache import ResponseCache
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = ResponseCache()
+    cache.set("stats", {"count": 1}, ttl=60)
+    assert cache.get("stats") == (True, {"count": 1})
+
+    clock.advance(60)
+    assert cache.get("stats") == (False, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    # Reading "a" makes "b" the least recently used
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_drops_only_entries_with_the_tag(clock):
+    cache = ResponseCache()
+    cache.set("files", [], ttl=60, tags=["brain:1"])
+    cache.set("stats", {}, ttl=60, tags=["brain:1", "stats"])
+    cache.set("other", {}, ttl=60, tags=["brain:2"])
+
+    assert cache.invalidate("brain:1") == 2
+    assert cache.get("files") == (False, None)
+    assert cache.get("stats") == (False, None)
+    assert cache.get("other") == (True, {})
+
+
+def test_response_fetched_before_an_invalidation_is_not_stored(clock):
+    cache = ResponseCache()
+    version = cache.version(["brain:1"])
+    # A write to the brain lands while the read is in flight
+    cache.invalidate("brain:1")
+    cache.set("files", ["stale"], ttl=60, tags=["brain:1"], version=version)
+    assert cache.get("files") == (False, None)
+
+    # Other tags are unaffected
+    version = cache.version(["brain:2"])
+    cache.invalidate("brain:1")
+    cache.set("other", ["fresh"], ttl=60, tags=["brain:2"], version=version)
+    assert cache.get("other") == (True, ["fresh"])
+
+
+def test_clear_discards_in_flight_responses_of_every_tag(clock):
+    cache = ResponseCache()
+    cache.set("files", [], ttl=60, tags=["brain:1"])
+    version = cache.version(["brain:2"])
+    cache.clear()
+    cache.set("other", [], ttl=60, tags=["brain:2"], version=version)
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_stats_report_hit_ratio(clock):
+    cache = ResponseCache()
+    cache.set("a", 1, ttl=60)
+    cache.get("a")
+    cache.get("a")
+    cache.get("missing")
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.667
+
+
+def test_file_details_are_dropped_with_their_brain_only(clock, monkeypatch):
+    from app.routes.brain import files, transactions
+    from app.utils import response_cache
+
+    monkeypatch.setattr(response_cache, "brain_cache", ResponseCache())
+    fetched = []
+
+    async def fetch_pass_through(url, params=None, **kwargs):
+        fetched.append(url)
+        return b"{}", 200, {}
+
+    async def post_json(url, json, **kwargs):
+        return {"message": "success"}
+
+    monkeypatch.setattr(response_cache, "fetch_pass_through", fetch_pass_through)
+    monkeypatch.setattr(transactions, "post_json", post_json)
+
+    async def scenario():
+        await files.get_file("file-1", brain_id="brain-1")
+        await files.get_file("file-2", brain_id="brain-2")
+        await transactions.verify_reconciliation([], brain_id="brain-1")
+        await files.get_file("file-1", brain_id="brain-1")
+        await files.get_file("file-2", brain_id="brain-2")
+
+    asyncio.run(scenario())
+
+    # Only brain-1's entry was dropped and fetched again
+    assert [url.rsplit("/", 1)[-1] for url in fetched] == ["file-1", "file-2", "file-1"]
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.scheduled_tasks import statement_processor
+
+T0 = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+
+
+def row(row_id, minute):
+    return SimpleNamespace(
+        id=row_id,
+        updated_at=T0 + timedelta(minutes=minute),
+        client_name="Client",
+        account_name="Account",
+        transaction_date=None,
+        payee="Payee",
+        particulars=f"row {row_id}",
+        received=1,
+        file_name="statement.csv",
+    )
+
+
+@pytest.fixture
+def run(monkeypatch):
+    """Runs process_bank_statements over the given rows, recording what reaches the brain"""
+    calls = {"sent": [], "cursors": [], "stream": None}
+
+    class FakeSession:
+        def __init__(self, bind=None):
+            pass
+
+        def get_bind(self):
+            return None
+
+        def close(self):
+            pass
+
+    async def post_json(url, json, **kwargs):
+        calls["sent"].append([statement["particulars"] for statement in json["data"]])
+        return {}
+
+    def run(rows, position, unchanged=()):
+        def stream_statements(db, tenant_id, chunk_size, since=None, since_id=None):
+            calls["stream"] = (since, since_id)
+            selected = [
+                r for r in rows if since is None or (r.updated_at, r.id) > (since, since_id or 0)
+            ]
+            return iter([selected[i : i + chunk_size] for i in range(0, len(selected), chunk_size)])
+
+        def changed_statements(db, tenant_id, brain_id, chunk):
+            return [
+                statement_processor._statement_to_dict(r) for r in chunk if r.id not in unchanged
+            ], {}
+
+        monkeypatch.setattr(statement_processor, "stream_statements", stream_statements)
+        monkeypatch.setattr(statement_processor, "_changed_statements", changed_statements)
+        monkeypatch.setattr(statement_processor, "get_sync_position", lambda *args: position)
+        asyncio.run(statement_processor.process_bank_statements("brain-1", "tenant-a", FakeSession()))
+        return calls
+
+    monkeypatch.setattr(settings, "statement_chunk_size", 2)
+    monkeypatch.setattr(settings, "statement_sync_overlap_seconds", 300)
+    monkeypatch.setattr(statement_processor, "Session", FakeSession)
+    monkeypatch.setattr(statement_processor, "post_json", post_json)
+    monkeypatch.setattr(statement_processor, "save_record_hashes", lambda *args: None)
+    monkeypatch.setattr(statement_processor, "invalidate_brain", lambda brain_id: None)
+    monkeypatch.setattr(
+        statement_processor,
+        "set_sync_cursor",
+        lambda db, tenant, brain, kind, cursor, cursor_id: calls["cursors"].append((cursor, cursor_id)),
+    )
+    return run
+
+
+def test_first_run_sends_everything_and_advances_per_chunk(run):
+    rows = [row(1, 0), row(2, 1), row(3, 2)]
+    calls = run(rows, (None, None))
+
+    assert calls["stream"] == (None, None)
+    assert calls["sent"] == [["row 1", "row 2"], ["row 3"]]
+    assert calls["cursors"] == [(rows[1].updated_at, 2), (rows[2].updated_at, 3)]
+
+
+def test_overlap_window_is_read_again_without_moving_the_cursor_back(run):
+    # Rows 3, 4 and 5 were sent by the last run, which stopped at row 5.
+    # Row 7 was committed late with an older timestamp than row 5.
+    rows = [row(3, 9), row(4, 9), row(7, 9), row(5, 10), row(6, 11)]
+    calls = run(rows, (rows[3].updated_at, 5), unchanged={3, 4, 5})
+
+    assert calls["stream"] == (rows[3].updated_at - timedelta(seconds=300), None)
+    assert calls["sent"] == [["row 7"], ["row 6"]]
+    assert calls["cursors"] == [(rows[4].updated_at, 6)]
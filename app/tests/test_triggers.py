@@ -0,0 +1,45 @@
+import pickle
+from datetime import datetime, timezone
+
+from apscheduler.triggers.cron import CronTrigger
+
+from app.scheduled_tasks.triggers import StaggeredCronTrigger, schedule_interval_seconds, slot_offset_seconds
+
+
+def utc(hour, minute=0, second=0):
+    return datetime(2026, 1, 5, hour, minute, second, tzinfo=timezone.utc)
+
+
+def test_slot_offset_is_stable_and_within_the_window():
+    offsets = {slot_offset_seconds(f"tenant-{index}:invoice", 3600) for index in range(200)}
+
+    assert all(0 <= offset < 3600 for offset in offsets)
+    # Tenants are spread over the window rather than sharing a slot
+    assert len(offsets) > 150
+    assert slot_offset_seconds("tenant-1:invoice", 3600) == slot_offset_seconds("tenant-1:invoice", 3600)
+    assert slot_offset_seconds("tenant-1:invoice", 0.5) == 0
+
+
+def test_schedule_interval_is_the_gap_between_fire_times():
+    trigger = CronTrigger(hour="*/2", minute=0, second=0, timezone="UTC")
+    assert schedule_interval_seconds(trigger, now=utc(0, 30)) == 7200
+
+    trigger = CronTrigger(minute="*/15", second=0, timezone="UTC")
+    assert schedule_interval_seconds(trigger, now=utc(0, 1)) == 900
+
+
+def test_staggered_trigger_fires_offset_from_the_cron_schedule():
+    trigger = StaggeredCronTrigger(offset_seconds=300, hour="*/2", minute=0, second=0, timezone="UTC")
+
+    assert trigger.get_next_fire_time(None, utc(0, 30)) == utc(2, 5)
+    # Still due in the current slot after the unshifted time has passed
+    assert trigger.get_next_fire_time(None, utc(2, 3)) == utc(2, 5)
+    assert trigger.get_next_fire_time(utc(2, 5), utc(2, 5, 1)) == utc(4, 5)
+
+
+def test_staggered_trigger_keeps_its_offset_when_pickled():
+    trigger = StaggeredCronTrigger(offset_seconds=90, hour="*/2", minute=0, second=0, timezone="UTC")
+    restored = pickle.loads(pickle.dumps(trigger))
+
+    assert restored.offset == trigger.offset
+    assert restored.get_next_fire_time(None, utc(0, 30)) == utc(2, 1, 30)
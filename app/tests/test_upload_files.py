@@ -0,0 +1,74 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.routes.brain import files
+
+
+@pytest.fixture
+def brain(monkeypatch):
+    """Stands in for the brain API and the upload table, recording the calls made"""
+    calls = []
+    uploaded = {}
+
+    async def get_json(url, params=None, **kwargs):
+        calls.append("signed url")
+        return {"url": "http://storage.test/upload", "uploadId": f"upload-{len(calls)}"}
+
+    async def make_api_request(method, url, content=None, **kwargs):
+        calls.append("put")
+        return b"", 200
+
+    async def post_json(url, json, **kwargs):
+        calls.append("process")
+        return {"data": {"fileId": f"file-{len(uploaded) + 1}"}}
+
+    def save_uploaded_document(db, brain_id, content_hash, file_id, filename, document_type, size):
+        uploaded[(brain_id, document_type, content_hash)] = file_id
+
+    monkeypatch.setattr(files, "get_json", get_json)
+    monkeypatch.setattr(files, "make_api_request", make_api_request)
+    monkeypatch.setattr(files, "post_json", post_json)
+    monkeypatch.setattr(files, "invalidate_brain", lambda brain_id: None)
+    monkeypatch.setattr(
+        files,
+        "get_uploaded_file_id",
+        lambda db, brain_id, document_type, content_hash: uploaded.get((brain_id, document_type, content_hash)),
+    )
+    monkeypatch.setattr(files, "save_uploaded_document", save_uploaded_document)
+    return calls
+
+
+def upload(content, document_type="invoice", force=False):
+    file = UploadFile(io.BytesIO(content), filename="invoice.pdf")
+    return asyncio.run(files._upload_document(None, file, "brain-1", document_type, force))
+
+
+def test_duplicate_is_found_before_a_signed_url_is_requested(brain):
+    first = upload(b"%PDF-1 invoice")
+    brain.clear()
+    second = upload(b"%PDF-1 invoice")
+
+    assert first["duplicate"] is False
+    assert second == {"file_id": first["file_id"], "duplicate": True, "details": None}
+    assert brain == []
+
+
+def test_same_content_as_another_document_type_is_uploaded(brain):
+    upload(b"%PDF-1 invoice", document_type="invoice")
+    brain.clear()
+    result = upload(b"%PDF-1 invoice", document_type="bill")
+
+    assert result["duplicate"] is False
+    assert brain == ["signed url", "put", "process"]
+
+
+def test_force_uploads_known_content_again(brain):
+    upload(b"%PDF-1 invoice")
+    brain.clear()
+    result = upload(b"%PDF-1 invoice", force=True)
+
+    assert result["duplicate"] is False
+    assert brain == ["signed url", "put", "process"]
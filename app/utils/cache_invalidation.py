@@ -0,0 +1,120 @@
+import json
+import logging
+import queue
+import select
+import threading
+import uuid
+from typing import Callable, Optional
+
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class CacheInvalidationBus:
+    """
+    Shares cache invalidations between worker processes over Postgres NOTIFY/LISTEN.
+
+    publish() only queues the tag, so callers on an event loop never wait on
+    the database; a background thread holding a dedicated connection sends
+    the queued tags and applies the ones other workers sent. Notifications
+    sent while the connection is down are lost, so on every (re)connect the
+    local cache is cleared instead.
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        on_invalidate: Callable[[Optional[str]], None],
+        poll_seconds: float = 1.0,
+        retry_seconds: float = 5.0,
+    ):
+        self.channel = channel
+        self.on_invalidate = on_invalidate
+        self.poll_seconds = poll_seconds
+        self.retry_seconds = retry_seconds
+        self.source_id = str(uuid.uuid4())
+        self._engine: Optional[Engine] = None
+        self._outgoing: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._connection = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self, engine: Engine):
+        if self._thread:
+            return
+        self._engine = engine
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stopped.set()
+        thread, self._thread = self._thread, None
+        if thread:
+            thread.join(timeout)
+
+    def publish(self, tag: Optional[str]):
+        """Tell the other workers to drop entries carrying tag; None drops everything"""
+        if self._thread:
+            self._outgoing.put(tag)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self._connection is None:
+                    self._connect()
+                self._send_pending()
+                self._receive()
+            except Exception as e:
+                logger.error(f"Cache invalidation listener error: {str(e)}")
+                self._disconnect()
+                self._stopped.wait(self.retry_seconds)
+        self._disconnect()
+
+    def _connect(self):
+        connection = self._engine.raw_connection()
+        driver_connection = connection.driver_connection
+        driver_connection.autocommit = True
+        with driver_connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        self._connection = connection
+        # Invalidations from other workers may have been missed while not listening
+        self.on_invalidate(None)
+        logger.info(f"Listening for cache invalidations on {self.channel}")
+
+    def _disconnect(self):
+        if self._connection is not None:
+            try:
+                self._connection.invalidate()
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def _send_pending(self):
+        driver_connection = self._connection.driver_connection
+        while True:
+            try:
+                tag = self._outgoing.get_nowait()
+            except queue.Empty:
+                return
+            payload = json.dumps({"source": self.source_id, "tag": tag})
+            with driver_connection.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+
+    def _receive(self):
+        driver_connection = self._connection.driver_connection
+        if select.select([driver_connection], [], [], self.poll_seconds) == ([], [], []):
+            return
+        driver_connection.poll()
+        while driver_connection.notifies:
+            notify = driver_connection.notifies.pop(0)
+            try:
+                message = json.loads(notify.payload)
+            except ValueError:
+                logger.warning(f"Ignoring malformed cache invalidation: {notify.payload}")
+                continue
+            if message.get("source") == self.source_id:
+                continue
+            self.on_invalidate(message.get("tag"))
@@ -0,0 +1,83 @@
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for a single upstream host.
+
+    After failure_threshold consecutive failures the breaker opens and calls
+    fail fast for reset_timeout seconds. It then half-opens and lets calls
+    through again: the first success closes it, the first failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._times_opened = 0
+        # Used from the app's event loop and the scheduled job loop
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            logger.info(f"Circuit breaker for {self.name} half-open, letting calls through")
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted"""
+        with self._lock:
+            return self._current_state() != self.OPEN
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit breaker for {self.name} closed")
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or (
+                state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._times_opened += 1
+                logger.warning(
+                    f"Circuit breaker for {self.name} opened after {self._failures} failures, "
+                    f"failing fast for {self.reset_timeout}s"
+                )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "times_opened": self._times_opened,
+                "retry_in_seconds": round(
+                    max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1
+                )
+                if state == self.OPEN
+                else 0,
+            }
@@ -0,0 +1,212 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.database.job_run_models import JobRun
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobRunStats:
+    """Counters a processor fills in while a job run is in progress"""
+
+    records_sent: int = 0
+    batches_sent: int = 0
+    bytes_posted: int = 0
+    timed_out: bool = False
+    error: Optional[str] = None
+
+    def add_batch(self, records: int):
+        self.records_sent += records
+        self.batches_sent += 1
+
+    def add_bytes(self, num_bytes: int):
+        self.bytes_posted += num_bytes
+
+    @property
+    def status(self) -> str:
+        if self.timed_out:
+            return "timeout"
+        if self.error:
+            return "failed"
+        return "success"
+
+
+def start_job_run(
+    db: Session,
+    job_type: str,
+    tenant_id: str,
+    brain_id: str,
+    scheduled_job_id: Optional[str] = None,
+) -> Optional[int]:
+    """
+    Record the start of a job run.
+
+    Returns the run id, or None if the run could not be recorded; a failure
+    to write history never stops the job itself.
+    """
+    try:
+        run = JobRun(
+            scheduled_job_id=scheduled_job_id,
+            job_type=job_type,
+            tenant_id=tenant_id,
+            brain_id=brain_id,
+        )
+        db.add(run)
+        db.commit()
+        return run.id
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error recording start of {job_type} run for tenant {tenant_id}: {str(e)}")
+        return None
+
+
+def finish_job_run(db: Session, run_id: Optional[int], stats: JobRunStats):
+    """Record the outcome and metrics of a job run"""
+    if run_id is None:
+        return
+    try:
+        db.execute(
+            text(
+                """
+                UPDATE job_runs
+                SET status = :status,
+                    finished_at = now(),
+                    duration_seconds = EXTRACT(EPOCH FROM now() - started_at),
+                    records_sent = :records_sent,
+                    batches_sent = :batches_sent,
+                    bytes_posted = :bytes_posted,
+                    timed_out = :timed_out,
+                    error = :error
+                WHERE id = :id
+                """
+            ),
+            {
+                "id": run_id,
+                "status": stats.status,
+                "records_sent": stats.records_sent,
+                "batches_sent": stats.batches_sent,
+                "bytes_posted": stats.bytes_posted,
+                "timed_out": stats.timed_out,
+                "error": stats.error,
+            },
+        )
+        db.commit()
+        logger.info(
+            f"Job run {run_id} finished with status {stats.status}: {stats.records_sent} records "
+            f"in {stats.batches_sent} batches, {stats.bytes_posted} bytes posted"
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error recording end of job run {run_id}: {str(e)}")
+
+
+def get_recent_job_runs(
+    db: Session,
+    tenant_id: Optional[str] = None,
+    job_type: Optional[str] = None,
+    limit: int = 50,
+    tenant_ids: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Most recent job runs, newest first, optionally for one tenant and job type.
+
+    tenant_ids restricts the runs to those tenants, e.g. the caller's.
+    """
+    query = db.query(JobRun)
+    if tenant_ids is not None:
+        query = query.filter(JobRun.tenant_id.in_(tenant_ids))
+    if tenant_id:
+        query = query.filter(JobRun.tenant_id == tenant_id)
+    if job_type:
+        query = query.filter(JobRun.job_type == job_type)
+    runs = query.order_by(JobRun.started_at.desc()).limit(limit).all()
+    return [
+        {
+            "id": run.id,
+            "scheduled_job_id": run.scheduled_job_id,
+            "job_type": run.job_type,
+            "tenant_id": run.tenant_id,
+            "brain_id": run.brain_id,
+            "status": run.status,
+            "started_at": run.started_at,
+            "finished_at": run.finished_at,
+            "duration_seconds": run.duration_seconds,
+            "records_sent": run.records_sent,
+            "batches_sent": run.batches_sent,
+            "bytes_posted": run.bytes_posted,
+            "timed_out": run.timed_out,
+            "error": run.error,
+        }
+        for run in runs
+    ]
+
+
+def get_job_run_duration_stats(
+    db: Session,
+    since_hours: int = 24,
+    tenant_id: Optional[str] = None,
+    job_type: Optional[str] = None,
+    tenant_ids: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Duration percentiles and totals of finished runs per tenant and job type.
+
+    Slowest tenants (by p95 duration) come first. tenant_ids restricts the
+    stats to those tenants, e.g. the caller's.
+    """
+    if tenant_ids is not None and not tenant_ids:
+        return []
+    rows = db.execute(
+        text(
+            """
+            SELECT
+                tenant_id,
+                job_type,
+                COUNT(*) AS runs,
+                COUNT(*) FILTER (WHERE status = 'failed') AS failed,
+                COUNT(*) FILTER (WHERE timed_out) AS timed_out,
+                percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_seconds) AS p50_seconds,
+                percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_seconds) AS p95_seconds,
+                MAX(duration_seconds) AS max_seconds,
+                SUM(records_sent) AS records_sent,
+                SUM(bytes_posted) AS bytes_posted,
+                MAX(started_at) AS last_started_at
+            FROM job_runs
+            WHERE finished_at IS NOT NULL
+              AND started_at >= now() - make_interval(hours => :since_hours)
+              AND (CAST(:tenant_id AS text) IS NULL OR tenant_id = :tenant_id)
+              AND (CAST(:job_type AS text) IS NULL OR job_type = :job_type)
+              AND (CAST(:tenant_ids AS text[]) IS NULL OR tenant_id = ANY(CAST(:tenant_ids AS text[])))
+            GROUP BY tenant_id, job_type
+            ORDER BY p95_seconds DESC NULLS LAST
+            """
+        ),
+        {
+            "since_hours": since_hours,
+            "tenant_id": tenant_id,
+            "job_type": job_type,
+            "tenant_ids": list(tenant_ids) if tenant_ids is not None else None,
+        },
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+def get_last_successful_runs(db: Session) -> Dict[Tuple[str, str], datetime]:
+    """Finish time of the latest successful run per (tenant_id, job_type)"""
+    rows = db.execute(
+        text(
+            """
+            SELECT tenant_id, job_type, MAX(finished_at) AS finished_at
+            FROM job_runs
+            WHERE status = 'success'
+            GROUP BY tenant_id, job_type
+            """
+        )
+    )
+    return {(row.tenant_id, row.job_type): row.finished_at for row in rows}
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.models.database.record_hash_models import BrainRecordHash
+
+logger = logging.getLogger(__name__)
+
+
+def hash_record(record: Dict[str, Any]) -> str:
+    """Stable SHA-256 of a serialized record, independent of key order."""
+    encoded = json.dumps(record, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def filter_changed_records(
+    db: Session,
+    tenant_id: str,
+    brain_id: str,
+    record_type: str,
+    keyed_records: List[Tuple[str, Dict[str, Any]]],
+) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Drop records whose content the brain has already acknowledged.
+
+    Args:
+        keyed_records: (record key, serialized record) pairs
+
+    Returns:
+        The new or changed records, and their key to hash mapping to save
+        with save_record_hashes once the brain has acknowledged them
+    """
+    if not keyed_records:
+        return [], {}
+    hashes = {str(key): hash_record(record) for key, record in keyed_records}
+    known = dict(
+        db.query(BrainRecordHash.record_key, BrainRecordHash.content_hash)
+        .filter(
+            BrainRecordHash.tenant_id == tenant_id,
+            BrainRecordHash.brain_id == brain_id,
+            BrainRecordHash.record_type == record_type,
+            BrainRecordHash.record_key.in_(list(hashes)),
+        )
+        .all()
+    )
+
+    changed_records = []
+    changed_hashes = {}
+    for key, record in keyed_records:
+        key = str(key)
+        if known.get(key) != hashes[key]:
+            changed_records.append(record)
+            changed_hashes[key] = hashes[key]
+
+    skipped = len(keyed_records) - len(changed_records)
+    if skipped:
+        logger.info(f"Skipping {skipped} unchanged {record_type} records for tenant {tenant_id}")
+    return changed_records, changed_hashes
+
+
+def save_record_hashes(
+    db: Session, tenant_id: str, brain_id: str, record_type: str, hashes: Dict[str, str]
+) -> None:
+    """Record the hashes of records the brain has acknowledged."""
+    if not hashes:
+        return
+    statement = insert(BrainRecordHash).values(
+        [
+            {
+                "tenant_id": tenant_id,
+                "brain_id": brain_id,
+                "record_type": record_type,
+                "record_key": key,
+                "content_hash": content_hash,
+            }
+            for key, content_hash in hashes.items()
+        ]
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["tenant_id", "brain_id", "record_type", "record_key"],
+        set_={"content_hash": statement.excluded.content_hash, "updated_at": func.now()},
+    )
+    db.execute(statement)
+    db.commit()
+
+
+def clear_record_hashes(db: Session, tenant_id: str, brain_id: str, record_type: str) -> None:
+    """Forget what was sent so the next run pushes every record again."""
+    deleted = (
+        db.query(BrainRecordHash)
+        .filter(
+            BrainRecordHash.tenant_id == tenant_id,
+            BrainRecordHash.brain_id == brain_id,
+            BrainRecordHash.record_type == record_type,
+        )
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    logger.info(f"Cleared {deleted} {record_type} record hashes for tenant {tenant_id}")
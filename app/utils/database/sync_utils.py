@@ -0,0 +1,75 @@
+import logging
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.database.scheduled_jobs_models import ScheduledJob
+
+logger = logging.getLogger(__name__)
+
+
+def _get_active_job(
+    db: Session, tenant_id: str, brain_id: str, job_type: str
+) -> Optional[ScheduledJob]:
+    return (
+        db.query(ScheduledJob)
+        .filter(
+            ScheduledJob.tenant_id == tenant_id,
+            ScheduledJob.brain_id == brain_id,
+            ScheduledJob.job_type == job_type,
+            ScheduledJob.is_active == True,
+        )
+        .order_by(ScheduledJob.created_at.desc())
+        .first()
+    )
+
+
+def get_sync_cursor(
+    db: Session, tenant_id: str, brain_id: str, job_type: str
+) -> Optional[datetime]:
+    """
+    Get the high-water mark of the last successful push for a tenant's job.
+
+    Returns None when the job has never completed a push, meaning the next
+    run should send everything.
+    """
+    job = _get_active_job(db, tenant_id, brain_id, job_type)
+    return job.sync_cursor if job else None
+
+
+def get_sync_position(
+    db: Session, tenant_id: str, brain_id: str, job_type: str
+) -> Tuple[Optional[datetime], Optional[int]]:
+    """
+    Get the (timestamp, id) high-water mark of the last successful push.
+
+    Used for keyset reads where several rows can share a timestamp.
+    """
+    job = _get_active_job(db, tenant_id, brain_id, job_type)
+    if not job:
+        return None, None
+    return job.sync_cursor, job.sync_cursor_id
+
+
+def set_sync_cursor(
+    db: Session,
+    tenant_id: str,
+    brain_id: str,
+    job_type: str,
+    cursor: Optional[datetime],
+    cursor_id: Optional[int] = None,
+) -> None:
+    """Persist the high-water mark after the brain has acknowledged a push."""
+    job = _get_active_job(db, tenant_id, brain_id, job_type)
+    if not job:
+        logger.warning(
+            f"No active {job_type} job for tenant {tenant_id}, sync cursor not saved"
+        )
+        return
+    if cursor is not None and cursor.tzinfo is None:
+        cursor = cursor.replace(tzinfo=timezone.utc)
+    job.sync_cursor = cursor
+    job.sync_cursor_id = cursor_id
+    db.commit()
+    logger.info(f"Saved {job_type} sync cursor {cursor} ({cursor_id}) for tenant {tenant_id}")
@@ -0,0 +1,125 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.models.database.upload_models import BrainUploadedDocument, BulkUpload
+
+logger = logging.getLogger(__name__)
+
+# Finished bulk uploads can be looked up for this long
+BULK_UPLOAD_RETENTION = timedelta(days=7)
+
+
+def get_uploaded_file_id(db: Session, brain_id: str, document_type: str, content_hash: str) -> Optional[str]:
+    """File ID the brain gave an earlier upload of the same content as the same document type, if any."""
+    return (
+        db.query(BrainUploadedDocument.file_id)
+        .filter(
+            BrainUploadedDocument.brain_id == brain_id,
+            BrainUploadedDocument.document_type == document_type,
+            BrainUploadedDocument.content_hash == content_hash,
+        )
+        .scalar()
+    )
+
+
+def save_uploaded_document(
+    db: Session,
+    brain_id: str,
+    content_hash: str,
+    file_id: str,
+    filename: Optional[str],
+    document_type: str,
+    size_bytes: int,
+) -> None:
+    """Record an upload the brain has accepted, replacing an older one of the same content and type."""
+    values = {
+        "brain_id": brain_id,
+        "content_hash": content_hash,
+        "file_id": file_id,
+        "filename": filename,
+        "document_type": document_type,
+        "size_bytes": size_bytes,
+    }
+    statement = insert(BrainUploadedDocument).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=["brain_id", "document_type", "content_hash"],
+        set_={
+            "file_id": statement.excluded.file_id,
+            "filename": statement.excluded.filename,
+            "size_bytes": statement.excluded.size_bytes,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(statement)
+    db.commit()
+
+
+
+def start_bulk_upload(db: Session, batch_id: str, brain_id: str, total: int) -> None:
+    """Record the start of a bulk upload, restarting the counters if the batch ID is reused."""
+    values = {"batch_id": batch_id, "brain_id": brain_id, "total": total, "succeeded": 0, "failed": 0}
+    statement = insert(BulkUpload).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=["batch_id"],
+        set_={
+            "brain_id": statement.excluded.brain_id,
+            "total": statement.excluded.total,
+            "succeeded": 0,
+            "failed": 0,
+            "started_at": func.now(),
+            "finished_at": None,
+        },
+    )
+    db.execute(statement)
+    db.query(BulkUpload).filter(
+        BulkUpload.started_at < datetime.now(timezone.utc) - BULK_UPLOAD_RETENTION
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def record_bulk_upload_result(db: Session, batch_id: str, ok: bool) -> Dict[str, int]:
+    """Count one finished file of a bulk upload, returns the updated counters."""
+    column = BulkUpload.succeeded if ok else BulkUpload.failed
+    # Incremented in SQL so files finishing together do not overwrite each other
+    db.query(BulkUpload).filter(BulkUpload.batch_id == batch_id).update(
+        {column: column + 1}, synchronize_session=False
+    )
+    db.commit()
+    succeeded, failed, total = (
+        db.query(BulkUpload.succeeded, BulkUpload.failed, BulkUpload.total)
+        .filter(BulkUpload.batch_id == batch_id)
+        .one()
+    )
+    return {"completed": succeeded + failed, "total": total}
+
+
+def finish_bulk_upload(db: Session, batch_id: str) -> None:
+    db.query(BulkUpload).filter(BulkUpload.batch_id == batch_id).update(
+        {BulkUpload.finished_at: func.now()}, synchronize_session=False
+    )
+    db.commit()
+
+
+def get_bulk_upload_progress(db: Session, batch_id: str) -> Optional[Dict[str, Any]]:
+    """Progress of a bulk upload from any worker, or None if it is unknown or expired."""
+    upload = db.query(BulkUpload).filter(BulkUpload.batch_id == batch_id).first()
+    if upload is None:
+        return None
+    end = upload.finished_at or datetime.now(timezone.utc)
+    return {
+        "batch_id": upload.batch_id,
+        "brain_id": upload.brain_id,
+        "status": "completed" if upload.finished_at else "in_progress",
+        "total": upload.total,
+        "completed": upload.succeeded + upload.failed,
+        "succeeded": upload.succeeded,
+        "failed": upload.failed,
+        "started_at": upload.started_at.isoformat(),
+        "finished_at": upload.finished_at.isoformat() if upload.finished_at else None,
+        "duration_seconds": round((end - upload.started_at).total_seconds(), 3),
+    }
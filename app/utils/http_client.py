@@ -1,16 +1,133 @@
+import asyncio
+import gzip
 import logging
+import random
+import threading
+import time
+import weakref
 import httpx
-from typing import Dict, Any, Optional, Tuple
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, Optional, Tuple, Union
 
 from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
 from app.config import settings
+from app.utils import json_codec
+from app.utils.circuit_breaker import CircuitBreaker
 
 logger = logging.getLogger(__name__)
 
 # Create a shared client configuration
 CLIENT_TIMEOUT = 180.0  # seconds
-CLIENT_LIMITS = httpx.Limits(max_keepalive_connections=5, max_connections=10)
+CLIENT_LIMITS = httpx.Limits(
+    max_keepalive_connections=settings.http_max_keepalive_connections,
+    max_connections=settings.http_max_connections,
+    keepalive_expiry=settings.http_keepalive_expiry_seconds,
+)
+
+# One pooled client per event loop: the app's loop and the scheduled job loop.
+# httpx clients are bound to the loop their connections were opened on.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+# Methods that are safe to send again after a failure
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Responses worth retrying: rate limited or upstream temporarily unavailable
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Upstream headers kept on pass-through responses
+PASS_THROUGH_HEADERS = {"content-type", "content-disposition", "cache-control", "etag", "last-modified"}
+
+# Circuit breakers per upstream host, shared by every event loop
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+_metrics = {"requests": 0, "retries": 0, "failures": 0, "short_circuited": 0}
+
+# GETs currently in flight per event loop, so identical concurrent GETs share one request
+_inflight_gets: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Any, asyncio.Task]]" = weakref.WeakKeyDictionary()
+# Only these get_json options are part of the coalescing key; calls with others are not coalesced
+_COALESCE_OPTIONS = {"headers", "use_brain_headers", "timeout", "parse_json"}
+_coalesce_metrics = {"upstream_gets": 0, "coalesced_gets": 0}
+
+# Hosts that rejected a compressed body, with the monotonic time until which
+# bodies to them are sent uncompressed
+_uncompressed_hosts: Dict[str, float] = {}
+
+
+def _http2_available() -> bool:
+    if not settings.http2_enabled:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP/2 is enabled but the h2 package is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the pooled client for the running event loop, creating it if needed"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        http2 = _http2_available()
+        client = httpx.AsyncClient(timeout=CLIENT_TIMEOUT, limits=CLIENT_LIMITS, http2=http2)
+        _clients[loop] = client
+        logger.info(
+            f"Created pooled HTTP client (max connections: {settings.http_max_connections}, "
+            f"keep-alive: {settings.http_max_keepalive_connections}, http2: {http2})"
+        )
+    return client
+
+
+async def open_http_client() -> httpx.AsyncClient:
+    """Create the pooled client for the running event loop, e.g. on app startup"""
+    return get_http_client()
+
+
+async def close_http_client():
+    """Close the pooled client for the running event loop, e.g. on app shutdown"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.info("Closed pooled HTTP client")
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    """Get the circuit breaker for an upstream host"""
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                host,
+                failure_threshold=settings.http_breaker_failure_threshold,
+                reset_timeout=settings.http_breaker_reset_seconds,
+            )
+            _breakers[host] = breaker
+        return breaker
+
+
+def get_http_client_metrics() -> Dict[str, Any]:
+    """Request counters and circuit breaker state per upstream host"""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {
+        **_metrics,
+        **_coalesce_metrics,
+        "circuit_breakers": {host: breaker.snapshot() for host, breaker in breakers.items()},
+    }
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Exponential backoff with full jitter, or the server's Retry-After if it sent one"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), settings.http_backoff_max_seconds)
+    ceiling = min(settings.http_backoff_max_seconds, settings.http_backoff_base_seconds * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
 
 async def make_api_request(
     method: str, 
@@ -18,15 +135,25 @@ async def make_api_request(
     params: Optional[Dict[str, Any]] = None,
     json: Optional[Dict[str, Any]] = None,
     data: Optional[Any] = None,
-    content: Optional[bytes] = None,
+    content: Optional[Union[bytes, Callable[[], AsyncIterator[bytes]]]] = None,
     headers: Optional[Dict[str, str]] = None,
     use_brain_headers: bool = True,
     timeout: float = CLIENT_TIMEOUT,
     log_message: str = "API request",
-    parse_json: bool = True
+    parse_json: bool = True,
+    on_request_sent: Optional[Callable[[int], None]] = None,
+    retries: Optional[int] = None,
+    idempotent: Optional[bool] = None,
+    stream: bool = False
 ) -> Tuple[Dict[str, Any], int]:
     """
     Make an API request with standardized error handling.
+
+    Idempotent requests are retried with exponential backoff and jitter on
+    timeouts, connection errors and 429/5xx responses; other requests are
+    only retried when the server cannot have processed them (connection
+    failures, 429 and 503). Each upstream host has a circuit breaker that
+    fails requests fast while the host is down.
     
     Args:
         method: HTTP method (get, post, etc.)
@@ -34,12 +161,18 @@ async def make_api_request(
         params: Optional query parameters
         json: Optional JSON body
         data: Optional form data
-        content: Optional raw content
+        content: Optional raw content, or a function returning an async iterator of chunks
+            to stream the body; it is called again for every retry
         headers: Optional headers to include
         use_brain_headers: Whether to include brain API headers
         timeout: Request timeout in seconds
         log_message: Message to log on success
         parse_json: Whether to parse the response as JSON
+        on_request_sent: Optional callback given the size of the request body in bytes
+        retries: Maximum number of retries, defaults to the configured value
+        idempotent: Whether the request is safe to repeat, defaults to True for GET, PUT, DELETE, HEAD and OPTIONS
+        stream: Return the httpx response with its body unread instead of the content;
+            the caller must close it
 
     Returns:
         Tuple[Dict[str, Any], int]: The JSON response and status code
@@ -52,53 +185,373 @@ async def make_api_request(
         request_headers.update(headers)
     if use_brain_headers:
         request_headers.update(settings.brain_headers)
-        
-    async with httpx.AsyncClient(timeout=timeout, limits=CLIENT_LIMITS) as client:
+
+    host = httpx.URL(url).host
+    breaker = get_circuit_breaker(host)
+    if not breaker.allow():
+        _metrics["short_circuited"] += 1
+        logger.warning(f"Circuit breaker open for {host}, failing fast: {log_message}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Upstream service {host} is unavailable",
+        )
+
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    max_retries = settings.http_retries if retries is None else retries
+
+    client = get_http_client()
+    request_kwargs = {
+        "headers": request_headers,
+        "timeout": timeout,
+    }
+    if params is not None:
+        request_kwargs["params"] = params
+    if method.lower() != "get" and json is not None:
+        request_kwargs["content"] = json_codec.dumps(json)
+        request_headers.setdefault("Content-Type", "application/json")
+    if data is not None:
+        request_kwargs["data"] = data
+    if content is not None and not callable(content):
+        request_kwargs["content"] = content
+
+    attempt = 0
+    while True:
+        _metrics["requests"] += 1
+        if callable(content):
+            # A streamed body is consumed by the attempt, start a fresh one each time
+            request_kwargs["content"] = content()
         try:
-            request_kwargs = {
-                "headers": request_headers,
-            }
-            if params is not None:
-                request_kwargs["params"] = params
-            if method.lower() != "get" and json is not None:
-                request_kwargs["json"] = json
-            if data is not None:
-                request_kwargs["data"] = data
-            if content is not None:
-                request_kwargs["content"] = content
-                
-            response = await getattr(client, method.lower())(url, **request_kwargs)
+            response = await client.send(
+                client.build_request(method.upper(), url, **request_kwargs), stream=stream
+            )
+            if stream and response.status_code >= 400:
+                # Error bodies are small, read them for logging and to free the connection
+                await response.aread()
+            if response.status_code in RETRY_STATUS_CODES:
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                retryable = idempotent or response.status_code in (429, 503)
+                if retryable and attempt < max_retries and breaker.allow():
+                    delay = _retry_delay(attempt, response)
+                    attempt += 1
+                    _metrics["retries"] += 1
+                    logger.warning(
+                        f"{log_message} got status {response.status_code}, "
+                        f"retry {attempt}/{max_retries} in {delay:.1f}s"
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+            elif response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
             response.raise_for_status()
             logger.info(f"Successfully {log_message}")
+            if on_request_sent:
+                body = request_kwargs.get("content")
+                on_request_sent(
+                    len(body) if isinstance(body, bytes)
+                    else int(response.request.headers.get("Content-Length", 0))
+                )
             
+            if stream:
+                return response, response.status_code
             # Return either JSON or raw content based on parse_json flag
             if parse_json:
                 try:
-                    return response.json(), response.status_code
-                except json.JSONDecodeError:
+                    return json_codec.loads(response.content), response.status_code
+                except ValueError:
                     logger.warning(f"Response is not valid JSON: {response.text[:100]}...")
                     return response.text, response.status_code
             else:
                 return response.content, response.status_code
-            
-        except httpx.TimeoutException:
-            logger.error(f"Request timed out: {log_message}")
-            raise HTTPException(status_code=504, detail="Request timed out")
+
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            breaker.record_failure()
+            # A request that never connected cannot have been processed
+            retryable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+            if retryable and attempt < max_retries and breaker.allow():
+                delay = _retry_delay(attempt)
+                attempt += 1
+                _metrics["retries"] += 1
+                logger.warning(
+                    f"{log_message} failed with {type(e).__name__}, "
+                    f"retry {attempt}/{max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+            _metrics["failures"] += 1
+            if isinstance(e, httpx.TimeoutException):
+                logger.error(f"Request timed out: {log_message}")
+                raise HTTPException(status_code=504, detail="Request timed out")
+            logger.error(f"An error occurred: {e}")
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
         except httpx.HTTPStatusError as e:
+            _metrics["failures"] += 1
             logger.error(f"HTTP error occurred: {e.response.status_code} - {e.response.text}")
-            raise HTTPException(status_code=e.response.status_code, detail=f"Failed to {log_message}")
+            raise HTTPException(status_code=e.response.status_code, detail=f"Failed to {log_message}") from e
         except Exception as e:
+            _metrics["failures"] += 1
             logger.error(f"An error occurred: {e}")
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
 
-async def get_json(url: str, params: Optional[Dict[str, Any]] = None, log_message: str = "fetch data", **kwargs) -> Dict[str, Any]:
-    """Make a GET request and return the JSON response."""
-    data, _ = await make_api_request("get", url, params=params, log_message=log_message, **kwargs)
+def _coalesce_key(url: str, params: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> Optional[Tuple]:
+    """Key identifying identical GETs, or None if the call cannot be coalesced"""
+    if not set(kwargs) <= _COALESCE_OPTIONS:
+        return None
+    try:
+        return (
+            url,
+            tuple(sorted((params or {}).items())),
+            tuple(sorted((kwargs.get("headers") or {}).items())),
+            kwargs.get("use_brain_headers", True),
+            kwargs.get("parse_json", True),
+        )
+    except TypeError:
+        # Unhashable or unorderable values
+        return None
+
+
+def _forget_inflight(inflight: Dict[Any, asyncio.Task], key: Tuple, task: asyncio.Task):
+    if inflight.get(key) is task:
+        del inflight[key]
+    # Mark the outcome as retrieved in case every waiter was cancelled
+    if not task.cancelled():
+        task.exception()
+
+
+async def _single_flight(key: Tuple, log_message: str, request: Callable[[], Awaitable[Any]]) -> Any:
+    """Await request(), or the identical request already in flight under key on this loop"""
+    loop = asyncio.get_running_loop()
+    inflight = _inflight_gets.setdefault(loop, {})
+    task = inflight.get(key)
+    if task is None:
+        _coalesce_metrics["upstream_gets"] += 1
+        task = loop.create_task(request())
+        inflight[key] = task
+        task.add_done_callback(lambda done: _forget_inflight(inflight, key, done))
+    else:
+        _coalesce_metrics["coalesced_gets"] += 1
+        logger.debug(f"Joining in-flight request: {log_message}")
+
+    # Shielded so a waiter that is cancelled does not cancel the shared request
+    return await asyncio.shield(task)
+
+
+async def get_json(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    log_message: str = "fetch data",
+    coalesce: bool = True,
+    **kwargs,
+) -> Dict[str, Any]:
+    """
+    Make a GET request and return the JSON response.
+
+    Identical GETs (same URL, params and headers) made while one is already
+    in flight wait for that request and share its result instead of calling
+    the upstream again. Callers share the returned object, so it must not be
+    modified; pass coalesce=False for a private copy or for requests that
+    must not be shared, e.g. ones that return one-time values.
+    """
+    key = _coalesce_key(url, params, kwargs) if coalesce else None
+    if key is None:
+        data, _ = await make_api_request("get", url, params=params, log_message=log_message, **kwargs)
+        return data
+
+    data, _ = await _single_flight(
+        key,
+        log_message,
+        partial(make_api_request, "get", url, params=params, log_message=log_message, **kwargs),
+    )
     return data
 
-async def post_json(url: str, json: Dict[str, Any], log_message: str = "post data", **kwargs) -> Dict[str, Any]:
-    """Make a POST request with JSON data and return the JSON response."""
-    data, _ = await make_api_request("post", url, json=json, log_message=log_message, **kwargs)
+async def stream_response(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    log_message: str = "fetch data",
+    **kwargs,
+) -> StreamingResponse:
+    """
+    Make a GET request and stream the upstream body straight to the client.
+
+    For routes that return the brain's payload unchanged: nothing is parsed
+    or re-encoded. The upstream status and the headers in PASS_THROUGH_HEADERS
+    are kept. Bodies are sent decoded, so Content-Encoding and Content-Length
+    are not passed on. Errors are raised before anything is streamed, like
+    make_api_request; a connection lost mid-body truncates the response.
+    """
+    response, status_code = await make_api_request(
+        "get", url, params=params, log_message=log_message, stream=True, **kwargs
+    )
+    return StreamingResponse(
+        response.aiter_bytes(),
+        status_code=status_code,
+        headers=_pass_through_headers(response),
+        background=BackgroundTask(response.aclose),
+    )
+
+
+async def fetch_pass_through(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    log_message: str = "fetch data",
+    coalesce: bool = True,
+    **kwargs,
+) -> Tuple[bytes, int, Dict[str, str]]:
+    """
+    Make a GET request and return the raw body with the upstream status and
+    the headers in PASS_THROUGH_HEADERS, for responses that are stored and
+    replayed later instead of streamed.
+
+    The whole body is read into memory. Identical requests made while one is
+    in flight share it, like get_json.
+    """
+    key = _coalesce_key(url, params, kwargs) if coalesce else None
+    if key is None:
+        return await _read_pass_through(url, params, log_message, **kwargs)
+    return await _single_flight(
+        ("pass_through",) + key,
+        log_message,
+        partial(_read_pass_through, url, params, log_message, **kwargs),
+    )
+
+
+async def _read_pass_through(
+    url: str, params: Optional[Dict[str, Any]], log_message: str, **kwargs
+) -> Tuple[bytes, int, Dict[str, str]]:
+    response, status_code = await make_api_request(
+        "get", url, params=params, log_message=log_message, stream=True, **kwargs
+    )
+    try:
+        body = await response.aread()
+    finally:
+        await response.aclose()
+    return body, status_code, _pass_through_headers(response)
+
+
+def _pass_through_headers(response: httpx.Response) -> Dict[str, str]:
+    return {
+        name: value for name, value in response.headers.items() if name.lower() in PASS_THROUGH_HEADERS
+    }
+
+
+def _compression_rejected(error: HTTPException) -> bool:
+    """
+    Whether the server refused a request because of its Content-Encoding.
+
+    415 is the status for an unsupported Content-Encoding. A 400 only counts
+    when its body names Content-Encoding, as any other 400 is about the
+    payload and resending it could process a non-idempotent request twice.
+    """
+    if error.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE:
+        return True
+    upstream = error.__cause__
+    return (
+        error.status_code == status.HTTP_400_BAD_REQUEST
+        and isinstance(upstream, httpx.HTTPStatusError)
+        and "content-encoding" in upstream.response.text.lower()
+    )
+
+
+def _compression_allowed(host: Optional[str]) -> bool:
+    """False while the host is within http_compression_retry_seconds of rejecting a compressed body"""
+    until = _uncompressed_hosts.get(host)
+    if until is None:
+        return True
+    if time.monotonic() < until:
+        return False
+    # Give compression another try, the server may have been upgraded
+    _uncompressed_hosts.pop(host, None)
+    return True
+
+
+def _compress(body: bytes, encoding: str) -> Tuple[bytes, str]:
+    """Compress a request body, returning the body and the encoding actually used"""
+    if encoding == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            logger.warning("zstd compression requested but zstandard is not installed, using gzip")
+        else:
+            return zstandard.ZstdCompressor(level=settings.http_compression_level).compress(body), "zstd"
+    return gzip.compress(body, compresslevel=settings.http_compression_level), "gzip"
+
+
+async def _encode_json_body(
+    payload: Any, compress: Optional[bool], log_message: str, host: Optional[str] = None
+) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Serialize a JSON body, compressing it when it is large enough.
+
+    With compress=None the configured encoding is applied to bodies of at
+    least http_compression_min_bytes, unless the host has recently rejected
+    a compressed body; True or False forces it on or off.
+    """
+    body = json_codec.dumps(payload)
+    headers = {"Content-Type": "application/json"}
+    encoding = settings.http_compression.lower()
+    if compress is None:
+        compress = (
+            encoding != "none"
+            and _compression_allowed(host)
+            and len(body) >= settings.http_compression_min_bytes
+        )
+    if not compress:
+        return body, headers
+
+    raw_size = len(body)
+    # Compressing a multi-megabyte body would stall the event loop
+    compressed, used_encoding = await asyncio.to_thread(
+        _compress, body, "gzip" if encoding == "none" else encoding
+    )
+    headers["Content-Encoding"] = used_encoding
+    logger.info(
+        f"Compressed {log_message} body with {used_encoding}: {raw_size} -> {len(compressed)} bytes "
+        f"({len(compressed) / raw_size:.0%} of raw)"
+    )
+    return compressed, headers
+
+
+async def post_json(
+    url: str,
+    json: Dict[str, Any],
+    log_message: str = "post data",
+    compress: Optional[bool] = None,
+    **kwargs,
+) -> Dict[str, Any]:
+    """
+    Make a POST request with JSON data and return the JSON response.
+
+    Bodies above the configured size threshold are sent compressed with a
+    Content-Encoding header, see _encode_json_body. If the server refuses a
+    compressed body for its encoding (see _compression_rejected) the request
+    is sent again uncompressed, and bodies to that host are not compressed
+    for http_compression_retry_seconds.
+    """
+    host = httpx.URL(url).host
+    extra_headers = kwargs.pop("headers", None) or {}
+    content, headers = await _encode_json_body(json, compress, log_message, host)
+    headers.update(extra_headers)
+    try:
+        data, _ = await make_api_request(
+            "post", url, content=content, headers=headers, log_message=log_message, **kwargs
+        )
+    except HTTPException as e:
+        if "Content-Encoding" not in headers or not _compression_rejected(e):
+            raise
+        _uncompressed_hosts[host] = time.monotonic() + settings.http_compression_retry_seconds
+        logger.warning(
+            f"{host} rejected the {headers['Content-Encoding']} body of {log_message} with status "
+            f"{e.status_code}, sending it uncompressed"
+        )
+        content, headers = await _encode_json_body(json, False, log_message, host)
+        headers.update(extra_headers)
+        data, _ = await make_api_request(
+            "post", url, content=content, headers=headers, log_message=log_message, **kwargs
+        )
     return data
 
 async def put_json(url: str, json: Dict[str, Any], log_message: str = "update data", **kwargs) -> Dict[str, Any]:
@@ -0,0 +1,97 @@
+import datetime
+import decimal
+import enum
+import json
+import logging
+import uuid
+from typing import Any, Callable, Optional
+
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Encode the types that stdlib json (and orjson, for Decimal) cannot"""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _stdlib_loads(data: Any) -> Any:
+    return json.loads(data)
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    # Non-string dict keys (e.g. ints) are allowed by stdlib json, keep that behaviour
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _orjson_loads(data: Any) -> Any:
+    return orjson.loads(data)
+
+
+BACKENDS = {"stdlib": (_stdlib_dumps, _stdlib_loads)}
+if orjson is not None:
+    BACKENDS["orjson"] = (_orjson_dumps, _orjson_loads)
+
+backend = "orjson" if orjson is not None else "stdlib"
+_dumps: Callable[[Any], bytes]
+_loads: Callable[[Any], Any]
+_dumps, _loads = BACKENDS[backend]
+
+
+def configure(name: Optional[str] = "auto") -> str:
+    """
+    Select the JSON backend used across the app.
+
+    "auto" picks orjson when it is installed and falls back to the standard
+    library otherwise. Returns the name of the backend in use.
+    """
+    global backend, _dumps, _loads
+    name = (name or "auto").lower()
+    if name == "auto":
+        name = "orjson" if "orjson" in BACKENDS else "stdlib"
+    elif name not in BACKENDS:
+        logger.warning(f"JSON backend {name} is not available, using stdlib")
+        name = "stdlib"
+    backend = name
+    _dumps, _loads = BACKENDS[name]
+    logger.info(f"Using {backend} JSON backend")
+    return backend
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON, handling datetimes, Decimals and UUIDs"""
+    return _dumps(obj)
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from bytes or str; raises ValueError on invalid input"""
+    return _loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with the configured JSON backend"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
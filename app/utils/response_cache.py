@@ -0,0 +1,203 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastapi.responses import Response
+
+from app.config import settings
+from app.utils.cache_invalidation import CacheInvalidationBus
+from app.utils.http_client import fetch_pass_through, get_json, stream_response
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    In-memory LRU cache of brain responses with per-entry TTLs.
+
+    Entries are tagged (e.g. "brain:<id>") so writes can drop every cached
+    response they affect. Each tag carries a generation number: a response
+    fetched before an invalidation is not stored once it arrives, so a slow
+    read cannot put stale data back into the cache.
+
+    The cache lives in one worker process; invalidate_tag() also tells the
+    other workers through cache_invalidation_bus once it is started.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        # Used from the app's event loop and the scheduled job loop
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """Return (found, value) for a live entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return False, None
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return True, value
+
+    def version(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        """Snapshot of the tag generations, to pass to set() after the fetch"""
+        with self._lock:
+            return (self._epoch,) + tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def set(
+        self,
+        key: Tuple,
+        value: Any,
+        ttl: float,
+        tags: Iterable[str] = (),
+        version: Optional[Tuple[int, ...]] = None,
+    ):
+        tags = tuple(tags)
+        with self._lock:
+            current = (self._epoch,) + tuple(self._generations.get(tag, 0) for tag in tags)
+            if version is not None and version != current:
+                # Invalidated while the response was in flight
+                return
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, tag: str) -> int:
+        """Drop every entry carrying the tag, returns the number dropped"""
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            stale = [key for key, (_, _, tags) in self._entries.items() if tag in tags]
+            for key in stale:
+                del self._entries[key]
+            self._invalidations += 1
+        if stale:
+            logger.debug(f"Invalidated {len(stale)} cached responses for {tag}")
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+brain_cache = ResponseCache(settings.brain_cache_max_entries)
+
+
+def brain_tag(brain_id: str) -> str:
+    return f"brain:{brain_id}"
+
+
+def _invalidate_local(tag: Optional[str]):
+    if tag is None:
+        brain_cache.clear()
+    else:
+        brain_cache.invalidate(tag)
+
+
+# Applies invalidations made by other workers to this worker's cache
+cache_invalidation_bus = CacheInvalidationBus("brain_cache_invalidation", _invalidate_local)
+
+
+def invalidate_tag(tag: Optional[str]):
+    """Drop cached responses carrying tag in every worker; None drops everything"""
+    _invalidate_local(tag)
+    cache_invalidation_bus.publish(tag)
+
+
+def invalidate_brain(brain_id: Optional[str]):
+    """Drop cached reads for a brain after a write to it; None drops everything"""
+    invalidate_tag(None if brain_id is None else brain_tag(brain_id))
+
+
+async def cached_get_json(
+    endpoint: str,
+    url: str,
+    ttl: float,
+    params: Optional[Dict[str, Any]] = None,
+    tags: Iterable[str] = (),
+    **kwargs,
+) -> Any:
+    """
+    get_json() through the brain response cache.
+
+    The key is the endpoint name and the query params, so the brain ID must
+    be part of either. A ttl of 0 bypasses the cache. Errors are not cached.
+    Cached values are shared between requests and must not be modified.
+    """
+    if ttl <= 0:
+        return await get_json(url, params=params, **kwargs)
+
+    key = (endpoint, url, tuple(sorted((params or {}).items())))
+    found, value = brain_cache.get(key)
+    if found:
+        return value
+
+    tags = tuple(tags)
+    version = brain_cache.version(tags)
+    value = await get_json(url, params=params, **kwargs)
+    brain_cache.set(key, value, ttl, tags, version)
+    return value
+
+
+async def cached_pass_through(
+    endpoint: str,
+    url: str,
+    ttl: float,
+    params: Optional[Dict[str, Any]] = None,
+    tags: Iterable[str] = (),
+    **kwargs,
+) -> Response:
+    """
+    Return the brain's JSON body unparsed, through the brain response cache.
+
+    Cached responses are kept as the raw bytes the brain sent, together with
+    its status and the headers stream_response() passes on, and replayed as
+    they are. A miss reads the whole upstream body into memory before
+    answering, and concurrent misses for the same request share one
+    upstream call. With a ttl of 0 the upstream body is streamed through
+    with stream_response() instead, which suits endpoints with large bodies.
+    """
+    if ttl <= 0:
+        return await stream_response(url, params=params, **kwargs)
+
+    key = (endpoint, url, tuple(sorted((params or {}).items())), "pass_through")
+    found, value = brain_cache.get(key)
+    if not found:
+        tags = tuple(tags)
+        version = brain_cache.version(tags)
+        value = await fetch_pass_through(url, params=params, **kwargs)
+        brain_cache.set(key, value, ttl, tags, version)
+
+    body, status_code, headers = value
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
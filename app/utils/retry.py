@@ -0,0 +1,19 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Utility function for retry logic
+async def retry_with_backoff(func, max_retries=3, initial_delay=1):
+    for attempt in range(max_retries):
+        try:
+            return await func()
+        except Exception as e:
+            if attempt == max_retries - 1:
+                raise e
+            delay = initial_delay * (2**attempt)  # exponential backoff
+            logger.warning(
+                f"Attempt {attempt + 1}/{max_retries} failed: {str(e)}. Retrying in {delay}s"
+            )
+            await asyncio.sleep(delay)
@@ -1,9 +1,10 @@
 import asyncio
 import logging
-from typing import Optional
+from typing import List, Optional
 
 from sqlalchemy.orm import Session
 
+from app.models.database.scheduled_jobs_models import ScheduledJob
 from app.models.database.tenant_models import TenantMetadata
 from app.models.xero.xero_token_models import XeroToken
 
@@ -38,6 +39,22 @@ async def get_active_tenant_id(db: Session, user_id: str) -> Optional[str]:
         return None
 
 
+async def get_user_tenant_ids(db: Session, user_id: str) -> List[str]:
+    """
+    Get the IDs of every tenant the user has connected or scheduled jobs for.
+    Used to scope tenant-level data such as job runs and rate limits to the caller.
+    """
+    tenant_ids = {
+        tenant_id
+        for (tenant_id,) in db.query(TenantMetadata.tenant_id).filter(TenantMetadata.user_id == user_id)
+    }
+    tenant_ids.update(
+        tenant_id
+        for (tenant_id,) in db.query(ScheduledJob.tenant_id).filter(ScheduledJob.user_id == user_id)
+    )
+    return sorted(tenant_ids)
+
+
 async def validate_tenant_access(db: Session, user_id: str, tenant_id: str) -> bool:
     """
     Validate that the user has access to the specified tenant.